@@ -0,0 +1,131 @@
+"""
+Build and load the compact ABI bundle.
+
+The full ABI files are large but the bot only uses a small part of each contract.
+Running this module regenerates `abi_bundle.json`, which keeps only the functions and
+events listed in BUNDLED_ABI (plus each contract's custom errors, for revert decoding)
+and records their precomputed selectors:
+
+    python abi_bundle.py
+
+Re-run it whenever BUNDLED_ABI changes or a full ABI file is updated.
+"""
+from eth_utils import event_abi_to_log_topic, function_abi_to_4byte_selector
+import json
+import logging
+import os
+import sys
+
+app_logger = logging.getLogger('app_logger')
+
+BUNDLE_FILE = 'abi_bundle.json'
+
+# Contract ABI files by pool name, with the functions and events the bot uses
+BUNDLED_ABI = {
+    "lbp": {
+        "file": 'lbp_contract_abi.json',
+        "functions": [
+            "balanceOf", "balanceOfBatch", "getActiveId", "getBin", "getBinStep", "getNextNonEmptyBin",
+            "getPriceFromId", "getStaticFeeParameters", "getSwapOut", "getTokenX", "getTokenY",
+            "getVariableFeeParameters", "totalSupply"
+        ],
+        "events": ["DepositedToBins", "Swap", "TransferBatch", "WithdrawnFromBins"]
+    },
+    "lbrouter": {
+        "file": 'lbrouter_contract_abi.json',
+        "functions": [
+            "addLiquidity", "getFactory", "getSwapOut", "getV1Factory", "removeLiquidity",
+            "swapExactTokensForNATIVE", "swapExactTokensForTokens"
+        ],
+        "events": []
+    },
+    "erc20": {
+        "file": 'erc20_contract_abi.json',
+        "functions": ["allowance", "approve", "balanceOf", "decimals", "symbol", "transfer"],
+        "events": []
+    },
+    "rewarder": {
+        "file": 'rewarder_contract_abi.json',
+        "functions": ["claim", "getPendingRewards", "getRewardToken"],
+        "events": ["Claim"]
+    },
+    "rebalance_executor": {
+        "file": 'rebalance_executor_abi.json',
+        "functions": ["claim", "owner", "rebalance", "withdraw"],
+        "events": ["Claimed", "Rebalanced", "Withdrawn"]
+    }
+}
+
+
+def _strip(entry):
+    """Drop ABI fields web3 does not need for encoding or decoding"""
+    if isinstance(entry, dict):
+        return {key: _strip(value) for key, value in entry.items() if key != "internalType"}
+    if isinstance(entry, list):
+        return [_strip(item) for item in entry]
+    return entry
+
+
+def load_full_abi(abi_name) -> list:
+    """Load the complete ABI file for a contract"""
+    with open(BUNDLED_ABI[abi_name]["file"], 'r') as f:
+        return json.load(f)
+
+
+def build_bundle() -> dict:
+    """
+    Build the compact bundle from the full ABI files
+    Returns:
+        dict: {abi_name: {"abi": list, "selectors": {name: selector}}}
+    """
+    bundle = {}
+    for abi_name, spec in BUNDLED_ABI.items():
+        full_abi = load_full_abi(abi_name)
+        functions = set(spec["functions"])
+        events = set(spec["events"])
+
+        abi = []
+        selectors = {}
+        for entry in full_abi:
+            if entry["type"] == "function" and entry["name"] in functions:
+                selectors[entry["name"]] = "0x" + function_abi_to_4byte_selector(entry).hex()
+            elif entry["type"] == "event" and entry["name"] in events:
+                selectors[entry["name"]] = "0x" + event_abi_to_log_topic(entry).hex()
+            elif entry["type"] != "error":
+                continue
+            abi.append(_strip(entry))
+
+        missing = (functions | events) - set(selectors)
+        if missing:
+            raise Exception(f"{spec['file']} does not define {sorted(missing)}")
+
+        bundle[abi_name] = {"abi": abi, "selectors": selectors}
+
+    return bundle
+
+
+def load_bundle(path=BUNDLE_FILE) -> dict:
+    """
+    Load the compact bundle, falling back to the full ABI files if it is missing or unreadable
+    Returns:
+        dict: {abi_name: {"abi": list, "selectors": {name: selector}}}
+    """
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    except Exception as e:
+        app_logger.warning(f"Failed to load ABI bundle {path}, using full ABIs: {e}")
+        return {abi_name: {"abi": load_full_abi(abi_name), "selectors": {}} for abi_name in BUNDLED_ABI}
+
+
+if __name__ == '__main__':
+    bundle = build_bundle()
+    output = sys.argv[1] if len(sys.argv) > 1 else BUNDLE_FILE
+
+    with open(output, 'w') as f:
+        json.dump(bundle, f, separators=(',', ':'), sort_keys=True)
+
+    for abi_name, contents in bundle.items():
+        print(f"{abi_name}: {len(contents['selectors'])} functions/events, {len(contents['abi'])} entries")
+    print(f"Wrote {output} ({os.path.getsize(output):,} bytes)")
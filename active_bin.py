@@ -0,0 +1,121 @@
+"""
+In-memory active bin of a pair, followed from its Swap logs.
+
+Every Swap log carries the pair's active id after the swap, so once the tracker has
+been synced from chain it knows the active id and its price without any RPC call.
+The price is computed locally from the id and the bin step (see lb_math).
+
+Logs have no sequence number, so a gap can only be seen from the outside: the log
+subscription marks a pair stale after every (re)subscription. A removed log, a log
+older than the last one applied, or a log from a block already seen under another
+hash is a reorg and also marks the tracker stale. A stale tracker ignores logs until
+it is synced from `getActiveId` again.
+"""
+import logging
+
+from lb_math import get_price_from_id
+
+app_logger = logging.getLogger('app_logger')
+
+
+class ActiveBinTracker:
+    """
+    Active id and price of one pair, plus the range of bins the position holds
+    - bin_step: the pair's bin step, for local prices
+    """
+
+    def __init__(self, pair, bin_step):
+        self.pair = pair
+        self.bin_step = int(bin_step)
+        self.active_id = None
+        self.stale = True
+        self.last_log = None
+        self.block_hash = None
+        self.lowest = None
+        self.highest = None
+        self.distance_bins = 1
+        self.armed = False
+        self._price = (None, None)
+
+    def sync(self, active_id) -> bool:
+        """
+        Set the active id read from chain
+        Returns:
+            bool: True if it differs from the tracked one
+        """
+        moved = self.active_id != active_id
+        self.active_id = int(active_id)
+        self.stale = False
+        return moved
+
+    def invalidate(self, reason) -> None:
+        if not self.stale:
+            app_logger.info(f"Active bin of {self.pair} needs a resync: {reason}")
+        self.stale = True
+
+    def apply(self, logs) -> bool:
+        """
+        Follow the active id through a pair's Swap logs, in the order they were received
+        Args:
+            logs (list): Raw Swap logs of the pair
+        Returns:
+            bool: True if the active id changed
+        """
+        before = self.active_id
+        for log in logs:
+            block = _int(log["blockNumber"])
+            position = (block, _int(log["logIndex"]))
+
+            if log.get("removed"):
+                self.invalidate(f"log removed at block {block}")
+                continue
+            if self.last_log is not None:
+                if position == self.last_log:
+                    continue
+                if position < self.last_log or (block == self.last_log[0] and log.get("blockHash") != self.block_hash):
+                    self.invalidate(f"log at {position} after {self.last_log}")
+
+            self.last_log = position
+            self.block_hash = log.get("blockHash")
+            if not self.stale:
+                # The active id is the first word of the log data
+                data = log["data"]
+                self.active_id = int(data[2:66], 16) if isinstance(data, str) else int.from_bytes(bytes(data)[:32], 'big')
+
+        return not self.stale and self.active_id != before
+
+    @property
+    def raw_price(self) -> int:
+        """128.128 price of the active bin, computed once per id"""
+        if self._price[0] != self.active_id:
+            self._price = (self.active_id, get_price_from_id(self.active_id, self.bin_step))
+        return self._price[1]
+
+    def watch(self, bin_ids, armed=False, distance_bins=1) -> None:
+        """
+        Remember the position after a cycle
+        Args:
+            bin_ids (list): Bins the position covers, empty if there is none
+            armed (bool): Whether the position's rebalance trigger is armed
+            distance_bins (int): Bins outside the position the trigger arms at
+        """
+        self.lowest, self.highest = (min(bin_ids), max(bin_ids)) if bin_ids else (None, None)
+        self.armed = armed
+        self.distance_bins = int(distance_bins)
+
+    def left_range(self) -> bool:
+        """True if the active id is far enough outside the watched position's bins to arm its trigger"""
+        if self.lowest is None:
+            return False
+        return self.active_id <= self.lowest - self.distance_bins or self.active_id >= self.highest + self.distance_bins
+
+    def needs_cycle(self) -> bool:
+        """
+        Whether a move has to go through the decision logic: the active id left the
+        position's range, its trigger is armed and may disarm, or there is no position
+        """
+        return self.stale or self.lowest is None or self.armed or self.left_range()
+
+
+def _int(value) -> int:
+    return int(value, 16) if isinstance(value, str) else int(value)
@@ -0,0 +1,156 @@
+"""
+Asyncio RPC layer for concurrent reads.
+
+AsyncRPC runs an AsyncWeb3 client on a private event loop in a daemon thread, so the
+aiohttp connection pool survives between calls and between warm invocations. Async
+code awaits it directly, and sync code hands it coroutines through `run`.
+
+AsyncMulticallReader is a MulticallReader whose batches go through that client.
+Chunks of one read are sent concurrently, and `read_async` can be gathered with
+other reads such as the fee history and the pending nonce. Its sync `read` is a thin
+wrapper, so every existing caller keeps working unchanged.
+"""
+import asyncio
+import logging
+import threading
+
+from multicall import MULTICALL3_ADDRESS, MulticallReader
+
+app_logger = logging.getLogger('app_logger')
+
+
+class AsyncRPC:
+    """
+    AsyncWeb3 client with a pooled aiohttp session, owned by a background event loop
+    - max_connections: HTTP connections kept open to the RPC endpoint
+    - timeout: seconds before a request, or a coroutine handed to `run`, gives up
+    """
+
+    def __init__(self, rpc_url, max_connections=20, timeout=30):
+        self.rpc_url = rpc_url
+        self.max_connections = int(max_connections)
+        self.timeout = float(timeout)
+        self.loop = None
+        self.web3 = None
+        self.session = None
+        self.connecting = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start the event loop thread, once"""
+        with self.lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-rpc", daemon=True).start()
+                self.loop = loop
+        return self.loop
+
+    def run(self, coroutine):
+        """Run a coroutine on the RPC loop from sync code and wait for its result"""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.start())
+        return future.result(self.timeout * 2)
+
+    def gather(self, *coroutines) -> list:
+        """Run coroutines concurrently from sync code, results in order"""
+        async def gathered():
+            return await asyncio.gather(*coroutines)
+        return self.run(gathered())
+
+    async def client(self):
+        """AsyncWeb3 instance, created on the loop with its own connection pool on first use"""
+        if self.web3 is None:
+            # Concurrent first callers wait on the same connection
+            if self.connecting is None:
+                self.connecting = asyncio.ensure_future(self._connect())
+            try:
+                await self.connecting
+            except Exception:
+                self.connecting = None
+                raise
+        return self.web3
+
+    async def _connect(self) -> None:
+        from aiohttp import ClientSession, ClientTimeout, TCPConnector
+        from web3 import AsyncWeb3
+
+        provider = AsyncWeb3.AsyncHTTPProvider(self.rpc_url)
+        self.session = ClientSession(
+            connector=TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+            timeout=ClientTimeout(total=self.timeout),
+            raise_for_status=True
+        )
+        await provider.cache_async_session(self.session)
+        self.web3 = AsyncWeb3(provider)
+
+    async def fee_history(self, block_count, percentiles):
+        return await (await self.client()).eth.fee_history(block_count, 'latest', percentiles)
+
+    async def nonce(self, address) -> int:
+        return await (await self.client()).eth.get_transaction_count(address, 'pending')
+
+    async def get_code(self, address) -> bytes:
+        return await (await self.client()).eth.get_code(address)
+
+    async def call(self, to, data, block_identifier='latest') -> bytes:
+        return await (await self.client()).eth.call({"to": to, "data": data}, block_identifier)
+
+    async def post_batch(self, payload) -> list:
+        """Send a raw JSON-RPC batch over the pooled session"""
+        await self.client()
+        async with self.session.post(self.rpc_url, json=payload) as response:
+            return await response.json()
+
+
+class AsyncMulticallReader(MulticallReader):
+    """MulticallReader that sends its batches concurrently through an AsyncRPC"""
+
+    def __init__(self, web3, rpc_url, rpc, max_batch_size=200, contracts=None, multicall_cooldown=60):
+        super().__init__(web3, rpc_url, max_batch_size, contracts, multicall_cooldown)
+        self.rpc = rpc
+
+    def read(self, calls: dict, block_identifier='latest') -> dict:
+        """Sync entry point, runs read_async on the RPC loop"""
+        if not calls:
+            return {}
+        return self.rpc.run(self.read_async(calls, block_identifier))
+
+    async def read_async(self, calls: dict, block_identifier='latest') -> dict:
+        """
+        Execute a set of view calls, sending each chunk of the batch concurrently
+        Args:
+            calls (dict): {key: bound contract function or NativeBalance}
+            block_identifier: Block number or tag to read at
+        Returns:
+            dict: {key: decoded result}, results are None for failed calls
+        """
+        if not calls:
+            return {}
+
+        keys, encoded = self._encode_all(calls)
+        chunks = await asyncio.gather(*[
+            self._execute_async(chunk, block_identifier) for chunk in self._chunks(encoded)
+        ])
+        return self._decode_all(keys, encoded, [result for chunk in chunks for result in chunk])
+
+    async def _execute_async(self, chunk, block_identifier='latest') -> list:
+        if self._use_multicall():
+            try:
+                aggregate = self.multicall_contract.functions.aggregate3(
+                    [(target, True, calldata) for _, target, calldata in chunk]
+                )
+                return_data = await self.rpc.call(MULTICALL3_ADDRESS, "0x" + self._encode_calldata(aggregate).hex(), block_identifier)
+                self.round_trips += 1
+                return [(success, data) for success, data in self._decode(aggregate, return_data)]
+
+            except Exception as e:
+                self._multicall_failed(e, await self._multicall_deployed_async())
+
+        response = await self.rpc.post_batch(self._rpc_batch_payload(chunk, block_identifier))
+        self.round_trips += 1
+        return self._rpc_batch_results(chunk, response)
+
+    async def _multicall_deployed_async(self) -> bool:
+        try:
+            return len(await self.rpc.get_code(MULTICALL3_ADDRESS)) > 0
+        except Exception:
+            return True
@@ -0,0 +1,543 @@
+"""
+Backtest rebalance policies over recorded LB pair events.
+
+Events are ingested once into a columnar EventStore (see event_store.py), then any
+number of policies are replayed against the same history:
+
+    python backtest.py ingest --store data/pair --from-block 1000000 --to-block 3600000
+    python backtest.py run --store data/pair --lower 0.2 --upper 0.6 --max-change 20 \\
+        --distance 1,2,4 --dwell 0,300 --bins 1,5 --amount-x 1000 --amount-y 300
+
+Options of `run` that take comma separated values are expanded into a grid of policies.
+
+The active bin is replayed at block resolution from Swap events. Policies are evaluated
+once per cycle, like the scheduled function, using the same limit, price change and
+trigger checks as manage_liquidity. Fees are attributed swap by swap from our share of
+each bin's liquidity, with bin reserves reconstructed from the snapshot taken at ingest
+plus every Swap, DepositedToBins and WithdrawnFromBins since. Our position is treated
+as marginal: it earns its share of fees but does not change the recorded swaps.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+
+import numpy as np
+
+from event_store import EventStore
+from lb_math import get_prices_from_ids, prices_to_float
+from liquidity_shapes import LiquidityShape
+from triggers import DEFAULT_REBALANCE_GAS, RebalanceTrigger
+
+app_logger = logging.getLogger('app_logger')
+
+# Scheduler cadence of the deployed function
+DEFAULT_CYCLE_SECONDS = 60
+
+# Log index used to read a bin's state at the end of a block
+END_OF_BLOCK = (1 << 16) - 1
+
+
+class Policy:
+    """Settings of one simulated deployment, named after the environment variables they mirror"""
+
+    def __init__(
+        self,
+        lower_lim,
+        upper_lim,
+        max_change,
+        trigger=None,
+        shape=None,
+        cycle_seconds=DEFAULT_CYCLE_SECONDS,
+        gas_per_rebalance=DEFAULT_REBALANCE_GAS
+    ):
+        self.lower_lim = float(lower_lim)
+        self.upper_lim = float(upper_lim)
+        self.max_change = float(max_change)
+        self.trigger = trigger or RebalanceTrigger()
+        self.shape = shape or LiquidityShape()
+        self.cycle_seconds = int(cycle_seconds)
+        self.gas_per_rebalance = int(gas_per_rebalance)
+
+    def describe(self) -> dict:
+        return {
+            "lower_lim": self.lower_lim,
+            "upper_lim": self.upper_lim,
+            "max_change": self.max_change,
+            "cycle_seconds": self.cycle_seconds,
+            **self.trigger.describe(),
+            **self.shape.describe()
+        }
+
+
+class Backtest:
+    """
+    Replays policies against an EventStore.
+
+    Everything that does not depend on the policy (bin prices, reserve history, the
+    active bin path and each swap's LP fees) is computed once here and shared by every
+    run, so a run only pays for its decision loop and the fee attribution of its positions.
+    """
+
+    def __init__(self, store: EventStore):
+        meta = store.meta
+        for key in ("bin_step", "active_id", "decimals_x", "decimals_y"):
+            if key not in meta:
+                raise Exception(f"Event store {store.directory} has no {key}, ingest the pair first")
+
+        self.bin_step = int(meta["bin_step"])
+        self.initial_active_id = int(meta["active_id"])
+        self.decimals_x = int(meta["decimals_x"])
+        self.decimals_y = int(meta["decimals_y"])
+
+        times = store.load("block_times")
+        if len(times["block"]) < 2:
+            raise Exception(f"Event store {store.directory} needs at least two block times")
+        self.time_blocks, unique = np.unique(times["block"], return_index=True)
+        self.time_stamps = times["timestamp"][unique]
+
+        swaps = store.load("swaps")
+        self.swap_blocks = swaps["block"]
+        self.swap_log_index = swaps["log_index"]
+        self.swap_bins = swaps["bin_id"]
+        self.swap_fees_x = swaps["fees_x"] - swaps["protocol_fees_x"]
+        self.swap_fees_y = swaps["fees_y"] - swaps["protocol_fees_y"]
+
+        self._index_reserves(meta.get("initial_reserves", {}), swaps, store.load("deposits"), store.load("withdrawals"))
+
+        # Liquidity of each swap's bin just before the swap, valued in Y
+        reserve_x, reserve_y = self.reserves(self.swap_bins, self.swap_blocks, self.swap_log_index)
+        self.swap_bin_liquidity = reserve_x * self.raw_price(self.swap_bins) + reserve_y
+
+        self._timelines = {}
+
+    def raw_price(self, bin_ids) -> np.ndarray:
+        """Price of Y per X in raw token units, each bin's exact getPriceFromId price as a float"""
+        bin_ids = np.asarray(bin_ids, dtype=np.int64)
+        unique, inverse = np.unique(bin_ids, return_inverse=True)
+        return prices_to_float(get_prices_from_ids(unique, self.bin_step))[inverse].reshape(bin_ids.shape)
+
+    def price(self, bin_ids) -> np.ndarray:
+        """Price of X in Y in whole tokens, as get_cycle_snapshot reports it"""
+        return self.raw_price(bin_ids) * 10.0**(self.decimals_x - self.decimals_y)
+
+    def _key(self, bin_ids, blocks, log_index) -> np.ndarray:
+        """Sortable int64 key ordering reserve changes by bin, then block, then log index"""
+        bins = np.asarray(bin_ids, dtype=np.int64) - self.key_bin_origin
+        blocks = np.asarray(blocks, dtype=np.int64) - self.key_block_origin
+        return ((bins * self.key_block_span + blocks) << 16) | np.asarray(log_index, dtype=np.int64)
+
+    def _index_reserves(self, initial_reserves, swaps, deposits, withdrawals) -> None:
+        """Sort every reserve change by bin and block and accumulate it within each bin"""
+        # Swap logs report the tokens into a bin net of the protocol fee, which leaves the pair
+        bins = np.concatenate([swaps["bin_id"], deposits["bin_id"], withdrawals["bin_id"]]).astype(np.int64)
+        blocks = np.concatenate([swaps["block"], deposits["block"], withdrawals["block"]])
+        log_index = np.concatenate([swaps["log_index"], deposits["log_index"], withdrawals["log_index"]])
+        delta_x = np.concatenate([
+            swaps["amount_in_x"] - swaps["amount_out_x"],
+            deposits["amount_x"],
+            -withdrawals["amount_x"]
+        ])
+        delta_y = np.concatenate([
+            swaps["amount_in_y"] - swaps["amount_out_y"],
+            deposits["amount_y"],
+            -withdrawals["amount_y"]
+        ])
+
+        self.initial_bins = np.array(sorted(int(bin_id) for bin_id in initial_reserves), dtype=np.int64)
+        self.initial_x = np.array([float(initial_reserves[str(b)][0]) for b in self.initial_bins])
+        self.initial_y = np.array([float(initial_reserves[str(b)][1]) for b in self.initial_bins])
+
+        self.key_bin_origin = int(min(bins.min(initial=self.initial_active_id), self.initial_active_id)) - 2**15
+        self.key_block_origin = int(min(blocks.min(initial=self.time_blocks[0]), self.time_blocks[0]))
+        self.key_block_span = int(max(blocks.max(initial=0), self.time_blocks[-1])) - self.key_block_origin + 2
+
+        keys = self._key(bins, blocks, log_index)
+        order = np.argsort(keys, kind="stable")
+        self.reserve_keys = keys[order]
+        self.reserve_bins = bins[order]
+
+        # Cumulative sums restarted at the first change of every bin
+        cumulative_x = np.cumsum(delta_x[order])
+        cumulative_y = np.cumsum(delta_y[order])
+        starts = np.flatnonzero(np.r_[True, np.diff(self.reserve_bins) != 0]) if len(order) else np.empty(0, dtype=np.int64)
+        counts = np.diff(np.r_[starts, len(order)])
+        self.reserve_x = cumulative_x - np.repeat(cumulative_x[starts] - delta_x[order][starts], counts)
+        self.reserve_y = cumulative_y - np.repeat(cumulative_y[starts] - delta_y[order][starts], counts)
+
+    def reserves(self, bin_ids, blocks, log_index=END_OF_BLOCK) -> tuple:
+        """
+        Reconstructed reserves of bins before the given log, end of block by default
+        Args:
+            bin_ids (np.ndarray): Bins to read
+            blocks (np.ndarray): Block of each read
+            log_index: Log index of each read, reserves exclude changes from that log onwards
+        Returns:
+            tuple: (reserve_x, reserve_y) in raw token units
+        """
+        bin_ids = np.asarray(bin_ids, dtype=np.int64)
+        reserve_x = np.zeros(bin_ids.shape)
+        reserve_y = np.zeros(bin_ids.shape)
+
+        if len(self.initial_bins):
+            index = np.clip(np.searchsorted(self.initial_bins, bin_ids), 0, len(self.initial_bins) - 1)
+            known = self.initial_bins[index] == bin_ids
+            reserve_x[known] = self.initial_x[index[known]]
+            reserve_y[known] = self.initial_y[index[known]]
+
+        if len(self.reserve_keys):
+            index = np.searchsorted(self.reserve_keys, self._key(bin_ids, blocks, log_index), side="left") - 1
+            changed = (index >= 0) & (self.reserve_bins[np.maximum(index, 0)] == bin_ids)
+            reserve_x[changed] += self.reserve_x[index[changed]]
+            reserve_y[changed] += self.reserve_y[index[changed]]
+
+        # Bins outside the snapshot radius start at zero and can dip below it
+        return np.maximum(reserve_x, 0.0), np.maximum(reserve_y, 0.0)
+
+    def active_ids(self, blocks) -> np.ndarray:
+        """Active id at the end of each block, from the last swap at or before it"""
+        index = np.searchsorted(self.swap_blocks, blocks, side="right") - 1
+        return np.where(index >= 0, self.swap_bins[np.maximum(index, 0)], self.initial_active_id)
+
+    def timeline(self, cycle_seconds) -> dict:
+        """Cycle times, blocks and active bin state for a cycle length, shared by every policy using it"""
+        timeline = self._timelines.get(cycle_seconds)
+        if timeline is None:
+            times = np.arange(self.time_stamps[0], self.time_stamps[-1] + 1, cycle_seconds, dtype=np.float64)
+            blocks = np.floor(np.interp(times, self.time_stamps, self.time_blocks)).astype(np.int64)
+            active_ids = self.active_ids(blocks)
+            raw_prices = self.raw_price(active_ids)
+            reserve_x, reserve_y = self.reserves(active_ids, blocks)
+            active_liquidity = reserve_x * raw_prices + reserve_y
+
+            timeline = {
+                "times": times,
+                "blocks": blocks,
+                "active_ids": active_ids,
+                "prices": self.price(active_ids),
+                "raw_prices": raw_prices,
+                "active_liquidity": active_liquidity,
+                # Share of the active bin's value held in X, an empty bin is taken as half and half
+                "active_fraction_x": np.divide(
+                    reserve_x * raw_prices,
+                    active_liquidity,
+                    out=np.full(len(times), 0.5),
+                    where=active_liquidity > 0
+                ),
+                # Swaps up to the end of each cycle's block
+                "swap_index": np.searchsorted(self.swap_blocks, blocks, side="right")
+            }
+            self._timelines[cycle_seconds] = timeline
+        return timeline
+
+    def attribute_fees(self, positions, swap_index) -> tuple:
+        """
+        Attribute LP fees to positions, pro rata to our liquidity in each swap's bin
+        Args:
+            positions (list): (open cycle, close cycle, lowest bin, liquidity per bin) of each position
+            swap_index (np.ndarray): Swaps up to the end of each cycle's block
+        Returns:
+            tuple: (fees_x, fees_y) in raw token units
+        """
+        if not positions:
+            return 0.0, 0.0
+
+        starts = swap_index[[position[0] for position in positions]]
+        ends = swap_index[[position[1] for position in positions]]
+        lowest = np.array([position[2] for position in positions], dtype=np.int64)
+        liquidity = np.stack([position[3] for position in positions])
+
+        # Positions never overlap, so each swap belongs to the last position opened before it
+        swaps = np.arange(starts[0], ends[-1])
+        owner = np.searchsorted(starts, swaps, side="right") - 1
+        offsets = self.swap_bins[swaps] - lowest[owner]
+        ours = (swaps < ends[owner]) & (offsets >= 0) & (offsets < liquidity.shape[1])
+
+        swaps, owner, offsets = swaps[ours], owner[ours], offsets[ours]
+        our_liquidity = liquidity[owner, offsets]
+        total = self.swap_bin_liquidity[swaps] + our_liquidity
+        share = np.divide(our_liquidity, total, out=np.zeros_like(total), where=total > 0)
+
+        return float(share @ self.swap_fees_x[swaps]), float(share @ self.swap_fees_y[swaps])
+
+    def run(self, policy: Policy, amount_x, amount_y, gas_price_wei=None, reward_per_second=0.0) -> dict:
+        """
+        Simulate one policy over the recorded history.
+
+        Positions are withdrawn with the composition LB guarantees: bins below the
+        active id hold only Y, bins above only X, and the active bin is split like its
+        recorded reserves. Fees are attributed to every position in one pass at the end
+        and are not re-deposited into later positions.
+
+        Args:
+            policy (Policy): Limits, trigger and shape to simulate
+            amount_x (float): Starting balance of token X in whole tokens
+            amount_y (float): Starting balance of token Y in whole tokens
+            gas_price_wei (int): Gas price to cost rebalances at, optional
+            reward_per_second (float): Reward tokens per second emitted to the active bin's liquidity
+        Returns:
+            dict: Fees earned, rebalances, gas, rewards and final value against holding
+        """
+        timeline = self.timeline(policy.cycle_seconds)
+        times = timeline["times"]
+        active_ids = timeline["active_ids"].tolist()
+        prices = timeline["prices"].tolist()
+        raw_prices = timeline["raw_prices"].tolist()
+        active_liquidity = timeline["active_liquidity"].tolist()
+        active_fraction_x = timeline["active_fraction_x"].tolist()
+
+        trigger, shape = policy.trigger, policy.shape
+        num_bins = shape.num_bins
+        deltas = shape.deltas.tolist()
+        # Bin prices relative to the active bin and the deposit's X and Y shares per bin
+        relative_prices = np.power(1 + self.bin_step / 10000, shape.deltas.astype(np.float64))
+        share_x = shape.distribution_x / 1e18
+        share_y = shape.distribution_y / 1e18
+
+        scale_x, scale_y = 10.0**self.decimals_x, 10.0**self.decimals_y
+        wallet_x, wallet_y = amount_x * scale_x, amount_y * scale_y
+        rewards = 0.0
+
+        positions = []
+        liquidity = None
+        bin_prices = None
+        lowest = None
+        open_index = None
+        last_price = None
+        armed_since = None
+        rebalances = 0
+        held_cycles = 0
+        in_range_cycles = 0
+        frozen_cycles = 0
+
+        def close(index):
+            """Withdraw the open position at a cycle, returns the wallet balances"""
+            offset = active_ids[index] - lowest
+            below = min(max(offset, 0), num_bins)
+            above = min(max(offset + 1, 0), num_bins)
+
+            out_y = float(liquidity[:below].sum())
+            out_x = float((liquidity[above:] / bin_prices[above:]).sum())
+            if below < above:
+                fraction_x = active_fraction_x[index]
+                out_x += liquidity[offset] * fraction_x / bin_prices[offset]
+                out_y += liquidity[offset] * (1 - fraction_x)
+
+            positions.append((open_index, index, lowest, liquidity))
+            return out_x, out_y
+
+        for index in range(len(times)):
+            active_id = active_ids[index]
+            price = prices[index]
+
+            if liquidity is not None:
+                held_cycles += 1
+                offset = active_id - lowest
+                if 0 <= offset < num_bins:
+                    in_range_cycles += 1
+                    if reward_per_second:
+                        ours = liquidity[offset]
+                        total = active_liquidity[index] + ours
+                        if total > 0:
+                            rewards += reward_per_second * policy.cycle_seconds * float(ours / total)
+
+            # Same checks as manage_liquidity, the reference price is the price at the last open
+            if last_price is None:
+                last_price = price
+            in_limits = policy.lower_lim < price < policy.upper_lim
+            change_acceptable = last_price <= 0 or abs((price - last_price) / last_price * 100) < policy.max_change
+            if not in_limits or not change_acceptable:
+                frozen_cycles += 1
+                continue
+
+            if liquidity is not None:
+                decision = trigger.evaluate(active_id, (lowest, lowest + num_bins - 1), armed_since, times[index])
+                armed_since = decision.armed_since
+                if not decision.rebalance:
+                    continue
+
+                wallet_x, wallet_y = close(index)
+                rebalances += 1
+
+            # Deposit the wallet balances with the policy's shape, like add_liquidity
+            bin_prices = raw_prices[index] * relative_prices
+            liquidity = share_x * wallet_x * bin_prices + share_y * wallet_y
+            lowest = active_id + deltas[0]
+            open_index = index
+            last_price = price
+            armed_since = None
+
+        if liquidity is not None:
+            wallet_x, wallet_y = close(len(times) - 1)
+
+        fees_x, fees_y = self.attribute_fees(positions, timeline["swap_index"])
+        wallet_x += fees_x
+        wallet_y += fees_y
+
+        wallet_x, wallet_y = float(wallet_x), float(wallet_y)
+        final_price = prices[-1]
+        value = wallet_x / scale_x * final_price + wallet_y / scale_y
+        hold_value = amount_x * final_price + amount_y
+
+        report = {
+            **policy.describe(),
+            "cycles": len(times),
+            "duration_hours": round(float(times[-1] - times[0]) / 3600, 2),
+            "rebalances": rebalances,
+            "gas": rebalances * policy.gas_per_rebalance,
+            "in_range_pc": round(in_range_cycles / held_cycles * 100, 2) if held_cycles else 0.0,
+            "frozen_pc": round(frozen_cycles / len(times) * 100, 2),
+            "fees_x": fees_x / scale_x,
+            "fees_y": fees_y / scale_y,
+            "fees_value_y": fees_x / scale_x * final_price + fees_y / scale_y,
+            "rewards": rewards,
+            "final_x": wallet_x / scale_x,
+            "final_y": wallet_y / scale_y,
+            "value_y": value,
+            "hold_value_y": hold_value,
+            "vs_hold_pc": round((value / hold_value - 1) * 100, 4) if hold_value else 0.0,
+            "start_price": prices[0],
+            "final_price": final_price
+        }
+        if gas_price_wei is not None:
+            report["gas_cost_native"] = report["gas"] * gas_price_wei / 10**18
+
+        return report
+
+    def run_many(self, policies, amount_x, amount_y, gas_price_wei=None, reward_per_second=0.0) -> list:
+        """Run several policies against the same precomputed history"""
+        return [
+            self.run(policy, amount_x, amount_y, gas_price_wei=gas_price_wei, reward_per_second=reward_per_second)
+            for policy in policies
+        ]
+
+
+def ingest(store_directory, from_block=None, to_block=None, chunk_blocks=2000, radius=100, max_workers=4) -> int:
+    """
+    Record the pair at LBP_CA, and its rewarder at REWARDER_CA if set, from RPC_URL into an event store.
+    Without from_block the store's own range is resumed, filling any block not yet ingested
+    Returns:
+        int: Number of logs ingested
+    """
+    from web3 import Web3
+
+    from abi_bundle import load_bundle, load_full_abi
+    from contract_pool import ContractPool
+    from event_store import EventDecoder, snapshot_pair
+    from log_ingestion import LogIngestor
+    from multicall import MulticallReader
+
+    rpc_url = os.environ['RPC_URL']
+    pair_address = os.environ['LBP_CA']
+    rewarder_address = os.environ.get('REWARDER_CA')
+
+    web3 = Web3(Web3.HTTPProvider(rpc_url))
+    contracts = ContractPool(web3)
+    bundle = load_bundle()
+    for abi_name, bundled in bundle.items():
+        contracts.register_abi(
+            abi_name,
+            bundled["abi"],
+            selectors = bundled["selectors"],
+            fallback = lambda abi_name=abi_name: load_full_abi(abi_name)
+        )
+
+    store = EventStore(store_directory)
+    if from_block is None:
+        if "from_block" not in store.meta:
+            raise Exception("A new event store needs --from-block")
+        from_block = store.meta["from_block"]
+    if to_block is None:
+        to_block = web3.eth.block_number
+
+    if not store.meta:
+        # Reserves just before the first ingested block
+        reader = MulticallReader(web3, rpc_url, contracts=contracts)
+        store.meta.update(snapshot_pair(reader, contracts, pair_address, from_block - 1, radius=radius))
+        store.meta["from_block"] = from_block
+        store.save_meta()
+
+    addresses = [contracts.checksum(pair_address)]
+    abis = [contracts.abis["lbp"]]
+    if rewarder_address:
+        addresses.append(contracts.checksum(rewarder_address))
+        abis.append(contracts.abis["rewarder"])
+
+    ingestor = LogIngestor(
+        web3,
+        EventDecoder(web3.codec, *abis),
+        store,
+        addresses,
+        chunk_blocks=chunk_blocks,
+        max_workers=max_workers
+    )
+    return ingestor.run(from_block, to_block)
+
+
+def _grid(value, cast) -> list:
+    return [cast(item) for item in str(value).split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backtest rebalance policies over recorded pair events")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser("ingest", help="Record pair events from RPC_URL into an event store")
+    ingest_parser.add_argument("--store", required=True, help="Event store directory")
+    ingest_parser.add_argument("--from-block", type=int, default=None, help="First block, defaults to resuming the store")
+    ingest_parser.add_argument("--to-block", type=int, default=None, help="Last block, defaults to the latest")
+    ingest_parser.add_argument("--chunk", type=int, default=2000, help="Initial blocks per eth_getLogs request")
+    ingest_parser.add_argument("--radius", type=int, default=100, help="Bins around the active id to snapshot")
+    ingest_parser.add_argument("--workers", type=int, default=4, help="eth_getLogs requests in flight at once")
+
+    run_parser = commands.add_parser("run", help="Replay policies over an event store")
+    run_parser.add_argument("--store", required=True, help="Event store directory")
+    run_parser.add_argument("--lower", required=True, help="LOWER_LIM")
+    run_parser.add_argument("--upper", required=True, help="UPPER_LIM")
+    run_parser.add_argument("--max-change", required=True, help="MAX_CHANGE in percent")
+    run_parser.add_argument("--distance", default="1", help="TRIGGER_DISTANCE_BINS")
+    run_parser.add_argument("--hysteresis", default="0", help="TRIGGER_HYSTERESIS_BINS")
+    run_parser.add_argument("--dwell", default="0", help="TRIGGER_MIN_DWELL in seconds")
+    run_parser.add_argument("--shape", default="spot", help="LIQUIDITY_SHAPE")
+    run_parser.add_argument("--bins", default="1", help="NUM_BINS")
+    run_parser.add_argument("--cycle", type=int, default=DEFAULT_CYCLE_SECONDS, help="Seconds between cycles")
+    run_parser.add_argument("--gas", type=int, default=DEFAULT_REBALANCE_GAS, help="Gas per rebalance")
+    run_parser.add_argument("--gas-price-gwei", type=float, default=None, help="Gas price to cost rebalances at")
+    run_parser.add_argument("--amount-x", type=float, required=True, help="Starting token X balance")
+    run_parser.add_argument("--amount-y", type=float, required=True, help="Starting token Y balance")
+    run_parser.add_argument("--reward-per-second", type=float, default=0.0, help="Rewards emitted to the active bin")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "ingest":
+        count = ingest(args.store, args.from_block, args.to_block, args.chunk, args.radius, args.workers)
+        print(f"Ingested {count} logs into {args.store}")
+
+    else:
+        policies = [
+            Policy(
+                lower, upper, max_change,
+                trigger=RebalanceTrigger(distance, hysteresis, dwell),
+                shape=LiquidityShape(shape, bins),
+                cycle_seconds=args.cycle,
+                gas_per_rebalance=args.gas
+            )
+            for lower, upper, max_change, distance, hysteresis, dwell, shape, bins in itertools.product(
+                _grid(args.lower, float), _grid(args.upper, float), _grid(args.max_change, float),
+                _grid(args.distance, int), _grid(args.hysteresis, int), _grid(args.dwell, float),
+                _grid(args.shape, str), _grid(args.bins, int)
+            )
+        ]
+
+        backtest = Backtest(EventStore(args.store))
+        reports = backtest.run_many(
+            policies,
+            args.amount_x,
+            args.amount_y,
+            gas_price_wei=int(args.gas_price_gwei * 10**9) if args.gas_price_gwei is not None else None,
+            reward_per_second=args.reward_per_second
+        )
+        for report in reports:
+            print(json.dumps(report))
@@ -0,0 +1,192 @@
+import logging
+from datetime import datetime
+
+from liquidity_shapes import position_bin_ids
+
+app_logger = logging.getLogger('app_logger')
+transaction_logger = logging.getLogger('transaction_logger')
+
+
+class ClaimDecision:
+    """Outcome of evaluating whether pending rewards are worth claiming"""
+
+    __slots__ = ("claim", "bins", "pending_wei", "value_wei", "gas_cost_wei", "reason")
+
+    def __init__(self, claim, bins, pending_wei, value_wei, gas_cost_wei, reason):
+        self.claim = claim
+        self.bins = bins
+        self.pending_wei = pending_wei
+        self.value_wei = value_wei
+        self.gas_cost_wei = gas_cost_wei
+        self.reason = reason
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RewardClaimer:
+    """
+    Batches reward claims across every bin the bot has held.
+
+    Bins left behind by a rebalance keep their unclaimed rewards, so instead of claiming
+    after each rebalance their ids are tracked in the pair's state document per holder
+    (the wallet, or the rebalance executor for positions it holds). A claim then covers
+    the tracked bins plus the current position's in one `claim` per holder.
+
+    Pending rewards for all bins are read in one batch and valued in native S through
+    the reward trade quoter. The claim is only sent when that value is at least
+    `min_value_multiple` times the gas the claim transactions would cost, so dust is
+    left to accumulate instead of being claimed at a loss. A declined claim is looked at
+    again `evaluate_interval` seconds after its evaluation, recorded in the state document,
+    rather than on every cycle.
+    """
+
+    def __init__(self, connection, native_token, min_value_multiple=10, evaluate_interval=3600):
+        self.sonic = connection
+        self.native_token = native_token
+        self.min_value_multiple = float(min_value_multiple)
+        self.evaluate_interval = float(evaluate_interval)
+
+    @staticmethod
+    def _claims(state) -> dict:
+        claims = state.setdefault("claims", {})
+        claims.setdefault("bins", {})
+        return claims
+
+    def track(self, state, holder, bin_ids) -> None:
+        """Remember bins a holder no longer has liquidity in but may still have rewards for"""
+        tracked = self._claims(state)["bins"]
+        tracked[holder] = sorted(set(tracked.get(holder, [])) | {int(bin_id) for bin_id in bin_ids})
+
+    def claim_bins(self, state, position) -> dict:
+        """
+        Every bin to claim per holder: tracked bins plus the current position's
+        Returns:
+            dict: {holder: [bin_id]}
+        """
+        bins = {holder: set(bin_ids) for holder, bin_ids in self._claims(state)["bins"].items() if bin_ids}
+        if position:
+            holder = position.get("holder") or self.sonic.wallet_address
+            bins.setdefault(holder, set()).update(position_bin_ids(position))
+        return {holder: sorted(bin_ids) for holder, bin_ids in bins.items()}
+
+    def claim_function(self, holder, bin_ids):
+        """Claim call for a holder's bins, through the rebalance executor for bins it holds"""
+        rebalancer = self.sonic.rebalancer
+        if rebalancer and holder == rebalancer.address:
+            return rebalancer.contract.functions.claim(bin_ids)
+        return self.sonic.rewarder_contract.functions.claim(holder, bin_ids)
+
+    def claim_gas(self, holder, bin_ids) -> int:
+        """Gas a holder's claim would use, from an estimate or the executor's defaults"""
+        try:
+            return self.claim_function(holder, bin_ids).estimate_gas({'from': self.sonic.wallet_address})
+        except Exception as e:
+            learnt = self.sonic.executor.gas_used.get("CLAIM_REWARDS")
+            fallback = learnt or self.sonic.executor.GAS_PROFILES["CLAIM_REWARDS"][0]
+            app_logger.debug(f"Claim gas estimate failed for {holder}, assuming {fallback:,}: {e}")
+            return fallback
+
+    def value_in_native(self, amount_wei) -> int:
+        """Native S a reward amount would trade for, None if it cannot be quoted"""
+        reward_token = self.sonic.metro_token_address
+        routes = self.sonic.route_finder.routes(reward_token, self.native_token)
+        quote = self.sonic.quoter.best_quote(routes, amount_wei) if routes else None
+        return quote.amount_out if quote else None
+
+    def due(self, state, now=None) -> bool:
+        """Check whether the last evaluation is old enough to evaluate the claim again"""
+        last_evaluated = self._claims(state).get("last_evaluated")
+        if last_evaluated is None:
+            return True
+        now = now or datetime.now()
+        return (now - datetime.fromisoformat(last_evaluated)).total_seconds() >= self.evaluate_interval
+
+    def evaluate(self, state, position) -> ClaimDecision:
+        """
+        Read pending rewards for every tracked and held bin and decide whether to claim them
+        Args:
+            state (dict): Pair state document holding the tracked bins
+            position (dict): Current position, None if there is none
+        Returns:
+            ClaimDecision: Whether to claim, and the bins, amounts and costs it was based on
+        """
+        self._claims(state)["last_evaluated"] = datetime.now().isoformat()
+
+        bins = self.claim_bins(state, position)
+        if not bins:
+            return ClaimDecision(False, bins, 0, 0, 0, "no bins to claim")
+
+        try:
+            return self._evaluate(bins)
+        except Exception as e:
+            app_logger.error(f"Failed to evaluate reward claim: {e}")
+            return ClaimDecision(False, bins, 0, None, None, f"evaluation failed: {e}")
+
+    def _evaluate(self, bins) -> ClaimDecision:
+        rewarder = self.sonic.rewarder_contract
+        pending = self.sonic.reader.read({
+            holder: rewarder.functions.getPendingRewards(holder, bin_ids)
+            for holder, bin_ids in bins.items()
+        })
+        if None in pending.values():
+            raise Exception(f"Failed to read pending rewards: {pending}")
+
+        # Holders with nothing pending need no claim
+        bins = {holder: bin_ids for holder, bin_ids in bins.items() if pending[holder] > 0}
+        pending_wei = sum(pending.values())
+        if pending_wei == 0:
+            return ClaimDecision(False, bins, 0, 0, 0, "no pending rewards")
+
+        gas_cost_wei = sum(self.claim_gas(holder, bin_ids) for holder, bin_ids in bins.items()) * self.sonic.executor.gas_price()
+        value_wei = self.value_in_native(pending_wei)
+
+        if value_wei is None:
+            return ClaimDecision(True, bins, pending_wei, None, gas_cost_wei, "rewards could not be valued")
+        if value_wei < gas_cost_wei * self.min_value_multiple:
+            return ClaimDecision(
+                False, bins, pending_wei, value_wei, gas_cost_wei,
+                f"rewards worth {value_wei / 1e18:.4f} S, below {self.min_value_multiple:g}x the "
+                f"{gas_cost_wei / 1e18:.4f} S claim gas"
+            )
+        return ClaimDecision(True, bins, pending_wei, value_wei, gas_cost_wei, "rewards above the gas threshold")
+
+    def claim(self, state, decision) -> bool:
+        """
+        Send one claim per holder back-to-back and forget the bins that were claimed
+        Returns:
+            bool: True if every claim succeeded, False otherwise
+        """
+        try:
+            symbol = self.sonic.get_token_symbol(self.sonic.metro_token_address)
+            sent = []
+            for holder, bin_ids in decision.bins.items():
+                sent.append((holder, self.sonic.executor.send(
+                    self.claim_function(holder, bin_ids),
+                    tx_type="CLAIM_REWARDS",
+                    details={
+                        "bin_ids": bin_ids,
+                        "amount": f"{decision.pending_wei / (10 ** 18):.4f} {symbol}",
+                        "holder": holder
+                    },
+                    failure_message="Failed to claim rewards"
+                )))
+
+            claimed = True
+            tracked = self._claims(state)["bins"]
+            for holder, pending in sent:
+                if self.sonic.confirm(pending):
+                    tracked.pop(holder, None)
+                else:
+                    claimed = False
+
+            # Holders that had nothing pending have nothing left to track either
+            for holder in [holder for holder in tracked if holder not in decision.bins]:
+                tracked.pop(holder)
+
+            self._claims(state)["last_claim"] = datetime.now().isoformat()
+            return claimed
+
+        except Exception as e:
+            transaction_logger.error(f"Failed to claim rewards: {e}")
+            return False
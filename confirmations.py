@@ -0,0 +1,284 @@
+import json
+import logging
+import threading
+import time
+
+app_logger = logging.getLogger('app_logger')
+
+
+class ReceiptWaiter:
+    """
+    Waits for a transaction receipt and, optionally, for blocks built on top of it.
+
+    `wait` returns the receipt together with per-stage latencies:
+      - `inclusion_ms`: from the start of the wait until the receipt was seen
+      - `depth_ms`: from inclusion until `depth` further blocks were seen
+      - `receipt_polls`: receipt lookups made, including failed ones
+
+    Subclasses decide when to look for the receipt by implementing `_next_check`.
+    """
+
+    def __init__(self, web3, depth=0, timeout=120):
+        self.web3 = web3
+        self.depth = depth
+        self.timeout = timeout
+
+    def wait(self, tx_hash) -> tuple:
+        """
+        Wait for a transaction to be included and reach the confirmation depth
+        Args:
+            tx_hash: Transaction hash
+        Returns:
+            tuple: (receipt, timings dict)
+        """
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        timings = {"receipt_polls": 0}
+
+        while True:
+            receipt = self._wait_for_receipt(tx_hash, deadline, timings)
+            included = time.perf_counter()
+            timings["inclusion_ms"] = round((included - started) * 1000, 1)
+            if self.depth <= 0:
+                break
+
+            self._wait_for_block(receipt.blockNumber + self.depth, deadline)
+
+            # Make sure the transaction is still in the block it was first seen in
+            final = self._get_receipt(tx_hash, timings)
+            if final is not None and final.blockHash == receipt.blockHash:
+                receipt = final
+                break
+            app_logger.warning(f"Transaction {tx_hash.hex()} left block {receipt.blockNumber}, waiting again")
+
+        timings["depth_ms"] = round((time.perf_counter() - included) * 1000, 1)
+        return receipt, timings
+
+    def _get_receipt(self, tx_hash, timings):
+        """Look up a receipt, returning None if it does not exist yet or the RPC fails"""
+        from web3.exceptions import TransactionNotFound
+
+        timings["receipt_polls"] += 1
+        try:
+            return self.web3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+        except Exception as e:
+            timings["receipt_errors"] = timings.get("receipt_errors", 0) + 1
+            app_logger.debug(f"Receipt lookup for {tx_hash.hex()} failed: {e}")
+            return None
+
+    def _wait_for_receipt(self, tx_hash, deadline, timings):
+        while True:
+            errors = timings.get("receipt_errors", 0)
+            receipt = self._get_receipt(tx_hash, timings)
+            if receipt is not None:
+                return receipt
+
+            failed = timings.get("receipt_errors", 0) > errors
+            if not self._next_check(deadline, failed):
+                return self._timed_out(tx_hash)
+
+    def _wait_for_block(self, target, deadline):
+        raise NotImplementedError
+
+    def _next_check(self, deadline, failed) -> bool:
+        """Block until the receipt should be looked up again, returns False once the deadline passes"""
+        raise NotImplementedError
+
+    def _timed_out(self, tx_hash):
+        raise Exception(f"Transaction {tx_hash.hex()} not confirmed after {self.timeout}s")
+
+
+class PollingReceiptWaiter(ReceiptWaiter):
+    """
+    Polls for receipts at an interval derived from the chain's recent block time.
+
+    The block time is measured from the timestamps of the latest block and the block
+    `sample_blocks` before it, and refreshed every `refresh_seconds`. Receipts are
+    polled twice per block, clamped to [min_interval, max_interval]. Failed lookups
+    back off exponentially up to `max_interval` so an RPC hiccup does not turn into a
+    burst of errors, while the overall wait keeps running until `timeout`.
+    """
+
+    def __init__(self, web3, depth=0, timeout=120, poll_interval=0.2, min_interval=0.05,
+                 max_interval=2.0, sample_blocks=200, refresh_seconds=600):
+        super().__init__(web3, depth, timeout)
+        self.poll_interval = poll_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.sample_blocks = sample_blocks
+        self.refresh_seconds = refresh_seconds
+        self.measured_block_time = None
+        self.measured_at = None
+        self.backoff = None
+
+    @property
+    def block_time(self) -> float:
+        """Recent average block time in seconds, falling back to twice the configured poll interval"""
+        now = time.monotonic()
+        if self.measured_at is None or now - self.measured_at > self.refresh_seconds:
+            self.measured_at = now
+            try:
+                latest = self.web3.eth.get_block('latest')
+                earlier = self.web3.eth.get_block(max(latest.number - self.sample_blocks, 0))
+                blocks = latest.number - earlier.number
+                if blocks > 0 and latest.timestamp > earlier.timestamp:
+                    self.measured_block_time = (latest.timestamp - earlier.timestamp) / blocks
+                    app_logger.debug(f"Measured block time {self.measured_block_time:.3f}s over {blocks} blocks")
+
+            except Exception as e:
+                app_logger.warning(f"Failed to measure block time: {e}")
+
+        return self.measured_block_time or self.poll_interval * 2
+
+    @property
+    def interval(self) -> float:
+        return min(max(self.block_time / 2, self.min_interval), self.max_interval)
+
+    def _sleep(self, seconds, deadline) -> bool:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+        time.sleep(min(seconds, remaining))
+        return True
+
+    def _next_check(self, deadline, failed) -> bool:
+        if failed:
+            self.backoff = min((self.backoff or self.interval) * 2, self.max_interval)
+        else:
+            self.backoff = None
+        return self._sleep(self.backoff or self.interval, deadline)
+
+    def _wait_for_block(self, target, deadline):
+        while True:
+            try:
+                head = self.web3.eth.block_number
+                if head >= target:
+                    return head
+                wait = max(target - head, 1) * self.block_time
+            except Exception as e:
+                app_logger.debug(f"Block number lookup failed: {e}")
+                wait = self.max_interval
+
+            if not self._sleep(min(wait, self.max_interval), deadline):
+                raise Exception(f"Block {target} not reached after {self.timeout}s")
+
+
+class HeadSubscription:
+    """
+    Background `eth_subscribe("newHeads")` listener over a websocket endpoint.
+
+    The listener thread starts on first use and reconnects with exponential backoff if
+    the socket drops. Waiters block on `wait_for_head` and are woken as soon as a new
+    block arrives, so receipts are looked up once per block rather than on a timer.
+    """
+
+    def __init__(self, ws_url, max_backoff=10):
+        self.ws_url = ws_url
+        self.max_backoff = max_backoff
+        self.head = None
+        self.connected = False
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def start(self) -> None:
+        with self.condition:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="head-subscription", daemon=True)
+                self.thread.start()
+
+    def wait_for_head(self, after, timeout):
+        """
+        Block until a head newer than `after` arrives
+        Args:
+            after (int): Last head number seen by the caller, or None
+            timeout (float): Seconds to wait
+        Returns:
+            int: Latest head number, or None if none arrived in time
+        """
+        self.start()
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.head is not None and (after is None or self.head > after),
+                timeout=timeout
+            )
+            if self.head is not None and (after is None or self.head > after):
+                return self.head
+            return None
+
+    def _run(self):
+        from websockets.sync.client import connect
+
+        backoff = 0.5
+        while True:
+            try:
+                with connect(self.ws_url, open_timeout=10) as socket:
+                    socket.send(json.dumps({
+                        "jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]
+                    }))
+                    subscription = json.loads(socket.recv(timeout=10)).get("result")
+                    if subscription is None:
+                        raise Exception("eth_subscribe newHeads rejected")
+
+                    self.connected = True
+                    backoff = 0.5
+                    app_logger.info(f"Subscribed to new heads on websocket ({subscription})")
+
+                    for message in socket:
+                        params = json.loads(message).get("params") or {}
+                        if params.get("subscription") != subscription:
+                            continue
+                        with self.condition:
+                            self.head = int(params["result"]["number"], 16)
+                            self.condition.notify_all()
+
+            except Exception as e:
+                app_logger.warning(f"New heads subscription dropped, reconnecting in {backoff}s: {e}")
+
+            self.connected = False
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+class SubscriptionReceiptWaiter(ReceiptWaiter):
+    """
+    Looks up receipts as new heads arrive over a websocket subscription.
+
+    Depth is tracked from the subscription alone, without further RPC calls. If no
+    head arrives within `fallback_interval` (socket down or reconnecting) the receipt
+    is looked up anyway, so confirmation degrades to polling rather than stalling.
+    """
+
+    def __init__(self, web3, subscription, depth=0, timeout=120, fallback_interval=1.0):
+        super().__init__(web3, depth, timeout)
+        self.subscription = subscription
+        self.fallback_interval = fallback_interval
+        self.last_head = None
+
+    def _next_check(self, deadline, failed) -> bool:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+
+        head = self.subscription.wait_for_head(self.last_head, min(self.fallback_interval, remaining))
+        if head is not None:
+            self.last_head = head
+        return True
+
+    def _wait_for_block(self, target, deadline):
+        while self.last_head is None or self.last_head < target:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise Exception(f"Block {target} not reached after {self.timeout}s")
+
+            head = self.subscription.wait_for_head(self.last_head, min(self.fallback_interval, remaining))
+            if head is not None:
+                self.last_head = head
+            elif not self.subscription.connected:
+                try:
+                    self.last_head = self.web3.eth.block_number
+                except Exception as e:
+                    app_logger.debug(f"Block number lookup failed: {e}")
+
+        return self.last_head
@@ -0,0 +1,184 @@
+from collections import OrderedDict
+from eth_utils import collapse_if_tuple, function_abi_to_4byte_selector, to_checksum_address
+import logging
+import threading
+
+app_logger = logging.getLogger('app_logger')
+
+
+class FunctionSpec:
+    """Precompiled selector and codec types for one ABI function"""
+
+    __slots__ = ("name", "selector", "input_types", "output_types")
+
+    def __init__(self, fn_abi, selector=None):
+        self.name = fn_abi["name"]
+        self.selector = selector or "0x" + function_abi_to_4byte_selector(fn_abi).hex()
+        self.input_types = [collapse_if_tuple(arg) for arg in fn_abi.get("inputs", [])]
+        self.output_types = [collapse_if_tuple(arg) for arg in fn_abi.get("outputs", [])]
+
+
+class FallbackNamespace:
+    """`functions` or `events` of a pooled contract, loading the full ABI for names the bundled one lacks"""
+
+    __slots__ = ("owner", "attribute")
+
+    def __init__(self, owner, attribute):
+        self.owner = owner
+        self.attribute = attribute
+
+    def __getattr__(self, name):
+        try:
+            return getattr(getattr(self.owner.contract, self.attribute), name)
+        except AttributeError:
+            if name.startswith("_"):
+                raise
+            self.owner.reload(name)
+            return getattr(getattr(self.owner.contract, self.attribute), name)
+
+
+class PooledContract:
+    """
+    Contract object handed out by the pool. Functions and events are looked up through
+    the registered ABI and the full ABI is loaded the first time one is missing from it,
+    everything else is the web3 contract's own.
+    """
+
+    __slots__ = ("pool", "key", "contract")
+
+    def __init__(self, pool, key, contract):
+        self.pool = pool
+        self.key = key
+        self.contract = contract
+
+    def __getattr__(self, name):
+        return getattr(self.contract, name)
+
+    @property
+    def functions(self):
+        return FallbackNamespace(self, "functions")
+
+    @property
+    def events(self):
+        return FallbackNamespace(self, "events")
+
+    def reload(self, name) -> None:
+        """Load the full ABI if it does not define `name`, and rebuild the contract from the current ABI"""
+        self.pool.ensure(self.key[1], name)
+        self.contract = self.pool.get(*self.key).contract
+
+
+class ContractPool:
+    """
+    Bounded LRU pool of web3 contract objects keyed by (checksummed address, ABI name).
+
+    ABIs are registered once by name and their function selectors and codec types are
+    precompiled, so repeated token operations reuse hot contract objects instead of
+    rebuilding them and re-parsing the ABI on every call.
+
+    An ABI may be registered with a fallback loader. If a caller requires a function
+    or event the registered ABI does not define, or looks one up on a pooled contract,
+    the full ABI is loaded in its place.
+    """
+
+    def __init__(self, web3, max_size=64):
+        self.web3 = web3
+        self.max_size = max_size
+        self.abis = {}
+        self.fallbacks = {}
+        self.specs = {}
+        self.contracts = OrderedDict()
+        self.checksums = {}
+        # The LRU order is shared by concurrent pair reads
+        self.lock = threading.RLock()
+
+    def register_abi(self, abi_name, abi, selectors=None, fallback=None) -> None:
+        """
+        Register an ABI under a name and precompile its function specs
+        Args:
+            abi_name (str): Pool name for the ABI
+            abi (list): ABI entries
+            selectors (dict): Optional precomputed {function name: selector}
+            fallback (callable): Optional loader returning the full ABI
+        """
+        selectors = selectors or {}
+        self.abis[abi_name] = abi
+        if fallback is not None:
+            self.fallbacks[abi_name] = fallback
+
+        for entry in abi:
+            if entry.get("type") == "function":
+                spec = FunctionSpec(entry, selectors.get(entry["name"]))
+                self.specs.setdefault(spec.selector, spec)
+
+        # Drop contracts built from a previous registration
+        with self.lock:
+            for key in [key for key in self.contracts if key[1] == abi_name]:
+                del self.contracts[key]
+
+    def ensure(self, abi_name, *names) -> None:
+        """Make sure the registered ABI defines the named functions and events, loading the full ABI if not"""
+        defined = {entry.get("name") for entry in self.abis[abi_name]}
+        missing = [name for name in names if name not in defined]
+        if not missing:
+            return
+
+        with self.lock:
+            # Another thread may have loaded the full ABI while this one waited
+            if all(name in {entry.get("name") for entry in self.abis[abi_name]} for name in missing):
+                return
+
+            fallback = self.fallbacks.pop(abi_name, None)
+            if fallback is None:
+                raise Exception(f"ABI {abi_name} does not define {missing}")
+
+            app_logger.info(f"ABI {abi_name} is missing {missing}, loading full ABI")
+            self.register_abi(abi_name, fallback())
+
+    def checksum(self, address) -> str:
+        """Checksum an address, memoising the result"""
+        checksummed = self.checksums.get(address)
+        if checksummed is None:
+            checksummed = to_checksum_address(address)
+            self.checksums[address] = checksummed
+        return checksummed
+
+    def get(self, address, abi_name, requires=()):
+        """
+        Get a pooled contract object, constructing it on a miss
+        Args:
+            address (str): Contract address in any case
+            abi_name (str): Name the ABI was registered under
+            requires (tuple): Function or event names the caller will use
+        Returns:
+            PooledContract: web3 contract instance that loads the full ABI on a missing function or event
+        """
+        if requires:
+            self.ensure(abi_name, *requires)
+
+        key = (self.checksum(address), abi_name)
+        with self.lock:
+            contract = self.contracts.get(key)
+            if contract is not None:
+                self.contracts.move_to_end(key)
+                return contract
+
+            contract = PooledContract(self, key, self.web3.eth.contract(
+                address = key[0],
+                abi = self.abis[abi_name]
+            ))
+            self.contracts[key] = contract
+
+            if len(self.contracts) > self.max_size:
+                evicted, _ = self.contracts.popitem(last=False)
+                app_logger.debug(f"Evicted contract {evicted} from pool")
+
+            return contract
+
+    def spec(self, fn) -> FunctionSpec:
+        """Get the precompiled spec for a bound contract function"""
+        spec = self.specs.get(fn.selector)
+        if spec is None:
+            spec = FunctionSpec(fn.abi)
+            self.specs[spec.selector] = spec
+        return spec
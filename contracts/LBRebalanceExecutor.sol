@@ -0,0 +1,290 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+interface IERC20 {
+    function balanceOf(address account) external view returns (uint256);
+    function transfer(address to, uint256 amount) external returns (bool);
+    function transferFrom(address from, address to, uint256 amount) external returns (bool);
+}
+
+interface ILBPair {
+    function getTokenX() external view returns (address);
+    function getTokenY() external view returns (address);
+    function getActiveId() external view returns (uint24);
+    function burn(address from, address to, uint256[] calldata ids, uint256[] calldata amountsToBurn)
+        external
+        returns (bytes32[] memory amounts);
+    function mint(address to, bytes32[] calldata liquidityConfigs, address refundTo)
+        external
+        returns (bytes32 amountsReceived, bytes32 amountsLeft, uint256[] memory liquidityMinted);
+}
+
+interface ILBHooksRewarder {
+    function claim(address user, uint256[] calldata ids) external;
+    function getRewardToken() external view returns (address);
+}
+
+/**
+ * @title LBRebalanceExecutor
+ * @notice Holds a Liquidity Book position on behalf of its owner and moves it in a single
+ * transaction: claim the position's rewards, burn the old bins and mint the new bins around
+ * the active id. Either every step succeeds or the whole rebalance reverts, so funds never sit
+ * out of range between transactions.
+ *
+ * The rewarder only lets a user claim for itself, so the position is held by this contract
+ * rather than the owner's wallet. Claimed rewards, mint refunds and withdrawals are always
+ * sent to the owner.
+ *
+ * One-off setup from the owner's wallet:
+ *   - deploy with the pair and rewarder addresses
+ *   - approve this contract to spend token X and token Y, so top-ups can be pulled in
+ */
+contract LBRebalanceExecutor {
+    uint256 private constant PRECISION = 1e18;
+    uint256 private constant OFFSET_DISTRIBUTION_Y = 24;
+    uint256 private constant OFFSET_DISTRIBUTION_X = 88;
+
+    address public immutable owner;
+    ILBPair public immutable pair;
+    ILBHooksRewarder public immutable rewarder;
+    address public immutable tokenX;
+    address public immutable tokenY;
+
+    struct RebalanceParams {
+        uint256[] removeIds;        // Bins to burn, may be empty for a first deposit
+        uint256[] removeAmounts;    // LB token amounts to burn per bin
+        uint256 amountXIn;          // Token X to pull from the owner on top of the removed liquidity
+        uint256 amountYIn;          // Token Y to pull from the owner on top of the removed liquidity
+        uint24 activeIdDesired;     // Active id the deposit was planned against
+        uint24 idSlippage;          // Allowed active id movement since planning
+        int256[] deltaIds;          // Deposit bins relative to the active id
+        uint256[] distributionX;    // Share of token X per deposit bin, 1e18 = 100%
+        uint256[] distributionY;    // Share of token Y per deposit bin, 1e18 = 100%
+        uint256 deadline;
+    }
+
+    struct Amounts {
+        uint256 removedX;
+        uint256 removedY;
+        uint256 depositedX;
+        uint256 depositedY;
+        uint256 rewards;
+    }
+
+    event Rebalanced(
+        uint24 activeId,
+        uint256 removedX,
+        uint256 removedY,
+        uint256 depositedX,
+        uint256 depositedY,
+        uint256 rewards,
+        uint256[] depositIds,
+        uint256[] liquidityMinted
+    );
+    event Claimed(uint256[] ids, uint256 rewards);
+    event Withdrawn(uint256[] ids, uint256 amountX, uint256 amountY, uint256 rewards);
+
+    error LBRebalanceExecutor__NotOwner();
+    error LBRebalanceExecutor__DeadlineExceeded(uint256 deadline, uint256 timestamp);
+    error LBRebalanceExecutor__InvalidLength();
+    error LBRebalanceExecutor__InvalidDistribution();
+    error LBRebalanceExecutor__IdSlippageCaught(uint24 activeIdDesired, uint24 idSlippage, uint24 activeId);
+    error LBRebalanceExecutor__IdOverflows(int256 id);
+    error LBRebalanceExecutor__NothingToDeposit();
+    error LBRebalanceExecutor__TransferFailed(address token);
+
+    modifier onlyOwner() {
+        if (msg.sender != owner) revert LBRebalanceExecutor__NotOwner();
+        _;
+    }
+
+    constructor(address pair_, address rewarder_) {
+        owner = msg.sender;
+        pair = ILBPair(pair_);
+        rewarder = ILBHooksRewarder(rewarder_);
+        tokenX = ILBPair(pair_).getTokenX();
+        tokenY = ILBPair(pair_).getTokenY();
+    }
+
+    receive() external payable {}
+
+    /**
+     * @notice Claim, burn and re-mint the position in one transaction
+     * @return depositIds Bins the new position was minted into
+     * @return liquidityMinted LB tokens minted per deposit bin
+     */
+    function rebalance(RebalanceParams calldata params)
+        external
+        onlyOwner
+        returns (uint256[] memory depositIds, uint256[] memory liquidityMinted)
+    {
+        if (block.timestamp > params.deadline) {
+            revert LBRebalanceExecutor__DeadlineExceeded(params.deadline, block.timestamp);
+        }
+        if (params.removeIds.length != params.removeAmounts.length) revert LBRebalanceExecutor__InvalidLength();
+
+        Amounts memory amounts;
+        amounts.rewards = _claim(params.removeIds);
+        (amounts.removedX, amounts.removedY) = _burn(params.removeIds, params.removeAmounts, address(this));
+
+        if (params.amountXIn > 0) _transferFrom(tokenX, owner, params.amountXIn);
+        if (params.amountYIn > 0) _transferFrom(tokenY, owner, params.amountYIn);
+
+        uint24 activeId = pair.getActiveId();
+        if (
+            uint256(activeId) + params.idSlippage < params.activeIdDesired
+                || uint256(activeId) > uint256(params.activeIdDesired) + params.idSlippage
+        ) revert LBRebalanceExecutor__IdSlippageCaught(params.activeIdDesired, params.idSlippage, activeId);
+
+        bytes32[] memory liquidityConfigs;
+        (depositIds, liquidityConfigs) = _liquidityConfigs(params, activeId);
+        (amounts.depositedX, amounts.depositedY, liquidityMinted) = _mint(liquidityConfigs);
+
+        emit Rebalanced(
+            activeId,
+            amounts.removedX,
+            amounts.removedY,
+            amounts.depositedX,
+            amounts.depositedY,
+            amounts.rewards,
+            depositIds,
+            liquidityMinted
+        );
+    }
+
+    /**
+     * @notice Claim the rewards of the given bins and send them to the owner
+     */
+    function claim(uint256[] calldata ids) external onlyOwner returns (uint256 rewards) {
+        rewards = _claim(ids);
+        emit Claimed(ids, rewards);
+    }
+
+    /**
+     * @notice Claim the rewards of the given bins and burn them to the owner, closing the position
+     */
+    function withdraw(uint256[] calldata ids, uint256[] calldata amounts)
+        external
+        onlyOwner
+        returns (uint256 amountX, uint256 amountY)
+    {
+        if (ids.length != amounts.length) revert LBRebalanceExecutor__InvalidLength();
+
+        uint256 rewards = _claim(ids);
+        (amountX, amountY) = _burn(ids, amounts, owner);
+
+        emit Withdrawn(ids, amountX, amountY, rewards);
+    }
+
+    /**
+     * @notice Recover tokens or native balance left on the executor, use address(0) for native
+     */
+    function sweep(address token) external onlyOwner {
+        if (token == address(0)) {
+            _sendNative(address(this).balance);
+        } else {
+            _transfer(token, owner, IERC20(token).balanceOf(address(this)));
+        }
+    }
+
+    function _claim(uint256[] calldata ids) private returns (uint256 rewards) {
+        if (ids.length == 0 || address(rewarder) == address(0)) return 0;
+
+        address rewardToken = rewarder.getRewardToken();
+        rewarder.claim(address(this), ids);
+
+        if (rewardToken == address(0)) {
+            rewards = address(this).balance;
+            if (rewards > 0) _sendNative(rewards);
+        } else {
+            rewards = IERC20(rewardToken).balanceOf(address(this));
+            // A reward token that is also a pair token is deposited with the position instead
+            if (rewards > 0 && rewardToken != tokenX && rewardToken != tokenY) _transfer(rewardToken, owner, rewards);
+        }
+    }
+
+    function _liquidityConfigs(RebalanceParams calldata params, uint24 activeId)
+        private
+        pure
+        returns (uint256[] memory depositIds, bytes32[] memory liquidityConfigs)
+    {
+        uint256 bins = params.deltaIds.length;
+        if (bins == 0 || bins != params.distributionX.length || bins != params.distributionY.length) {
+            revert LBRebalanceExecutor__InvalidLength();
+        }
+
+        depositIds = new uint256[](bins);
+        liquidityConfigs = new bytes32[](bins);
+        for (uint256 i; i < bins; ++i) {
+            int256 id = int256(uint256(activeId)) + params.deltaIds[i];
+            if (id < 0 || id > int256(uint256(type(uint24).max))) revert LBRebalanceExecutor__IdOverflows(id);
+            if (params.distributionX[i] > PRECISION || params.distributionY[i] > PRECISION) {
+                revert LBRebalanceExecutor__InvalidDistribution();
+            }
+
+            // Same packing as the pair's LiquidityConfigurations: id | distributionY | distributionX
+            depositIds[i] = uint256(id);
+            liquidityConfigs[i] = bytes32(
+                params.distributionX[i] << OFFSET_DISTRIBUTION_X | params.distributionY[i] << OFFSET_DISTRIBUTION_Y
+                    | uint256(id)
+            );
+        }
+    }
+
+    function _mint(bytes32[] memory liquidityConfigs)
+        private
+        returns (uint256 depositX, uint256 depositY, uint256[] memory liquidityMinted)
+    {
+        // Everything the executor holds goes back in, unused amounts are refunded to the owner
+        uint256 balanceX = IERC20(tokenX).balanceOf(address(this));
+        uint256 balanceY = IERC20(tokenY).balanceOf(address(this));
+        if (balanceX == 0 && balanceY == 0) revert LBRebalanceExecutor__NothingToDeposit();
+
+        if (balanceX > 0) _transfer(tokenX, address(pair), balanceX);
+        if (balanceY > 0) _transfer(tokenY, address(pair), balanceY);
+
+        bytes32 amountsReceived;
+        bytes32 amountsLeft;
+        (amountsReceived, amountsLeft, liquidityMinted) = pair.mint(address(this), liquidityConfigs, owner);
+
+        // Both pack X in the low 128 bits and Y in the high 128 bits. The pair refunds
+        // amountsLeft, so only the rest of what it received ended up in the bins
+        depositX = uint128(uint256(amountsReceived)) - uint128(uint256(amountsLeft));
+        depositY = (uint256(amountsReceived) >> 128) - (uint256(amountsLeft) >> 128);
+    }
+
+    function _burn(uint256[] calldata ids, uint256[] calldata amounts, address to)
+        private
+        returns (uint256 amountX, uint256 amountY)
+    {
+        if (ids.length == 0) return (0, 0);
+
+        bytes32[] memory amountsOut = pair.burn(address(this), to, ids, amounts);
+
+        // Each entry packs the bin's amount of X in the low 128 bits and Y in the high 128 bits
+        for (uint256 i; i < amountsOut.length; ++i) {
+            amountX += uint128(uint256(amountsOut[i]));
+            amountY += uint256(amountsOut[i]) >> 128;
+        }
+    }
+
+    function _transfer(address token, address to, uint256 amount) private {
+        (bool success, bytes memory data) = token.call(abi.encodeCall(IERC20.transfer, (to, amount)));
+        if (!success || (data.length != 0 && !abi.decode(data, (bool)))) {
+            revert LBRebalanceExecutor__TransferFailed(token);
+        }
+    }
+
+    function _transferFrom(address token, address from, uint256 amount) private {
+        (bool success, bytes memory data) =
+            token.call(abi.encodeCall(IERC20.transferFrom, (from, address(this), amount)));
+        if (!success || (data.length != 0 && !abi.decode(data, (bool)))) {
+            revert LBRebalanceExecutor__TransferFailed(token);
+        }
+    }
+
+    function _sendNative(uint256 amount) private {
+        (bool success,) = owner.call{value: amount}("");
+        if (!success) revert LBRebalanceExecutor__TransferFailed(address(0));
+    }
+}
@@ -0,0 +1,100 @@
+"""
+Compile LBRebalanceExecutor and write its artifacts from the compiler output.
+
+    python contracts/build.py
+
+Writes `contracts/LBRebalanceExecutor.json` (ABI, creation bytecode, runtime bytecode
+and the exact compiler settings, for deployment and verification), regenerates
+`rebalance_executor_abi.json` from the compiler's ABI and rebuilds the ABI bundle.
+Needs py-solc-x (`pip install py-solc-x`), which downloads the pinned solc on first
+use. Run from the repository root, and commit all three files together.
+"""
+import json
+import os
+import sys
+
+SOLC_VERSION = '0.8.24'
+OPTIMIZER_RUNS = 200
+SOURCE = 'contracts/LBRebalanceExecutor.sol'
+CONTRACT_NAME = 'LBRebalanceExecutor'
+ARTIFACT = 'contracts/LBRebalanceExecutor.json'
+ABI_FILE = 'rebalance_executor_abi.json'
+
+
+def compile_executor() -> dict:
+    """
+    Compile the executor with the pinned solc
+    Returns:
+        dict: {"abi", "bytecode", "deployed_bytecode", "immutable_references", "compiler"}
+    """
+    try:
+        import solcx
+    except ImportError:
+        raise Exception("py-solc-x is required to compile the executor: pip install py-solc-x")
+
+    if SOLC_VERSION not in [str(version) for version in solcx.get_installed_solc_versions()]:
+        solcx.install_solc(SOLC_VERSION)
+
+    with open(SOURCE, 'r') as f:
+        source = f.read()
+
+    settings = {
+        "optimizer": {"enabled": True, "runs": OPTIMIZER_RUNS},
+        "outputSelection": {"*": {"*": [
+            "abi", "evm.bytecode.object", "evm.deployedBytecode.object", "evm.deployedBytecode.immutableReferences"
+        ]}}
+    }
+    output = solcx.compile_standard(
+        {"language": "Solidity", "sources": {SOURCE: {"content": source}}, "settings": settings},
+        solc_version=SOLC_VERSION
+    )
+
+    errors = [error for error in output.get("errors", []) if error["severity"] == "error"]
+    if errors:
+        raise Exception("\n".join(error["formattedMessage"] for error in errors))
+
+    contract = output["contracts"][SOURCE][CONTRACT_NAME]
+    deployed = contract["evm"]["deployedBytecode"]
+    return {
+        "abi": contract["abi"],
+        "bytecode": "0x" + contract["evm"]["bytecode"]["object"],
+        "deployed_bytecode": "0x" + deployed["object"],
+        # Byte ranges of the runtime code the constructor fills with immutables, zero in deployed_bytecode
+        "immutable_references": sorted(
+            [reference["start"], reference["length"]]
+            for references in deployed.get("immutableReferences", {}).values()
+            for reference in references
+        ),
+        "compiler": {"solc": SOLC_VERSION, "optimizer_runs": OPTIMIZER_RUNS}
+    }
+
+
+def load_artifact(path=ARTIFACT) -> dict:
+    """Load the compiled artifact, checking it was built from the ABI the bot uses"""
+    with open(path, 'r') as f:
+        artifact = json.load(f)
+    with open(ABI_FILE, 'r') as f:
+        if json.load(f) != artifact["abi"]:
+            raise Exception(f"{ABI_FILE} does not match {path}, run python contracts/build.py")
+    return artifact
+
+
+def main():
+    sys.path.insert(0, os.getcwd())
+    from abi_bundle import BUNDLE_FILE, build_bundle
+
+    artifact = compile_executor()
+    with open(ARTIFACT, 'w') as f:
+        json.dump(artifact, f, indent=2)
+    with open(ABI_FILE, 'w') as f:
+        json.dump(artifact["abi"], f, indent=2)
+
+    with open(BUNDLE_FILE, 'w') as f:
+        json.dump(build_bundle(), f, separators=(',', ':'), sort_keys=True)
+
+    print(f"Compiled {CONTRACT_NAME} with solc {SOLC_VERSION}: {(len(artifact['deployed_bytecode']) - 2) // 2:,} bytes runtime")
+    print(f"Wrote {ARTIFACT}, {ABI_FILE} and {BUNDLE_FILE}")
+
+
+if __name__ == '__main__':
+    main()
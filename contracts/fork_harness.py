@@ -0,0 +1,163 @@
+"""
+Anvil fork harness for LBRebalanceExecutor.
+
+Forks Sonic locally, deploys the executor from the bot wallet and compares a
+single-transaction rebalance with the sequential remove → claim → add flow on the
+same fork. Nothing is sent to the real network.
+
+The executor is deployed from `contracts/LBRebalanceExecutor.json`, the artifact
+written by `python contracts/build.py`, which is built first if it is missing.
+
+Requires `anvil` (Foundry) and the same environment variables as the function
+(RPC_URL, PRIVATE_KEY, LBP_CA, LBROUTER_CA, REWARDER_CA, ...). The wallet needs some
+of both pair tokens on the forked chain. Run from the repository root:
+
+    python contracts/fork_harness.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from build import ARTIFACT, compile_executor, load_artifact, main as build
+
+sys.path.insert(0, os.getcwd())
+from rebalance import code_matches
+
+FORK_PORT = int(os.environ.get('FORK_PORT', 8546))
+FORK_URL = f"http://127.0.0.1:{FORK_PORT}"
+
+
+def start_fork(upstream_url):
+    """Start anvil forked from the upstream RPC and wait until it answers"""
+    process = subprocess.Popen(
+        ["anvil", "--fork-url", upstream_url, "--port", str(FORK_PORT), "--silent"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.STDOUT
+    )
+
+    from web3 import Web3
+    web3 = Web3(Web3.HTTPProvider(FORK_URL))
+    for _ in range(100):
+        if web3.is_connected():
+            return process, web3
+        time.sleep(0.1)
+
+    process.kill()
+    raise Exception(f"anvil did not start on {FORK_URL}")
+
+
+def deploy_executor(web3, private_key, pair, rewarder) -> str:
+    """Deploy the compiled executor artifact from the wallet, returns its address"""
+    if not os.path.exists(ARTIFACT):
+        build()
+    artifact = load_artifact()
+
+    # The committed artifact must still be what the source compiles to
+    if compile_executor()["deployed_bytecode"] != artifact["deployed_bytecode"]:
+        raise Exception(f"{ARTIFACT} is out of date, run python contracts/build.py")
+
+    account = web3.eth.account.from_key(private_key)
+    transaction = web3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"]).constructor(
+        web3.to_checksum_address(pair), web3.to_checksum_address(rewarder)
+    ).build_transaction({
+        "from": account.address,
+        "nonce": web3.eth.get_transaction_count(account.address, 'pending')
+    })
+    tx_hash = web3.eth.send_raw_transaction(account.sign_transaction(transaction).rawTransaction)
+    receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
+    if receipt.status != 1:
+        raise Exception(f"Executor deployment reverted: {tx_hash.hex()}")
+
+    if not code_matches(artifact, web3.eth.get_code(receipt.contractAddress)):
+        raise Exception("Deployed code does not match the artifact")
+    return receipt.contractAddress
+
+
+def measure(web3, wallet, label, operation) -> dict:
+    """Run an operation and total the gas, transactions and wall time it used on the fork"""
+    start_block = web3.eth.block_number
+    started = time.perf_counter()
+    result = operation()
+    elapsed = time.perf_counter() - started
+
+    gas_used = 0
+    transactions = 0
+    for number in range(start_block + 1, web3.eth.block_number + 1):
+        for tx in web3.eth.get_block(number, full_transactions=True).transactions:
+            if tx["from"] == wallet:
+                gas_used += web3.eth.get_transaction_receipt(tx["hash"]).gasUsed
+                transactions += 1
+
+    print(f"{label:<28} ok={bool(result)!s:<5} txs={transactions:<3} gas={gas_used:>10,} time={elapsed:6.2f}s")
+    return {"result": result, "gas_used": gas_used, "transactions": transactions, "seconds": elapsed}
+
+
+def main():
+    upstream_url = os.environ['RPC_URL']
+    fork, web3 = start_fork(upstream_url)
+
+    try:
+        wallet = web3.eth.account.from_key(os.environ['PRIVATE_KEY']).address
+        executor_address = deploy_executor(
+            web3,
+            os.environ['PRIVATE_KEY'],
+            os.environ['LBP_CA'],
+            os.environ['REWARDER_CA']
+        )
+        print(f"Deployed LBRebalanceExecutor at {executor_address}")
+
+        # Point the function at the fork and keep its state out of the bucket
+        scratch = tempfile.mkdtemp(prefix="metro_fork_")
+        os.environ.update({
+            "RPC_URL": FORK_URL,
+            "REBALANCE_EXECUTOR_CA": executor_address,
+            "STATE_DIR": scratch,
+            "METADATA_CACHE_DIR": scratch,
+            "CONFIRM_MODE": "poll"
+        })
+        import main as bot
+
+        sonic = bot.sonic
+        engine = sonic.rebalancer
+
+        # Single-transaction path: open a position through the executor, then move it
+        opened = measure(web3, wallet, "executor: open", engine.rebalance)
+        if not opened["result"]:
+            raise Exception("Opening a position through the executor failed")
+        atomic = measure(web3, wallet, "executor: rebalance", lambda: engine.rebalance(opened["result"]))
+        if not atomic["result"]:
+            raise Exception("Executor rebalance failed")
+
+        position = atomic["result"]
+        held = sonic.get_cycle_snapshot(position["bin_ids"], holder=executor_address)["bin_balances"]
+        print(f"Executor holds {held}")
+
+        # Sequential path on the same fork, starting from a wallet-held position
+        measure(web3, wallet, "executor: withdraw", lambda: engine.withdraw(position))
+        wallet_position = measure(web3, wallet, "sequential: open", sonic.add_liquidity)["result"]
+        sonic.executor.begin_cycle()
+
+        def sequential_rebalance():
+            if not sonic.remove_liquidity(wallet_position):
+                return False
+            pending_claim = sonic.claim_rewards(wallet_position, wait=False)
+            added = sonic.add_liquidity()
+            sonic.confirm_all([pending_claim])
+            return added
+
+        sequential = measure(web3, wallet, "sequential: rebalance", sequential_rebalance)
+
+        print(
+            f"Rebalance gas {sequential['gas_used']:,} → {atomic['gas_used']:,}, "
+            f"transactions {sequential['transactions']} → {atomic['transactions']}, "
+            f"time {sequential['seconds']:.2f}s → {atomic['seconds']:.2f}s"
+        )
+
+    finally:
+        fork.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""
+Long-running service mode.
+
+Instead of a scheduler invoking the HTTP function every minute, LiquidityDaemon keeps
+one set of connections alive and runs a pair's cycle only when its active id moves.
+With a websocket endpoint it subscribes to the pairs' `Swap` logs and follows each
+active id from the logs themselves (see active_bin), reading `getActiveId` only to
+resync after a gap or a reorg. Without one, or while the socket is reconnecting, it
+polls `getActiveId` for every pair in one batch each `poll_interval`.
+
+A move only runs the cycle when the decision logic could act on it: the active id
+left the position's bins, the trigger is armed, or there is no position yet.
+
+Cycles also run without a move when a pair's armed trigger reaches its dwell time,
+and at least every `max_idle` seconds so daily claims still happen on quiet pairs.
+"""
+import json
+import logging
+import threading
+import time
+
+from eth_utils import keccak, to_checksum_address
+
+app_logger = logging.getLogger('app_logger')
+
+SWAP_TOPIC = "0x" + keccak(text="Swap(address,address,uint24,bytes32,bytes32,uint24,bytes32,bytes32)").hex()
+
+
+class SwapSubscription:
+    """
+    Background `eth_subscribe("logs")` listener for the Swap events of a set of pairs.
+
+    Logs, including those removed by a reorg, are collected per pair until the next
+    `wait_for_swaps`. Logs sent while the socket was down are lost, so every pair is
+    reported for a resync after each (re)subscription.
+    """
+
+    def __init__(self, ws_url, pairs, max_backoff=10):
+        self.ws_url = ws_url
+        self.pairs = [to_checksum_address(pair) for pair in pairs]
+        self.max_backoff = max_backoff
+        self.logs = {}
+        self.resync = set()
+        self.connected = False
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def start(self) -> None:
+        with self.condition:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="swap-subscription", daemon=True)
+                self.thread.start()
+
+    def wait_for_swaps(self, timeout) -> tuple:
+        """
+        Block until one of the pairs has a swap
+        Args:
+            timeout (float): Seconds to wait
+        Returns:
+            tuple: ({pair: [raw log]} received since the last call, set of pairs whose logs may have gaps)
+        """
+        self.start()
+        with self.condition:
+            self.condition.wait_for(lambda: self.logs or self.resync, timeout=timeout)
+            logs, resync = self.logs, self.resync
+            self.logs, self.resync = {}, set()
+            return logs, resync
+
+    def _run(self):
+        from websockets.sync.client import connect
+
+        backoff = 0.5
+        while True:
+            try:
+                with connect(self.ws_url, open_timeout=10) as socket:
+                    socket.send(json.dumps({
+                        "jsonrpc": "2.0", "id": 1, "method": "eth_subscribe",
+                        "params": ["logs", {"address": self.pairs, "topics": [SWAP_TOPIC]}]
+                    }))
+                    subscription = json.loads(socket.recv(timeout=10)).get("result")
+                    if subscription is None:
+                        raise Exception("eth_subscribe logs rejected")
+
+                    self.connected = True
+                    backoff = 0.5
+                    app_logger.info(f"Subscribed to Swap logs of {len(self.pairs)} pairs ({subscription})")
+
+                    # Anything may have moved while there was no subscription
+                    with self.condition:
+                        self.resync.update(self.pairs)
+                        self.condition.notify_all()
+
+                    for message in socket:
+                        params = json.loads(message).get("params") or {}
+                        if params.get("subscription") != subscription:
+                            continue
+                        log = params["result"]
+                        with self.condition:
+                            self.logs.setdefault(to_checksum_address(log["address"]), []).append(log)
+                            self.condition.notify_all()
+
+            except Exception as e:
+                app_logger.warning(f"Swap log subscription dropped, reconnecting in {backoff}s: {e}")
+
+            self.connected = False
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+class LiquidityDaemon:
+    """
+    Runs pair cycles when their active id changes
+    - connections: SonicConnection per pair, the first one's reader serves every pair
+      and each one's `active_bin` tracker holds its active id
+    - cycle: callable taking the connections to run and returning `(recheck, halted)`,
+      `recheck` is {pair: unix time the pair must run again, None if only on a move}
+      for the pairs that ran, `halted` the set of pairs that hit the emergency stop.
+      Pairs missing from `recheck` failed and are retried after `retry_interval`.
+    - subscription: SwapSubscription, None to poll
+    - poll_interval: seconds between active id polls, and the longest wait between checks
+    - max_idle: seconds after which a pair runs even if its active id has not moved
+    - retry_interval: seconds before a failed pair cycle runs again
+    """
+
+    def __init__(self, connections, cycle, subscription=None, poll_interval=2.0, max_idle=3600, retry_interval=60):
+        self.connections = {connection.pair.pair: connection for connection in connections}
+        self.trackers = {pair: connection.active_bin for pair, connection in self.connections.items()}
+        self.reader = connections[0].reader
+        self.cycle = cycle
+        self.subscription = subscription
+        self.poll_interval = float(poll_interval)
+        self.max_idle = float(max_idle)
+        self.retry_interval = float(retry_interval)
+        self.last_run = {}
+        self.recheck_at = {}
+        self.stopped = threading.Event()
+
+    def read_active_ids(self, pairs) -> dict:
+        """
+        Current active id of each pair, in one batch
+        Returns:
+            dict: {pair: active id}, pairs whose read failed are left out
+        """
+        ids = self.reader.read({
+            pair: self.connections[pair].lbp_contract.functions.getActiveId() for pair in pairs
+        })
+        return {pair: active_id for pair, active_id in ids.items() if active_id is not None}
+
+    def due(self, now) -> set:
+        """Pairs that must run whether or not their active id moved"""
+        return {
+            pair for pair in self.connections
+            if pair not in self.last_run
+            or now - self.last_run[pair] >= self.max_idle
+            or (self.recheck_at.get(pair) is not None and now >= self.recheck_at[pair])
+        }
+
+    def wait(self) -> set:
+        """
+        Wait for the next reason to check, at most until the next due pair, applying any Swap logs
+        Returns:
+            set: Pairs whose tracked active id changed
+        """
+        now = time.time()
+        deadlines = [self.recheck_at[pair] for pair in self.recheck_at if self.recheck_at[pair] is not None]
+        deadlines += [last_run + self.max_idle for last_run in self.last_run.values()]
+        timeout = max(min([self.poll_interval] + [deadline - now for deadline in deadlines]), 0)
+
+        if self.subscription is not None:
+            logs, resync = self.subscription.wait_for_swaps(timeout)
+            for pair in resync & set(self.trackers):
+                self.trackers[pair].invalidate("log subscription restarted")
+            if self.subscription.connected:
+                return {pair for pair, pair_logs in logs.items() if pair in self.trackers and self.trackers[pair].apply(pair_logs)}
+        elif self.stopped.wait(timeout):
+            return set()
+
+        # Every pair is polled without a subscription
+        for tracker in self.trackers.values():
+            tracker.stale = True
+        return set()
+
+    def step(self) -> list:
+        """
+        Wait once, then run the pairs whose active id moved or that are due
+        Returns:
+            list: Pairs whose cycle ran
+        """
+        before = {pair: tracker.active_id for pair, tracker in self.trackers.items()}
+        moved = self.wait()
+        if self.stopped.is_set():
+            return []
+
+        # Stale trackers are resynced from chain in one batch
+        stale = [pair for pair, tracker in self.trackers.items() if tracker.stale]
+        for pair, active_id in (self.read_active_ids(stale) if stale else {}).items():
+            if self.trackers[pair].sync(active_id):
+                moved.add(pair)
+
+        now = time.time()
+        due = self.due(now)
+        for pair in sorted(moved):
+            tracker = self.trackers[pair]
+            if before[pair] is not None:
+                app_logger.info(f"Active id of {pair} moved {before[pair]} -> {tracker.active_id}")
+            if not tracker.needs_cycle():
+                app_logger.debug(f"Active id of {pair} is still within bins {tracker.lowest}-{tracker.highest}")
+                moved.discard(pair)
+
+        run = sorted(moved | due)
+        if not run:
+            return []
+
+        recheck, halted = self.cycle([self.connections[pair] for pair in run])
+
+        for pair in run:
+            self.last_run[pair] = now
+            if pair in recheck:
+                # A trigger already past its dwell time only fires again on a move (dry runs stay armed)
+                self.recheck_at[pair] = recheck[pair] if recheck[pair] is not None and recheck[pair] > now else None
+            else:
+                self.recheck_at[pair] = now + self.retry_interval
+
+        for pair in halted:
+            app_logger.critical(f"Emergency stop for {pair}, no longer managing it")
+            self.connections.pop(pair, None)
+            self.trackers.pop(pair, None)
+            self.recheck_at.pop(pair, None)
+            self.last_run.pop(pair, None)
+
+        if not self.connections:
+            app_logger.critical("Every pair has been stopped, exiting")
+            self.stop()
+
+        return run
+
+    def run_forever(self) -> None:
+        app_logger.info(
+            f"Daemon watching {len(self.connections)} pairs by "
+            f"{'Swap log subscription' if self.subscription else f'polling every {self.poll_interval:g}s'}"
+        )
+        while not self.stopped.is_set():
+            try:
+                self.step()
+            except Exception as e:
+                app_logger.error(f"Daemon step failed: {e}", exc_info=True)
+                self.stopped.wait(self.poll_interval)
+        app_logger.info("Daemon stopped")
+
+    def stop(self) -> None:
+        self.stopped.set()
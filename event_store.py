@@ -0,0 +1,312 @@
+from eth_utils import event_abi_to_log_topic
+import glob
+import json
+import logging
+import os
+
+app_logger = logging.getLogger('app_logger')
+
+# Table columns. Amounts are stored as float64 in raw token units, exact enough for analysis
+# and a fraction of the size of Python ints
+SWAP_COLUMNS = (
+    "block", "log_index", "bin_id",
+    "amount_in_x", "amount_in_y", "amount_out_x", "amount_out_y",
+    "fees_x", "fees_y", "protocol_fees_x", "protocol_fees_y"
+)
+LIQUIDITY_COLUMNS = ("block", "log_index", "bin_id", "amount_x", "amount_y")
+TRANSFER_COLUMNS = ("block", "log_index", "bin_id", "from", "to", "amount")
+CLAIM_COLUMNS = ("block", "log_index", "user", "amount")
+BLOCK_TIME_COLUMNS = ("block", "timestamp")
+
+TABLES = {
+    "swaps": SWAP_COLUMNS,
+    "deposits": LIQUIDITY_COLUMNS,
+    "withdrawals": LIQUIDITY_COLUMNS,
+    "transfers": TRANSFER_COLUMNS,
+    "claims": CLAIM_COLUMNS,
+    "block_times": BLOCK_TIME_COLUMNS
+}
+
+# Column types other than float64, addresses are kept as raw 20 byte strings
+COLUMN_TYPES = {
+    "block": "int64",
+    "log_index": "int32",
+    "bin_id": "int32",
+    "from": "S20",
+    "to": "S20",
+    "user": "S20"
+}
+
+# Pair and rewarder events and the table each one is decoded into
+EVENT_TABLES = {
+    "Swap": "swaps",
+    "DepositedToBins": "deposits",
+    "WithdrawnFromBins": "withdrawals",
+    "TransferBatch": "transfers",
+    "Claim": "claims"
+}
+
+
+def unpack_amounts(packed: bytes) -> tuple:
+    """Split an LB packed bytes32 amount into (x, y), x in the low 128 bits and y in the high 128 bits"""
+    value = int.from_bytes(packed, 'big')
+    return value & ((1 << 128) - 1), value >> 128
+
+
+class EventDecoder:
+    """
+    Decodes raw pair and rewarder logs straight into table rows.
+
+    Decoding goes through the ABI codec on the log data only, skipping web3's
+    per-log AttributeDict construction, which dominates the cost on large ranges.
+    Indexed addresses are taken from the topics as raw bytes.
+    """
+
+    def __init__(self, codec, *abis):
+        self.codec = codec
+        self.events = {}
+        for abi in abis:
+            for entry in abi:
+                if entry.get("type") == "event" and entry["name"] in EVENT_TABLES:
+                    topic = "0x" + event_abi_to_log_topic(entry).hex()
+                    data_types = [arg["type"] for arg in entry["inputs"] if not arg["indexed"]]
+                    self.events[topic] = (entry["name"], data_types)
+
+    @property
+    def topics(self) -> list:
+        return list(self.events)
+
+    def decode(self, logs) -> dict:
+        """
+        Decode logs into rows
+        Args:
+            logs (list): Raw logs from eth_getLogs
+        Returns:
+            dict: {table: [row tuple]}
+        """
+        rows = {table: [] for table in EVENT_TABLES.values()}
+
+        for log in logs:
+            topics = [_bytes(topic) for topic in log["topics"]]
+            event = self.events.get("0x" + topics[0].hex())
+            if event is None:
+                continue
+
+            name, data_types = event
+            values = self.codec.decode(data_types, _bytes(log["data"]))
+            block = _int(log["blockNumber"])
+            log_index = _int(log["logIndex"])
+
+            if name == "Swap":
+                bin_id, amounts_in, amounts_out, _, total_fees, protocol_fees = values
+                rows["swaps"].append((
+                    block, log_index, bin_id,
+                    *unpack_amounts(amounts_in), *unpack_amounts(amounts_out),
+                    *unpack_amounts(total_fees), *unpack_amounts(protocol_fees)
+                ))
+            elif name == "TransferBatch":
+                ids, amounts = values
+                sender, receiver = topics[2][-20:], topics[3][-20:]
+                for bin_id, amount in zip(ids, amounts):
+                    rows["transfers"].append((block, log_index, bin_id, sender, receiver, amount))
+            elif name == "Claim":
+                rows["claims"].append((block, log_index, topics[1][-20:], values[0]))
+            else:
+                ids, amounts = values
+                table = rows[EVENT_TABLES[name]]
+                for bin_id, packed in zip(ids, amounts):
+                    table.append((block, log_index, bin_id, *unpack_amounts(packed)))
+
+        return rows
+
+
+def _int(value) -> int:
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+def _bytes(value) -> bytes:
+    return bytes.fromhex(value[2:]) if isinstance(value, str) else bytes(value)
+
+
+def _columns(table, rows) -> dict:
+    """Turn row tuples into typed column arrays"""
+    import numpy as np
+
+    columns = TABLES[table]
+    if not rows:
+        return {column: np.empty(0, dtype=COLUMN_TYPES.get(column, "float64")) for column in columns}
+
+    transposed = list(zip(*rows))
+    return {
+        column: np.asarray(
+            [float(value) for value in values] if column not in COLUMN_TYPES else values,
+            dtype=COLUMN_TYPES.get(column, "float64")
+        )
+        for column, values in zip(columns, transposed)
+    }
+
+
+class EventStore:
+    """
+    Columnar store of decoded pair events, kept as a directory of compressed NumPy segments.
+
+    Each ingested block range is written once as `segment_<from>_<to>.npz` holding
+    every table for that range, so segments are append-only and a partially written
+    range never corrupts earlier ones. Segments may be written out of block order, so
+    an interrupted ingestion resumes by filling `missing_ranges`. `meta.json` records
+    the pair, its bin step and token decimals, reserves snapshotted just before the
+    first block, which backtests need to value liquidity, and the checkpoint
+    `to_block` up to which every block is covered.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.meta_path = os.path.join(directory, 'meta.json')
+        self.meta = self._read_meta()
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self.meta_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save_meta(self) -> None:
+        with open(self.meta_path + '.tmp', 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(self.meta_path + '.tmp', self.meta_path)
+
+    def segment_path(self, from_block, to_block) -> str:
+        return os.path.join(self.directory, f"segment_{from_block:012d}_{to_block:012d}.npz")
+
+    def write_segment(self, from_block, to_block, rows: dict) -> str:
+        """
+        Write the decoded rows of a block range as one segment
+        Args:
+            from_block (int): First block of the range
+            to_block (int): Last block of the range, inclusive
+            rows (dict): {table: [row tuple]}, missing tables are written empty
+        Returns:
+            str: Segment path
+        """
+        import numpy as np
+
+        arrays = {}
+        for table in TABLES:
+            for column, values in _columns(table, rows.get(table, [])).items():
+                arrays[f"{table}.{column}"] = values
+
+        path = self.segment_path(from_block, to_block)
+        # np.savez appends .npz to names without it, so write under a .tmp.npz name
+        temporary = path[:-len('.npz')] + '.tmp.npz'
+        np.savez_compressed(temporary, **arrays)
+        os.replace(temporary, path)
+        return path
+
+    def segments(self) -> list:
+        """Segment block ranges in block order, as (from_block, to_block, path)"""
+        segments = []
+        for path in glob.glob(os.path.join(self.directory, 'segment_*_*.npz')):
+            name = os.path.basename(path)
+            if name.endswith('.tmp.npz'):
+                continue
+            _, from_block, to_block = name[:-len('.npz')].split('_')
+            segments.append((int(from_block), int(to_block), path))
+        return sorted(segments)
+
+    def missing_ranges(self, from_block, to_block) -> list:
+        """
+        Block ranges between from_block and to_block that no segment covers yet
+        Returns:
+            list: [(first block, last block)] in block order
+        """
+        missing = []
+        cursor = from_block
+        for start, end, _ in self.segments():
+            if end < cursor:
+                continue
+            if start > to_block:
+                break
+            if start > cursor:
+                missing.append((cursor, start - 1))
+            cursor = max(cursor, end + 1)
+        if cursor <= to_block:
+            missing.append((cursor, to_block))
+        return missing
+
+    def covered_to(self, from_block) -> int:
+        """Last block of the unbroken run of segments starting at from_block, from_block - 1 if none"""
+        covered = from_block - 1
+        for start, end, _ in self.segments():
+            if start > covered + 1:
+                break
+            covered = max(covered, end)
+        return covered
+
+    def load(self, table) -> dict:
+        """
+        Load one table across all segments, sorted by block and log index
+        Returns:
+            dict: {column: np.ndarray}
+        """
+        import numpy as np
+
+        parts = {column: [] for column in TABLES[table]}
+        for _, _, path in self.segments():
+            with np.load(path) as segment:
+                # Segments written before a table existed hold no rows for it
+                if f"{table}.{TABLES[table][0]}" not in segment.files:
+                    continue
+                for column in parts:
+                    parts[column].append(segment[f"{table}.{column}"])
+
+        columns = {
+            column: np.concatenate(values) if values else _columns(table, [])[column]
+            for column, values in parts.items()
+        }
+
+        if "log_index" in columns:
+            order = np.lexsort((columns["log_index"], columns["block"]))
+        else:
+            order = np.argsort(columns["block"], kind="stable")
+        return {column: values[order] for column, values in columns.items()}
+
+
+def snapshot_pair(reader, contracts, pair_address, block, radius=100) -> dict:
+    """
+    Read the pair metadata and bin reserves a backtest starts from
+    Args:
+        reader (MulticallReader): Batched reader
+        contracts (ContractPool): Pool with the lbp and erc20 ABIs registered
+        pair_address (str): LB pair address
+        block (int): Block to snapshot at, needs an archive node for old blocks
+        radius (int): Bins either side of the active id to read reserves for
+    Returns:
+        dict: Store metadata
+    """
+    lbp = contracts.get(pair_address, "lbp", requires=("getBin",))
+    pair = reader.read({
+        "token_x": lbp.functions.getTokenX(),
+        "token_y": lbp.functions.getTokenY(),
+        "bin_step": lbp.functions.getBinStep(),
+        "active_id": lbp.functions.getActiveId()
+    }, block_identifier=block)
+    if None in pair.values():
+        raise Exception(f"Failed to read pair {pair_address} at block {block}: {pair}")
+
+    decimals = reader.read({
+        "decimals_x": contracts.get(pair["token_x"], "erc20").functions.decimals(),
+        "decimals_y": contracts.get(pair["token_y"], "erc20").functions.decimals()
+    })
+
+    bin_ids = range(pair["active_id"] - radius, pair["active_id"] + radius + 1)
+    reserves = reader.read({bin_id: lbp.functions.getBin(bin_id) for bin_id in bin_ids}, block_identifier=block)
+
+    return {
+        "pair": contracts.checksum(pair_address),
+        **pair,
+        **decimals,
+        "snapshot_block": block,
+        "initial_reserves": {str(bin_id): list(values) for bin_id, values in reserves.items() if values}
+    }
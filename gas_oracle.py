@@ -0,0 +1,163 @@
+"""
+EIP-1559 fee oracle built on `eth_feeHistory`.
+
+The oracle keeps the base fee and a few priority fee percentiles for each of the last
+`history_blocks` blocks. A read within `max_age` seconds (about one block) of the
+last one is served from the cache, so transactions and claim evaluations sent in the
+same block share one request. A read a few blocks later fetches only the newest
+`refresh_blocks` and merges them in. After a longer gap the whole window is fetched
+again, and blocks that fell out of the window behind the newest one are dropped, so
+the fees always come from recent blocks.
+
+Fees are priced for the next block:
+- the priority fee is the median over the window's non-empty blocks of the chosen percentile's reward
+- the max fee leaves room for the base fee to rise `base_fee_multiple` times before inclusion
+
+Chains without a base fee get legacy `gasPrice` transactions at the same percentile.
+"""
+import logging
+import time
+
+gas_logger = logging.getLogger('gas_logger')
+
+
+class GasFees:
+    """Fees to send the next transactions with, priced at one block"""
+
+    __slots__ = ("block", "base_fee", "priority_fee", "max_fee", "gas_price")
+
+    def __init__(self, block, base_fee, priority_fee, max_fee, gas_price=None):
+        self.block = block
+        self.base_fee = base_fee
+        self.priority_fee = priority_fee
+        self.max_fee = max_fee
+        self.gas_price = gas_price
+
+    @property
+    def price(self) -> int:
+        """Price per gas a transaction is expected to pay, for cost estimates"""
+        if self.gas_price is not None:
+            return self.gas_price
+        return min(self.base_fee + self.priority_fee, self.max_fee)
+
+    def tx_fields(self) -> dict:
+        """Fee fields for a transaction"""
+        if self.gas_price is not None:
+            return {'gasPrice': self.gas_price}
+        return {'maxFeePerGas': self.max_fee, 'maxPriorityFeePerGas': self.priority_fee}
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class GasOracle:
+    """
+    Per-block fee history and the fees derived from it
+    - percentiles: priority fee percentiles requested for each block
+    - priority_percentile: the one transactions tip at, must be in `percentiles`
+    - history_blocks: blocks the priority fee is taken over
+    - refresh_blocks: newest blocks fetched once the window is loaded
+    - base_fee_multiple: rise in base fee the max fee still covers
+    - max_age: seconds a read is reused for, about one block
+    - defer_above: expected price per gas in wei above which non-urgent transactions wait, None to never defer
+    """
+
+    def __init__(self, web3, percentiles=(10, 50, 90), priority_percentile=50, history_blocks=20,
+                 refresh_blocks=4, base_fee_multiple=2, max_age=1.0, defer_above=None):
+        if priority_percentile not in percentiles:
+            raise Exception(f"Priority percentile {priority_percentile} is not one of {percentiles}")
+        self.web3 = web3
+        self.percentiles = list(percentiles)
+        self.priority_index = self.percentiles.index(priority_percentile)
+        self.history_blocks = int(history_blocks)
+        self.refresh_blocks = int(refresh_blocks)
+        self.base_fee_multiple = base_fee_multiple
+        self.max_age = float(max_age)
+        self.defer_above = defer_above
+        self.history = {}
+        self.next_base_fee = None
+        self.fetched_at = None
+        self.current = None
+
+    def request_blocks(self) -> int:
+        """Blocks the next eth_feeHistory request should cover"""
+        # max_age is about one block, so an older read may have missed more than refresh_blocks
+        if self.history and time.monotonic() - self.fetched_at < self.max_age * self.refresh_blocks:
+            return self.refresh_blocks
+        return self.history_blocks
+
+    def update(self, fee_history) -> GasFees:
+        """
+        Merge an eth_feeHistory response into the per-block cache
+        Args:
+            fee_history (dict): Response with oldestBlock, baseFeePerGas and reward
+        Returns:
+            GasFees: Fees for the block after the newest one in the cache
+        """
+        oldest = _int(fee_history["oldestBlock"])
+        base_fees = [_int(fee) for fee in fee_history["baseFeePerGas"]]
+        rewards = fee_history.get("reward") or [[0] * len(self.percentiles)] * (len(base_fees) - 1)
+
+        used = fee_history.get("gasUsedRatio") or [1.0] * len(rewards)
+
+        for offset, reward in enumerate(rewards):
+            self.history[oldest + offset] = (base_fees[offset], [_int(fee) for fee in reward], used[offset] > 0)
+
+        newest = oldest + len(rewards) - 1
+        if self.next_base_fee is None or newest >= max(self.history):
+            # The last base fee is the one the block after the newest will charge
+            self.next_base_fee = base_fees[-1]
+
+        # Only the blocks within the window behind the newest one are recent enough to price at
+        cutoff = max(self.history) - self.history_blocks
+        for block in [block for block in self.history if block <= cutoff]:
+            del self.history[block]
+
+        self.fetched_at = time.monotonic()
+        self.current = self._fees()
+        return self.current
+
+    def _fees(self) -> GasFees:
+        block = max(self.history) + 1
+        # Empty blocks report zero rewards, so they only count when every block was empty
+        tips = sorted(reward[self.priority_index] for _, reward, used in self.history.values() if used)
+        tips = tips or sorted(reward[self.priority_index] for _, reward, _ in self.history.values())
+        priority_fee = tips[len(tips) // 2] if tips else 0
+        if not self.next_base_fee:
+            # Without a base fee the whole gas price is the reward, and only legacy transactions are taken
+            return GasFees(block, 0, 0, 0, gas_price=priority_fee)
+
+        max_fee = int(self.next_base_fee * self.base_fee_multiple) + priority_fee
+        return GasFees(block, self.next_base_fee, priority_fee, max_fee)
+
+    def fees(self) -> GasFees:
+        """
+        Fees for the next block, from the cache if it was read within max_age
+        Returns:
+            GasFees: Fee fields and the expected price per gas
+        """
+        if self.current is not None and time.monotonic() - self.fetched_at < self.max_age:
+            return self.current
+
+        fees = self.update(self.web3.eth.fee_history(self.request_blocks(), 'latest', self.percentiles))
+        gas_logger.debug(f"Gas fees: {fees.as_dict()}")
+        return fees
+
+    def defer_reason(self, fees=None) -> str:
+        """
+        Why a non-urgent transaction should wait for cheaper gas
+        Args:
+            fees (GasFees): Fees to judge, the oracle's current ones if not set
+        Returns:
+            str: Reason to defer, None if the transaction can go ahead
+        """
+        if self.defer_above is None:
+            return None
+        fees = fees or self.fees()
+        if fees.price <= self.defer_above:
+            return None
+        return f"gas at {fees.price / 1e9:.2f} gwei, above the {self.defer_above / 1e9:.2f} gwei limit"
+
+
+def _int(value) -> int:
+    return int(value, 16) if isinstance(value, str) else int(value)
@@ -0,0 +1,774 @@
+"""
+Liquidity Book math in exact integers, matching the pair contracts.
+
+Prices are 128.128 fixed point numbers of token Y per token X in raw units, and
+fees are 1e18 precision fractions, as on-chain. Rounding follows the contracts so
+locally simulated swaps give the same amounts as `getSwapOut`, and local deposits
+and withdrawals the same shares and amounts as `mint` and `burn`.
+
+The batch functions take and return NumPy arrays. Exact values do not fit in 64
+bits, so they are object arrays of Python ints; prices are computed once per
+distinct bin id, so long id series such as a backtest's swaps stay cheap.
+
+Recorded on-chain results can be checked against this module without an RPC:
+
+    python lb_math.py record --pair 0x... --block 12345678 --radius 20
+    python lb_math.py check
+
+`record` reads prices, ids, bins, fee parameters and swap quotes at one block, and
+`check` compares them with the local math and verifies the mint and burn invariants
+on the recorded bins.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+
+app_logger = logging.getLogger('app_logger')
+
+# Fixture file record writes and check reads by default, committed at the repository root
+LB_FIXTURES = 'lb_fixtures.json'
+
+SCALE_OFFSET = 128
+SCALE = 1 << SCALE_OFFSET
+PRECISION = 10**18
+SQUARED_PRECISION = PRECISION * PRECISION
+BASIS_POINT_MAX = 10000
+REAL_ID_SHIFT = 1 << 23
+MAX_UINT24 = (1 << 24) - 1
+MAX_UINT256 = (1 << 256) - 1
+MAX_LIQUIDITY_PER_BIN = 65251743116719673010965625540244653191619923014385985379600384103134737
+
+# log2 works on 129.127 numbers so squaring stays within 256 bits
+LOG_SCALE_OFFSET = 127
+LOG_SCALE = 1 << LOG_SCALE_OFFSET
+LOG_SCALE_SQUARED = LOG_SCALE * LOG_SCALE
+
+
+def get_base(bin_step: int) -> int:
+    """1 + binStep / 10000 in 128.128"""
+    return SCALE + (bin_step << SCALE_OFFSET) // BASIS_POINT_MAX
+
+
+def pow_128(x: int, y: int) -> int:
+    """x ^ y for a 128.128 x and an integer y, with the same rounding as Uint128x128Math.pow"""
+    if y == 0:
+        return SCALE
+
+    invert = y < 0
+    abs_y = abs(y)
+    if abs_y >= 0x100000:
+        raise Exception(f"Exponent {y} out of range")
+
+    squared = x
+    if x > (1 << 128) - 1:
+        squared = MAX_UINT256 // squared
+        invert = not invert
+
+    result = SCALE
+    bit = 1
+    while bit <= abs_y:
+        if abs_y & bit:
+            result = (result * squared) >> SCALE_OFFSET
+        squared = (squared * squared) >> SCALE_OFFSET
+        bit <<= 1
+
+    if result == 0:
+        raise Exception(f"Power {x} ^ {y} underflowed")
+    return MAX_UINT256 // result if invert else result
+
+
+def get_price_from_id(bin_id: int, bin_step: int) -> int:
+    """128.128 price of a bin, as getPriceFromId returns it"""
+    return pow_128(get_base(bin_step), int(bin_id) - REAL_ID_SHIFT)
+
+
+def log2_128(x: int) -> int:
+    """Signed 128.128 log2 of a 128.128 number, with the same rounding as Uint128x128Math.log2"""
+    if x == 1:
+        return -128
+    if x == 0:
+        raise Exception("Logarithm of zero")
+
+    x >>= 1
+    sign = 1
+    if x < LOG_SCALE:
+        # log2(x) = -log2(1/x)
+        sign = -1
+        x = LOG_SCALE_SQUARED // x
+
+    # Integer part, then the fractional part bit by bit by repeated squaring
+    n = (x >> LOG_SCALE_OFFSET).bit_length() - 1
+    result = n << LOG_SCALE_OFFSET
+    y = x >> n
+
+    if y != LOG_SCALE:
+        delta = 1 << (LOG_SCALE_OFFSET - 1)
+        while delta > 0:
+            y = (y * y) >> LOG_SCALE_OFFSET
+            if y >= 1 << (LOG_SCALE_OFFSET + 1):
+                result += delta
+                y >>= 1
+            delta >>= 1
+
+    return (result * sign) << 1
+
+
+def get_id_from_price(price: int, bin_step: int) -> int:
+    """
+    Bin id of a 128.128 price, as getIdFromPrice returns it.
+    The contract truncates the log ratio towards zero, so a price exactly on a bin
+    boundary above id 2^23 can come out one bin low, as it does on-chain.
+    """
+    return _id_from_logs(log2_128(int(price)), log2_128(get_base(bin_step)), price)
+
+
+def _id_from_logs(numerator, denominator, price) -> int:
+    # Signed division truncating towards zero, as in Solidity
+    quotient = abs(numerator) // abs(denominator)
+    bin_id = REAL_ID_SHIFT + (quotient if (numerator < 0) == (denominator < 0) else -quotient)
+    if not 0 <= bin_id <= MAX_UINT24:
+        raise Exception(f"Price {price} is outside the bin id range")
+    return bin_id
+
+
+def price_to_float(price: int, decimals_x: int = 0, decimals_y: int = 0) -> float:
+    """Convert a 128.128 price to a float price of whole X tokens in whole Y tokens"""
+    return price / SCALE * 10.0**(decimals_x - decimals_y)
+
+
+def price_from_float(price: float, decimals_x: int = 0, decimals_y: int = 0) -> int:
+    """Convert a float price of whole X tokens in whole Y tokens to 128.128, for get_id_from_price"""
+    return int(price * 10.0**(decimals_y - decimals_x) * SCALE)
+
+
+def _mul_shift(x: int, y: int, round_up: bool) -> int:
+    product = x * y
+    result = product >> SCALE_OFFSET
+    if round_up and product & (SCALE - 1):
+        result += 1
+    return result
+
+
+def _shift_div(x: int, denominator: int, round_up: bool) -> int:
+    result, remainder = divmod(x << SCALE_OFFSET, denominator)
+    if round_up and remainder:
+        result += 1
+    return result
+
+
+def get_fee_amount_from(amount_with_fees: int, total_fee: int) -> int:
+    """Fee included in an amount that already carries it"""
+    return (amount_with_fees * total_fee + PRECISION - 1) // PRECISION
+
+
+def get_fee_amount(amount: int, total_fee: int) -> int:
+    """Fee to add on top of an amount"""
+    denominator = PRECISION - total_fee
+    return (amount * total_fee + denominator - 1) // denominator
+
+
+def get_composition_fee(amount_with_fees: int, total_fee: int) -> int:
+    """Fee charged on the part of an active bin deposit that is swapped to match the bin"""
+    return amount_with_fees * total_fee * (total_fee + PRECISION) // SQUARED_PRECISION
+
+
+def get_protocol_fee(fee: int, protocol_share: int) -> int:
+    """Protocol's part of a fee, protocol_share in basis points"""
+    return fee * protocol_share // BASIS_POINT_MAX
+
+
+def _mul_div(x: int, y: int, denominator: int, round_up: bool) -> int:
+    result, remainder = divmod(x * y, denominator)
+    if round_up and remainder:
+        result += 1
+    return result
+
+
+def get_liquidity(amount_x: int, amount_y: int, price: int) -> int:
+    """Liquidity of amounts at a bin's price, price * x + y in 128.128, as BinHelper.getLiquidity"""
+    liquidity = price * amount_x + (amount_y << SCALE_OFFSET)
+    if liquidity > MAX_UINT256:
+        raise Exception(f"Liquidity of {amount_x}, {amount_y} at price {price} overflows")
+    return liquidity
+
+
+def bin_composition(reserve_x: int, reserve_y: int, price: int) -> float:
+    """Share of a bin's value held in token Y, 0 for a bin of only X and 1 for a bin of only Y"""
+    liquidity = get_liquidity(reserve_x, reserve_y, price)
+    return (reserve_y << SCALE_OFFSET) / liquidity if liquidity else 0.0
+
+
+def get_amounts_out_of_bin(reserve_x: int, reserve_y: int, amount_to_burn: int, total_supply: int) -> tuple:
+    """
+    Tokens returned for burning shares of a bin, as BinHelper.getAmountOutOfBin
+    Returns:
+        tuple: (amount_x, amount_y)
+    """
+    if total_supply == 0:
+        return 0, 0
+    return (
+        amount_to_burn * reserve_x // total_supply if reserve_x > 0 else 0,
+        amount_to_burn * reserve_y // total_supply if reserve_y > 0 else 0
+    )
+
+
+def get_shares_and_effective_amounts_in(reserve_x, reserve_y, amount_x, amount_y, price, total_supply) -> tuple:
+    """
+    Shares a deposit into a bin mints, and the amounts the bin actually takes for them,
+    as BinHelper.getSharesAndEffectiveAmountsIn
+    Returns:
+        tuple: (shares, amount_x, amount_y)
+    """
+    user_liquidity = get_liquidity(amount_x, amount_y, price)
+    if user_liquidity == 0:
+        return 0, 0, 0
+
+    bin_liquidity = get_liquidity(reserve_x, reserve_y, price)
+    if bin_liquidity == 0 or total_supply == 0:
+        return math.isqrt(user_liquidity) << 64, amount_x, amount_y
+
+    shares = _mul_div(user_liquidity, total_supply, bin_liquidity, round_up=False)
+    effective_liquidity = _mul_div(shares, bin_liquidity, total_supply, round_up=True)
+
+    if user_liquidity > effective_liquidity:
+        # Liquidity the shares do not cover is handed back, Y first as it is the quote asset
+        delta_liquidity = user_liquidity - effective_liquidity
+
+        if delta_liquidity >= SCALE:
+            delta_y = min(delta_liquidity >> SCALE_OFFSET, amount_y)
+            amount_y -= delta_y
+            delta_liquidity -= delta_y << SCALE_OFFSET
+
+        if delta_liquidity >= price:
+            amount_x -= min(delta_liquidity // price, amount_x)
+
+    if get_liquidity(reserve_x + amount_x, reserve_y + amount_y, price) > MAX_LIQUIDITY_PER_BIN:
+        raise Exception("Deposit exceeds the maximum liquidity per bin")
+
+    return shares, amount_x, amount_y
+
+
+def get_composition_fees(reserve_x, reserve_y, amount_x, amount_y, total_supply, shares, total_fee) -> tuple:
+    """
+    Fees on an active bin deposit whose composition differs from the bin's, as BinHelper.getCompositionFees
+    Returns:
+        tuple: (fee_x, fee_y)
+    """
+    if shares == 0:
+        return 0, 0
+
+    received_x, received_y = get_amounts_out_of_bin(
+        reserve_x + amount_x, reserve_y + amount_y, shares, total_supply + shares
+    )
+    if received_x > amount_x:
+        return 0, get_composition_fee(amount_y - received_y, total_fee)
+    if received_y > amount_y:
+        return get_composition_fee(amount_x - received_x, total_fee), 0
+    return 0, 0
+
+
+
+class FeeParameters:
+    """
+    Static and variable fee parameters of a pair, as read from
+    `getStaticFeeParameters` and `getVariableFeeParameters`.
+
+    `update_references` and `update_volatility_accumulator` advance the variable
+    part the way a swap does, so fees can be simulated bin by bin.
+    """
+
+    __slots__ = (
+        "base_factor", "filter_period", "decay_period", "reduction_factor", "variable_fee_control",
+        "protocol_share", "max_volatility_accumulator",
+        "volatility_accumulator", "volatility_reference", "id_reference", "time_of_last_update"
+    )
+
+    def __init__(self, static, variable):
+        (
+            self.base_factor, self.filter_period, self.decay_period, self.reduction_factor,
+            self.variable_fee_control, self.protocol_share, self.max_volatility_accumulator
+        ) = (int(value) for value in static)
+        (
+            self.volatility_accumulator, self.volatility_reference, self.id_reference, self.time_of_last_update
+        ) = (int(value) for value in variable)
+
+    def copy(self):
+        copied = FeeParameters.__new__(FeeParameters)
+        for name in self.__slots__:
+            setattr(copied, name, getattr(self, name))
+        return copied
+
+    def base_fee(self, bin_step: int) -> int:
+        return self.base_factor * bin_step * 10**10
+
+    def variable_fee(self, bin_step: int) -> int:
+        if self.variable_fee_control == 0:
+            return 0
+        product = self.volatility_accumulator * bin_step
+        return (product * product * self.variable_fee_control + 99) // 100
+
+    def total_fee(self, bin_step: int) -> int:
+        return self.base_fee(bin_step) + self.variable_fee(bin_step)
+
+    def update_references(self, active_id: int, timestamp: int) -> None:
+        """Decay the volatility reference for the time since the last swap"""
+        elapsed = timestamp - self.time_of_last_update
+        if elapsed >= self.filter_period:
+            self.id_reference = active_id
+            if elapsed < self.decay_period:
+                self.volatility_reference = self.volatility_accumulator * self.reduction_factor // BASIS_POINT_MAX
+            else:
+                self.volatility_reference = 0
+        self.time_of_last_update = timestamp
+
+    def update_volatility_accumulator(self, bin_id: int) -> None:
+        """Accumulate volatility for the bins crossed since the reference id"""
+        delta_id = abs(bin_id - self.id_reference)
+        self.volatility_accumulator = min(
+            self.volatility_reference + delta_id * BASIS_POINT_MAX,
+            self.max_volatility_accumulator
+        )
+
+    def update_volatility_parameters(self, active_id: int, timestamp: int) -> None:
+        """Advance the variable fee to an operation on the active bin, as a deposit into it does"""
+        self.update_references(active_id, timestamp)
+        self.update_volatility_accumulator(active_id)
+
+
+class BinDeposit:
+    """Outcome of depositing into one bin"""
+
+    __slots__ = ("shares", "amount_x", "amount_y", "fee_x", "fee_y", "protocol_fee_x", "protocol_fee_y")
+
+    def __init__(self, shares, amount_x, amount_y, fee_x=0, fee_y=0, protocol_fee_x=0, protocol_fee_y=0):
+        self.shares = shares
+        self.amount_x = amount_x
+        self.amount_y = amount_y
+        self.fee_x = fee_x
+        self.fee_y = fee_y
+        self.protocol_fee_x = protocol_fee_x
+        self.protocol_fee_y = protocol_fee_y
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def mint_bin(reserve_x, reserve_y, total_supply, amount_x, amount_y, bin_id, active_id, bin_step, fee_parameters=None, timestamp=0) -> BinDeposit:
+    """
+    Deposit into one bin, as LBPair._updateBin does for each bin of a mint
+    Args:
+        reserve_x, reserve_y (int): Bin reserves before the deposit
+        total_supply (int): Bin shares before the deposit
+        amount_x, amount_y (int): Amounts offered to the bin
+        bin_id (int): Bin deposited into
+        active_id (int): Active id of the pair
+        bin_step (int): Pair bin step
+        fee_parameters (FeeParameters): Fee parameters before the deposit, left unchanged,
+            only needed for the active bin
+        timestamp (int): Block timestamp the deposit is expected at
+    Returns:
+        BinDeposit: Shares minted, amounts taken from the depositor and the composition fees in them
+    """
+    price = get_price_from_id(bin_id, bin_step)
+    shares, amount_x, amount_y = get_shares_and_effective_amounts_in(
+        reserve_x, reserve_y, amount_x, amount_y, price, total_supply
+    )
+    deposit = BinDeposit(shares, amount_x, amount_y)
+
+    if bin_id == active_id:
+        if fee_parameters is None:
+            raise Exception("Fee parameters are needed to deposit into the active bin")
+
+        parameters = fee_parameters.copy()
+        parameters.update_volatility_parameters(active_id, timestamp)
+        fee_x, fee_y = get_composition_fees(
+            reserve_x, reserve_y, amount_x, amount_y, total_supply, shares, parameters.total_fee(bin_step)
+        )
+
+        if fee_x or fee_y:
+            # Shares are worth the deposit net of fees, against the bin with the LPs' part of the fees
+            protocol_fee_x = get_protocol_fee(fee_x, parameters.protocol_share)
+            protocol_fee_y = get_protocol_fee(fee_y, parameters.protocol_share)
+            user_liquidity = get_liquidity(amount_x - fee_x, amount_y - fee_y, price)
+            bin_liquidity = get_liquidity(
+                reserve_x + fee_x - protocol_fee_x, reserve_y + fee_y - protocol_fee_y, price
+            )
+            deposit = BinDeposit(
+                _mul_div(user_liquidity, total_supply, bin_liquidity, round_up=False),
+                amount_x, amount_y, fee_x, fee_y, protocol_fee_x, protocol_fee_y
+            )
+
+    elif (amount_y == 0 and bin_id < active_id) or (amount_y > 0 and bin_id > active_id):
+        raise Exception(f"Composition of the deposit into bin {bin_id} does not match its side of the active bin")
+
+    if deposit.shares == 0 or (deposit.amount_x - deposit.protocol_fee_x == 0 and deposit.amount_y - deposit.protocol_fee_y == 0):
+        raise Exception(f"Deposit into bin {bin_id} mints no shares")
+    return deposit
+
+
+def get_amounts(reserve_out: int, price: int, total_fee: int, swap_for_y: bool, amount_in: int) -> tuple:
+    """
+    Swap against one bin, as BinHelper.getAmounts does
+    Args:
+        reserve_out (int): Bin reserve of the token going out
+        price (int): 128.128 price of the bin
+        total_fee (int): Total fee with 1e18 precision
+        swap_for_y (bool): True when X goes in and Y comes out
+        amount_in (int): Amount left to swap, fees included
+    Returns:
+        tuple: (amount_in used including fees, amount_out, fee)
+    """
+    if swap_for_y:
+        max_amount_in = _shift_div(reserve_out, price, round_up=True)
+    else:
+        max_amount_in = _mul_shift(reserve_out, price, round_up=True)
+
+    max_fee = get_fee_amount(max_amount_in, total_fee)
+    max_amount_in += max_fee
+
+    if amount_in >= max_amount_in:
+        return max_amount_in, reserve_out, max_fee
+
+    fee = get_fee_amount_from(amount_in, total_fee)
+    amount_in_without_fee = amount_in - fee
+    if swap_for_y:
+        amount_out = _mul_shift(amount_in_without_fee, price, round_up=False)
+    else:
+        amount_out = _shift_div(amount_in_without_fee, price, round_up=False)
+    return amount_in, min(amount_out, reserve_out), fee
+
+
+def simulate_swap_out(bins, active_id, bin_step, fee_parameters, amount_in, swap_for_y, timestamp) -> tuple:
+    """
+    Simulate an exact input swap bin by bin, as LBPair.getSwapOut does
+    Args:
+        bins (iterable): (bin_id, reserve_x, reserve_y) of the bins in swap order, starting at the active bin
+        active_id (int): Active id of the pair
+        bin_step (int): Pair bin step
+        fee_parameters (FeeParameters): Fee parameters before the swap, left unchanged
+        amount_in (int): Amount of the input token
+        swap_for_y (bool): True when X goes in and Y comes out
+        timestamp (int): Block timestamp the swap is expected at
+    Returns:
+        tuple: (amount_in_left, amount_out, fee)
+    """
+    parameters = fee_parameters.copy()
+    parameters.update_references(active_id, timestamp)
+
+    amount_in_left = int(amount_in)
+    amount_out = 0
+    fee = 0
+
+    for bin_id, reserve_x, reserve_y in bins:
+        reserve_out = reserve_y if swap_for_y else reserve_x
+        if reserve_out > 0:
+            parameters.update_volatility_accumulator(bin_id)
+            used, bin_out, bin_fee = get_amounts(
+                reserve_out,
+                get_price_from_id(bin_id, bin_step),
+                parameters.total_fee(bin_step),
+                swap_for_y,
+                amount_in_left
+            )
+            if used > 0:
+                amount_in_left -= used
+                amount_out += bin_out
+                fee += bin_fee
+
+        if amount_in_left == 0:
+            break
+
+    return amount_in_left, amount_out, fee
+
+
+def get_prices_from_ids(bin_ids, bin_step: int) -> np.ndarray:
+    """
+    128.128 prices of many bins, computed once per distinct id
+    Returns:
+        np.ndarray: Object array of ints shaped like bin_ids
+    """
+    import numpy as np
+
+    bin_ids = np.asarray(bin_ids, dtype=np.int64)
+    unique, inverse = np.unique(bin_ids, return_inverse=True)
+    prices = np.empty(len(unique), dtype=object)
+    prices[:] = [get_price_from_id(int(bin_id), bin_step) for bin_id in unique]
+    return prices[inverse].reshape(bin_ids.shape)
+
+
+def get_ids_from_prices(prices, bin_step: int) -> np.ndarray:
+    """
+    Bin ids of many 128.128 prices, as getIdFromPrice returns them
+    Returns:
+        np.ndarray: int64 array shaped like prices
+    """
+    import numpy as np
+
+    prices = np.asarray(prices, dtype=object)
+    base_log = log2_128(get_base(bin_step))
+    ids = [_id_from_logs(log2_128(int(price)), base_log, price) for price in prices.ravel()]
+    return np.array(ids, dtype=np.int64).reshape(prices.shape)
+
+
+def prices_to_float(prices, decimals_x: int = 0, decimals_y: int = 0) -> np.ndarray:
+    """Convert 128.128 prices to float64 prices of whole X tokens in whole Y tokens"""
+    import numpy as np
+
+    prices = np.asarray(prices, dtype=object)
+    return (prices / SCALE).astype(np.float64) * 10.0**(decimals_x - decimals_y)
+
+
+def get_liquidities(amounts_x, amounts_y, prices) -> np.ndarray:
+    """Liquidity of many bins' amounts at their prices, price * x + y in 128.128, as an object array"""
+    import numpy as np
+
+    amounts_x, amounts_y, prices = (np.asarray(values, dtype=object) for values in (amounts_x, amounts_y, prices))
+    return prices * amounts_x + amounts_y * SCALE
+
+
+def get_amounts_out_of_bins(reserves_x, reserves_y, amounts_to_burn, total_supplies) -> tuple:
+    """
+    Tokens returned for burning shares of many bins, as a burn across them does
+    Returns:
+        tuple: (amounts_x, amounts_y) object arrays
+    """
+    import numpy as np
+
+    reserves_x, reserves_y, amounts, supplies = (
+        np.asarray(values, dtype=object) for values in (reserves_x, reserves_y, amounts_to_burn, total_supplies)
+    )
+    empty = supplies == 0
+    divisors = np.where(empty, 1, supplies)
+    return np.where(empty, 0, amounts * reserves_x // divisors), np.where(empty, 0, amounts * reserves_y // divisors)
+
+
+def mint_bins(bin_ids, reserves_x, reserves_y, total_supplies, amounts_x, amounts_y, active_id, bin_step, fee_parameters=None, timestamp=0) -> tuple:
+    """
+    Deposit into many bins, as one mint across them does
+    Returns:
+        tuple: (shares, amounts_x, amounts_y, fees_x, fees_y) object arrays
+    """
+    import numpy as np
+
+    deposits = [
+        mint_bin(*(int(value) for value in values), active_id, bin_step, fee_parameters, timestamp)
+        for values in zip(reserves_x, reserves_y, total_supplies, amounts_x, amounts_y, bin_ids)
+    ]
+    columns = ("shares", "amount_x", "amount_y", "fee_x", "fee_y")
+    results = tuple(np.empty(len(deposits), dtype=object) for _ in columns)
+    for column, result in zip(columns, results):
+        result[:] = [getattr(deposit, column) for deposit in deposits]
+    return results
+
+
+def get_total_fees(fee_parameters, bin_step: int, volatility_accumulators) -> np.ndarray:
+    """Total fee at many volatility accumulator values, with 1e18 precision, as an object array"""
+    import numpy as np
+
+    accumulators = np.asarray(volatility_accumulators, dtype=object)
+    base_fee = fee_parameters.base_fee(bin_step)
+    if fee_parameters.variable_fee_control == 0:
+        return np.full(accumulators.shape, base_fee, dtype=object)
+
+    product = accumulators * bin_step
+    return base_fee + (product * product * fee_parameters.variable_fee_control + 99) // 100
+
+
+def record_fixtures(rpc_url, pair_address, radius=20, block=None) -> dict:
+    """
+    Read a pair's prices, ids, bins, fee parameters and swap quotes at one block
+    Args:
+        rpc_url (str): RPC endpoint
+        pair_address (str): LB pair address
+        radius (int): Bins either side of the active id to record
+        block (int): Block to record at, latest if not set
+    Returns:
+        dict: Fixtures for check_fixtures, ints as strings
+    """
+    from web3 import Web3
+
+    from abi_bundle import load_bundle, load_full_abi
+    from contract_pool import ContractPool
+    from multicall import MulticallReader
+
+    web3 = Web3(Web3.HTTPProvider(rpc_url))
+    contracts = ContractPool(web3)
+    bundled = load_bundle()["lbp"]
+    contracts.register_abi("lbp", bundled["abi"], selectors=bundled["selectors"], fallback=lambda: load_full_abi("lbp"))
+    reader = MulticallReader(web3, rpc_url, contracts=contracts)
+
+    block = block or web3.eth.block_number
+    lbp = contracts.get(pair_address, "lbp", requires=("getIdFromPrice", "totalSupply"))
+
+    pair = reader.read({
+        "active_id": lbp.functions.getActiveId(),
+        "bin_step": lbp.functions.getBinStep(),
+        "static": lbp.functions.getStaticFeeParameters(),
+        "variable": lbp.functions.getVariableFeeParameters()
+    }, block_identifier=block)
+    if None in pair.values():
+        raise Exception(f"Failed to read pair {pair_address} at block {block}: {pair}")
+
+    bin_ids = list(range(pair["active_id"] - radius, pair["active_id"] + radius + 1))
+    calls = {}
+    for bin_id in bin_ids:
+        calls[("price", bin_id)] = lbp.functions.getPriceFromId(bin_id)
+        calls[("bin", bin_id)] = lbp.functions.getBin(bin_id)
+        calls[("supply", bin_id)] = lbp.functions.totalSupply(bin_id)
+    results = reader.read(calls, block_identifier=block)
+
+    # Prices on, just above and just below each bin price, and between bins
+    prices = []
+    for bin_id in bin_ids:
+        price = results[("price", bin_id)]
+        prices += [price - 1, price, price + 1, price + price * pair["bin_step"] // 20000]
+    ids = reader.read({index: lbp.functions.getIdFromPrice(price) for index, price in enumerate(prices)}, block_identifier=block)
+
+    # Swap quotes of growing size in both directions, up to half the recorded reserves' value
+    bins = {bin_id: results[("bin", bin_id)] for bin_id in bin_ids}
+    active_price = results[("price", pair["active_id"])]
+    reserves_in = (
+        (True, sum(y for _, y in bins.values()) * SCALE // active_price),
+        (False, sum(x for x, _ in bins.values()) * active_price // SCALE)
+    )
+    quotes = {}
+    for swap_for_y, reserve in reserves_in:
+        for fraction in (1000, 100, 10, 2):
+            if reserve // fraction:
+                quotes[(swap_for_y, reserve // fraction)] = lbp.functions.getSwapOut(reserve // fraction, swap_for_y)
+    quoted = reader.read(quotes, block_identifier=block)
+
+    return {
+        "pair": contracts.checksum(pair_address),
+        "block": block,
+        "timestamp": web3.eth.get_block(block)["timestamp"],
+        "active_id": pair["active_id"],
+        "bin_step": pair["bin_step"],
+        "static_fee_parameters": [str(value) for value in pair["static"]],
+        "variable_fee_parameters": [str(value) for value in pair["variable"]],
+        "bins": [
+            [bin_id, str(results[("price", bin_id)]), *(str(value) for value in bins[bin_id]), str(results[("supply", bin_id)])]
+            for bin_id in bin_ids
+        ],
+        "ids_from_prices": [[str(price), ids[index]] for index, price in enumerate(prices) if ids[index] is not None],
+        "swaps": [
+            [swap_for_y, str(amount_in), *(str(value) for value in result)]
+            for (swap_for_y, amount_in), result in quoted.items() if result is not None
+        ]
+    }
+
+
+def check_fixtures(fixtures) -> list:
+    """
+    Compare recorded on-chain results with the local math and check the mint and burn invariants
+    Args:
+        fixtures (dict): Output of record_fixtures
+    Returns:
+        list: Description of each mismatch, empty if everything matches
+    """
+    failures = []
+    bin_step = fixtures["bin_step"]
+    active_id = fixtures["active_id"]
+    timestamp = fixtures["timestamp"]
+    fee_parameters = FeeParameters(fixtures["static_fee_parameters"], fixtures["variable_fee_parameters"])
+    bins = [(bin_id, int(price), int(x), int(y), int(supply)) for bin_id, price, x, y, supply in fixtures["bins"]]
+
+    # Prices and ids, one by one and in batch
+    bin_ids = [bin_id for bin_id, *_ in bins]
+    batch_prices = get_prices_from_ids(bin_ids, bin_step)
+    for (bin_id, price, *_), batch_price in zip(bins, batch_prices):
+        if get_price_from_id(bin_id, bin_step) != price or batch_price != price:
+            failures.append(f"price of bin {bin_id}: {get_price_from_id(bin_id, bin_step)} != {price}")
+
+    prices = [int(price) for price, _ in fixtures["ids_from_prices"]]
+    batch_ids = get_ids_from_prices(prices, bin_step)
+    for (price, bin_id), batch_id in zip(fixtures["ids_from_prices"], batch_ids):
+        if get_id_from_price(int(price), bin_step) != bin_id or batch_id != bin_id:
+            failures.append(f"id of price {price}: {get_id_from_price(int(price), bin_step)} != {bin_id}")
+
+    for (bin_id, *_), (next_id, *_) in zip(bins, bins[1:]):
+        if not get_price_from_id(bin_id, bin_step) < get_price_from_id(next_id, bin_step):
+            failures.append(f"prices of bins {bin_id} and {next_id} do not increase")
+
+    # Swaps bin by bin against getSwapOut
+    for swap_for_y, amount_in, amount_in_left, amount_out, fee in fixtures["swaps"]:
+        ordered = bins if not swap_for_y else bins[::-1]
+        swap_bins = [
+            (bin_id, x, y) for bin_id, _, x, y, _ in ordered
+            if (bin_id <= active_id if swap_for_y else bin_id >= active_id)
+        ]
+        local = simulate_swap_out(swap_bins, active_id, bin_step, fee_parameters, int(amount_in), swap_for_y, timestamp)
+        if local != (int(amount_in_left), int(amount_out), int(fee)):
+            failures.append(f"swap of {amount_in} (swap_for_y={swap_for_y}): {local} != {(amount_in_left, amount_out, fee)}")
+
+    # Burning every share returns at most the reserves, and a deposit burnt straight back never returns more
+    burnt_x, burnt_y = get_amounts_out_of_bins(
+        [x for *_, x, _, _ in bins], [y for *_, y, _ in bins], [supply for *_, supply in bins], [supply for *_, supply in bins]
+    )
+    for (bin_id, price, x, y, supply), out_x, out_y in zip(bins, burnt_x, burnt_y):
+        if out_x > x or out_y > y:
+            failures.append(f"burning bin {bin_id} returns more than its reserves")
+        if supply == 0:
+            continue
+
+        amount_x = x // 100 if bin_id >= active_id else 0
+        amount_y = y // 100 if bin_id <= active_id else 0
+        try:
+            deposit = mint_bin(x, y, supply, amount_x, amount_y, bin_id, active_id, bin_step, fee_parameters, timestamp)
+        except Exception as e:
+            app_logger.debug(f"Skipping the deposit check of bin {bin_id}: {e}")
+            continue
+
+        back_x, back_y = get_amounts_out_of_bin(
+            x + deposit.amount_x - deposit.protocol_fee_x, y + deposit.amount_y - deposit.protocol_fee_y,
+            deposit.shares, supply + deposit.shares
+        )
+        if get_liquidity(back_x, back_y, price) > get_liquidity(deposit.amount_x, deposit.amount_y, price):
+            failures.append(f"depositing into bin {bin_id} and burning straight back gains value")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or check Liquidity Book math fixtures")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Record a pair's on-chain results, needs RPC_URL")
+    record_parser.add_argument("--pair", required=True, help="LB pair address")
+    record_parser.add_argument("--out", default=LB_FIXTURES, help=f"Fixture file to write (default {LB_FIXTURES})")
+    record_parser.add_argument("--radius", type=int, default=20, help="Bins either side of the active id")
+    record_parser.add_argument("--block", type=int, default=None, help="Block to record at, latest if not set")
+
+    check_parser = commands.add_parser("check", help="Check the local math against a fixture file")
+    check_parser.add_argument("fixtures", nargs="?", default=LB_FIXTURES, help=f"Fixture file written by record (default {LB_FIXTURES})")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == "record":
+        fixtures = record_fixtures(os.environ['RPC_URL'], args.pair, radius=args.radius, block=args.block)
+        with open(args.out, 'w') as f:
+            json.dump(fixtures, f)
+        app_logger.info(f"Recorded {len(fixtures['bins'])} bins and {len(fixtures['swaps'])} swaps at block {fixtures['block']}")
+        return
+
+    if not os.path.exists(args.fixtures):
+        raise Exception(f"No fixture file at {args.fixtures}, record one with: python lb_math.py record --pair 0x... --block N")
+
+    with open(args.fixtures, 'r') as f:
+        fixtures = json.load(f)
+    app_logger.info(f"Checking pair {fixtures['pair']} at block {fixtures['block']}")
+    failures = check_fixtures(fixtures)
+    for failure in failures:
+        app_logger.error(failure)
+    app_logger.info("All fixtures match" if not failures else f"{len(failures)} mismatches")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
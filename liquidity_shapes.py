@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+# Total share of a token across a deposit's bins, the pair's distribution precision (100%)
+DISTRIBUTION_PRECISION = 10**18
+
+SHAPES = ("spot", "curve", "bid_ask")
+
+
+def delta_ids(num_bins: int) -> np.ndarray:
+    """
+    Deposit bins relative to the active id, centred on it
+    Args:
+        num_bins (int): Number of bins, odd numbers give a symmetric range
+    Returns:
+        np.ndarray: Bin offsets, e.g. [-2, -1, 0, 1, 2] for 5 bins
+    """
+    import numpy as np
+
+    if num_bins < 1:
+        raise Exception(f"Number of bins must be at least 1, got {num_bins}")
+    return np.arange(-(num_bins // 2), num_bins - num_bins // 2, dtype=np.int64)
+
+
+def shape_weights(shape: str, deltas: np.ndarray) -> np.ndarray:
+    """
+    Relative liquidity per bin for a shape, before splitting between tokens
+        spot:    same weight in every bin
+        curve:   Gaussian concentrated around the active bin
+        bid_ask: weight growing linearly away from the active bin
+    """
+    import numpy as np
+
+    distance = np.abs(deltas).astype(np.float64)
+
+    if shape == "spot":
+        return np.ones_like(distance)
+    elif shape == "curve":
+        sigma = max(len(deltas) / 4, 1.0)
+        return np.exp(-0.5 * (distance / sigma) ** 2)
+    elif shape == "bid_ask":
+        return 1.0 + distance
+    else:
+        raise Exception(f"Unknown liquidity shape {shape}, expected one of {SHAPES}")
+
+
+def _to_precision(fractions: np.ndarray) -> np.ndarray:
+    """Scale fractions summing to 1 to integer shares summing exactly to DISTRIBUTION_PRECISION"""
+    import numpy as np
+
+    shares = np.floor(fractions * DISTRIBUTION_PRECISION).astype(np.int64)
+    # Float rounding leaves a few wei over or under, settle it on the largest share
+    shares[np.argmax(shares)] += DISTRIBUTION_PRECISION - int(shares.sum())
+    return shares
+
+
+def split_distribution(deltas: np.ndarray, weights: np.ndarray) -> tuple:
+    """
+    Split per-bin weights into token X and token Y distributions.
+
+    Bins below the active id can only hold token Y and bins above it only token X.
+    The active bin holds both, so it takes half its weight on each side.
+
+    Returns:
+        tuple: (distribution_x, distribution_y) integer arrays, each summing to DISTRIBUTION_PRECISION
+    """
+    import numpy as np
+
+    side_x = np.where(deltas > 0, weights, 0.0) + np.where(deltas == 0, weights / 2, 0.0)
+    side_y = np.where(deltas < 0, weights, 0.0) + np.where(deltas == 0, weights / 2, 0.0)
+
+    return _to_precision(side_x / side_x.sum()), _to_precision(side_y / side_y.sum())
+
+
+class LiquidityShape:
+    """
+    Distribution of a deposit across `num_bins` bins around the active id.
+
+    The distribution only depends on the shape and bin count, so it is computed once
+    and reused for every deposit. With one bin every shape is the original single
+    active-bin deposit.
+    """
+
+    def __init__(self, shape="spot", num_bins=1):
+        if shape not in SHAPES:
+            raise Exception(f"Unknown liquidity shape {shape}, expected one of {SHAPES}")
+
+        self.shape = shape
+        self.num_bins = int(num_bins)
+        self.deltas = delta_ids(self.num_bins)
+        self.distribution_x, self.distribution_y = split_distribution(
+            self.deltas,
+            shape_weights(shape, self.deltas)
+        )
+
+    def parameters(self) -> tuple:
+        """
+        Router and executor deposit parameters
+        Returns:
+            tuple: (deltaIds, distributionX, distributionY) as lists of Python ints
+        """
+        return self.deltas.tolist(), self.distribution_x.tolist(), self.distribution_y.tolist()
+
+    def bin_ids(self, active_id: int) -> list:
+        """Absolute bin ids a deposit at the given active id covers"""
+        return (self.deltas + int(active_id)).tolist()
+
+    def describe(self) -> dict:
+        return {"shape": self.shape, "num_bins": self.num_bins}
+
+
+def position_bin_ids(position) -> list:
+    """Bins a stored position covers, positions from before multi-bin shapes only record bin_id"""
+    if position.get("bin_ids"):
+        return [int(bin_id) for bin_id in position["bin_ids"]]
+    return [int(position["bin_id"])]
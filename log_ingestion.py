@@ -0,0 +1,182 @@
+"""
+Bulk event log ingestion into an EventStore.
+
+Block ranges are fetched with eth_getLogs by a bounded pool of worker threads. Each
+range becomes one segment, written as soon as it is decoded. Ranges the RPC rejects
+as too large are split in half and retried, and the chunk size adapts as it goes.
+It halves on a rejection and doubles after ranges that come back well under the
+log target. Transient errors are retried with exponential backoff.
+
+Segments are the checkpoint: a restarted ingestion only fetches the ranges no
+segment covers, so work finished before an interruption is never repeated.
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import logging
+import time
+
+app_logger = logging.getLogger('app_logger')
+
+# Error fragments RPC providers (and Anvil) use when a getLogs range or response is too large
+RANGE_ERRORS = (
+    "query returned more than", "block range", "range too large", "too many", "exceed",
+    "response size", "limit exceeded", "entity too large", "-32005"
+)
+# Error fragments for throttling, retried after a backoff rather than split
+RATE_ERRORS = ("rate limit", "too many requests", "429")
+
+
+class RangeTooLarge(Exception):
+    """Raised when the RPC refuses a getLogs range as too large"""
+
+
+def is_range_error(error) -> bool:
+    message = str(error).lower()
+    if any(fragment in message for fragment in RATE_ERRORS):
+        return False
+    return any(fragment in message for fragment in RANGE_ERRORS)
+
+
+class LogIngestor:
+    """
+    Fetches, decodes and stores the logs of a set of contracts over a block range.
+
+    - chunk_blocks: blocks per getLogs request to start with
+    - max_workers: requests in flight at once
+    - target_logs: ranges returning fewer than a quarter of this grow the chunk size
+    - max_retries / backoff: attempts and initial delay for transient errors
+    """
+
+    def __init__(
+        self,
+        web3,
+        decoder,
+        store,
+        addresses,
+        chunk_blocks=2000,
+        max_workers=4,
+        target_logs=5000,
+        min_chunk_blocks=1,
+        max_chunk_blocks=100000,
+        max_retries=5,
+        backoff=0.5
+    ):
+        self.web3 = web3
+        self.decoder = decoder
+        self.store = store
+        self.addresses = list(addresses)
+        self.chunk_blocks = int(chunk_blocks)
+        self.max_workers = int(max_workers)
+        self.target_logs = int(target_logs)
+        self.min_chunk_blocks = int(min_chunk_blocks)
+        self.max_chunk_blocks = int(max_chunk_blocks)
+        self.max_retries = int(max_retries)
+        self.backoff = float(backoff)
+        self.stats = {"requests": 0, "splits": 0, "retries": 0}
+
+    def fetch(self, start, end) -> list:
+        """
+        Fetch the raw logs of a block range, retrying transient errors
+        Raises:
+            RangeTooLarge: If the RPC rejects the range as too large
+        """
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.stats["requests"] += 1
+                return self.web3.eth.get_logs({
+                    "address": self.addresses,
+                    "fromBlock": start,
+                    "toBlock": end,
+                    "topics": [self.decoder.topics]
+                })
+
+            except Exception as e:
+                if is_range_error(e):
+                    raise RangeTooLarge(f"Blocks {start}-{end}: {e}")
+                if attempt == self.max_retries:
+                    raise
+
+                self.stats["retries"] += 1
+                app_logger.warning(f"getLogs {start}-{end} failed, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def ingest_range(self, start, end) -> int:
+        """Fetch, decode and write one block range as a segment, returns the number of logs"""
+        logs = self.fetch(start, end)
+        rows = self.decoder.decode(logs)
+        # Sampled block times, interpolated in between by the backtest
+        rows["block_times"] = [(block, self.web3.eth.get_block(block).timestamp) for block in sorted({start, end})]
+        self.store.write_segment(start, end, rows)
+        return len(logs)
+
+    def _adapt(self, blocks, logs) -> None:
+        """Grow the chunk size after a range that came back well under the log target"""
+        if blocks >= self.chunk_blocks and logs < self.target_logs // 4:
+            self.chunk_blocks = min(self.chunk_blocks * 2, self.max_chunk_blocks)
+
+    def run(self, from_block, to_block) -> int:
+        """
+        Ingest every block between from_block and to_block not already in the store
+        Returns:
+            int: Number of logs ingested
+        """
+        # Uncovered ranges, carved into chunks as workers free up so each chunk uses the current size
+        remaining = deque(self.store.missing_ranges(from_block, to_block))
+        retry = deque()
+        ingested = 0
+        started = time.perf_counter()
+
+        def next_range():
+            if retry:
+                return retry.popleft()
+            start, last = remaining.popleft()
+            end = min(start + self.chunk_blocks - 1, last)
+            if end < last:
+                remaining.appendleft((end + 1, last))
+            return start, end
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while retry or remaining or running:
+                while (retry or remaining) and len(running) < self.max_workers:
+                    start, end = next_range()
+                    running[pool.submit(self.ingest_range, start, end)] = (start, end)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, end = running.pop(future)
+                    try:
+                        count = future.result()
+
+                    except RangeTooLarge as e:
+                        if end - start + 1 <= self.min_chunk_blocks:
+                            raise Exception(f"getLogs range cannot be split further: {e}")
+
+                        middle = (start + end) // 2
+                        retry.extendleft([(middle + 1, end), (start, middle)])
+                        self.chunk_blocks = max((end - start + 1) // 2, self.min_chunk_blocks)
+                        self.stats["splits"] += 1
+                        app_logger.debug(f"Split {start}-{end}, chunk size now {self.chunk_blocks}")
+                        continue
+
+                    ingested += count
+                    self._adapt(end - start + 1, count)
+                    app_logger.info(f"Ingested blocks {start}-{end}: {count} logs")
+
+                # Checkpoint the unbroken run of ingested blocks
+                self.checkpoint(from_block)
+
+        app_logger.info(
+            f"Ingested {ingested} logs over blocks {from_block}-{to_block} in "
+            f"{time.perf_counter() - started:.1f}s, {self.stats}"
+        )
+        return ingested
+
+    def checkpoint(self, from_block) -> None:
+        """Record in the store's meta the last block every earlier block has been ingested up to"""
+        covered = self.store.covered_to(self.store.meta.get("from_block", from_block))
+        if covered > self.store.meta.get("to_block", -1):
+            self.store.meta["to_block"] = covered
+            self.store.save_meta()
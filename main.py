@@ -1,30 +1,67 @@
 import functions_framework
-from web3 import Web3
 from eth_utils import to_checksum_address
+import asyncio
+import copy
 import json
-from google.cloud import storage
-from google.cloud import scheduler_v1
 from datetime import datetime
+from functools import cached_property
 import os
-import requests
 import logging
+import signal
 import sys
 
+from abi_bundle import load_bundle, load_full_abi
+from active_bin import ActiveBinTracker
+from async_rpc import AsyncMulticallReader, AsyncRPC
+from claims import RewardClaimer
+from confirmations import HeadSubscription, PollingReceiptWaiter, SubscriptionReceiptWaiter
+from concurrent.futures import ThreadPoolExecutor
+from contract_pool import ContractPool
+from daemon import LiquidityDaemon, SwapSubscription
+from gas_oracle import GasOracle
+from lb_math import get_price_from_id, price_to_float
+from liquidity_shapes import LiquidityShape, position_bin_ids
+from metadata import MetadataRegistry
+from multicall import MulticallReader, NativeBalance
+from pairs import PairConfig, load_pair_configs
+from quoter import SwapQuoter
+from rebalance import RebalanceEngine
+from reserve_index import BinReserveIndex
+from routing import RouteFinder
+from state_store import GCSStateStore, LocalStateStore, StateConflict
+from transactions import NonceManager, PendingTransaction, TxExecutor
+from triggers import RebalanceTrigger
+
 # Environment variables
 RPC_URL = os.environ.get('RPC_URL')
+WS_RPC_URL = os.environ.get('WS_RPC_URL')                              # Websocket endpoint for new-heads confirmations and daemon Swap logs
+CHAIN_ID = int(os.environ.get('CHAIN_ID', 146))                         # Sonic mainnet
 
 NATIVE_TOKEN = to_checksum_address('0x039e2fB66102314Ce7b64Ce5Ce3E5183bc94aD38') # Sonic native token (S)
 USDC_TOKEN = to_checksum_address('0x29219dd400f2Bf60E5a23d13Be72B486D4038894') # USDC token address on Sonic
 
-LBP_CA = to_checksum_address(os.environ.get('LBP_CA'))                   # Liquidity book pair contract
+LBP_CA = os.environ.get('LBP_CA')                                        # Liquidity book pair contract (single-pair mode)
 LBROUTER_CA = to_checksum_address(os.environ.get('LBROUTER_CA'))         # Liquidity router contract
-REWARDER_CA  = to_checksum_address(os.environ.get('REWARDER_CA'))        # Pair rewarder contract
+REWARDER_CA  = os.environ.get('REWARDER_CA')                             # Pair rewarder contract (single-pair mode)
+REBALANCE_EXECUTOR_CA = os.environ.get('REBALANCE_EXECUTOR_CA')          # Optional LBRebalanceExecutor for single-transaction rebalances
+PAIRS_CONFIG = os.environ.get('PAIRS_CONFIG')                            # JSON list of pair configs, or a path to one, for multi-pair mode
+PAIR_READ_WORKERS = int(os.environ.get('PAIR_READ_WORKERS', 8))           # Pairs whose cycle state is read concurrently
 
 REWARD_WALLET = to_checksum_address(os.environ.get('REWARD_WALLET'))
 
 PRIVATE_KEY = os.environ.get('PRIVATE_KEY')
 
 REWARD_CONF = float(os.environ.get('REWARD_CONF'))  # 0 = transfer rewards, 1 = trade rewards for USDC
+SWAP_SLIPPAGE_BPS = int(os.environ.get('SWAP_SLIPPAGE_BPS', 50))  # Slippage allowed below the quoted reward trade output
+SWAP_MAX_ROUTES = int(os.environ.get('SWAP_MAX_ROUTES', 3))       # Most routes (swap transactions) a reward trade is split across
+SWAP_SPLIT_SLICES = int(os.environ.get('SWAP_SPLIT_SLICES', 10))  # Pieces the reward amount is allocated across routes in
+SWAP_SPLIT_MIN_GAIN_BPS = int(os.environ.get('SWAP_SPLIT_MIN_GAIN_BPS', 10))  # Extra output a slice needs to open another route
+CLAIM_GAS_MULTIPLE = float(os.environ.get('CLAIM_GAS_MULTIPLE', 10))  # Reward value a claim needs, as a multiple of its gas cost
+CLAIM_EVALUATE_INTERVAL = float(os.environ.get('CLAIM_EVALUATE_INTERVAL', 3600))  # Seconds before a declined claim is evaluated again
+
+GAS_PRIORITY_PERCENTILE = int(os.environ.get('GAS_PRIORITY_PERCENTILE', 50))     # Recent priority fee percentile transactions tip at
+GAS_BASE_FEE_MULTIPLE = float(os.environ.get('GAS_BASE_FEE_MULTIPLE', 2))        # Base fee rise the max fee per gas still covers
+GAS_DEFER_ABOVE_GWEI = os.environ.get('GAS_DEFER_ABOVE_GWEI')                    # Defer reward claims and transfers while gas is above this, unset = never
 
 PROJECT_ID = os.environ.get('PROJECT_ID')
 BUCKET_NAME = os.environ.get('BUCKET_NAME')
@@ -35,9 +72,37 @@ LOWER_LIM = float(os.environ.get('LOWER_LIM'))
 UPPER_LIM = float(os.environ.get('UPPER_LIM'))
 MAX_CHANGE = float(os.environ.get('MAX_CHANGE'))
 
+LIQUIDITY_SHAPE = os.environ.get('LIQUIDITY_SHAPE', 'spot')  # spot, curve or bid_ask distribution across bins
+NUM_BINS = int(os.environ.get('NUM_BINS', 1))                  # Bins per position, centred on the active bin
+
+TRIGGER_DISTANCE_BINS = int(os.environ.get('TRIGGER_DISTANCE_BINS', 1))     # Bins outside the position before rebalancing
+TRIGGER_HYSTERESIS_BINS = int(os.environ.get('TRIGGER_HYSTERESIS_BINS', 0)) # Bins back towards the position before disarming
+TRIGGER_MIN_DWELL = float(os.environ.get('TRIGGER_MIN_DWELL', 0))           # Seconds out of range before rebalancing
+TRIGGER_DRY_RUN = os.environ.get('TRIGGER_DRY_RUN', '0') == '1'             # 1 = log trigger decisions without rebalancing
+
 PUSHOVER_TOKEN = os.environ.get('PUSHOVER_TOKEN')
 PUSHOVER_USER = os.environ.get('PUSHOVER_USER')
 
+METADATA_CACHE_DIR = os.environ.get('METADATA_CACHE_DIR')  # Local metadata cache directory, bucket used if unset
+
+STATE_DIR = os.environ.get('STATE_DIR')                    # Local state directory, bucket used if unset
+STORAGE_CACHE = os.environ.get('STORAGE_CACHE', '1') == '1' # 1 = keep last-read bucket objects in memory on warm instances
+STATE_SAVE_ATTEMPTS = int(os.environ.get('STATE_SAVE_ATTEMPTS', 3))  # Conditional state writes before a concurrently modified document fails the cycle
+
+TX_POLL_INTERVAL = float(os.environ.get('TX_POLL_INTERVAL', 0.2))  # Receipt poll interval (s) until block time is measured
+TX_TIMEOUT = float(os.environ.get('TX_TIMEOUT', 120))               # Receipt wait timeout (s)
+CONFIRM_MODE = os.environ.get('CONFIRM_MODE', 'poll')               # poll = adaptive polling, ws = new-heads subscription
+CONFIRM_DEPTH = int(os.environ.get('CONFIRM_DEPTH', 0))             # Blocks to wait on top of the inclusion block
+
+LAZY_INIT = os.environ.get('LAZY_INIT', '1') == '1'         # 1 = create clients, ABIs and on-chain constants on first use
+
+ASYNC_RPC = os.environ.get('ASYNC_RPC', '0') == '1'                  # 1 = concurrent reads through AsyncWeb3 on a background event loop
+ASYNC_RPC_CONNECTIONS = int(os.environ.get('ASYNC_RPC_CONNECTIONS', 20))  # Pooled HTTP connections for async reads
+
+DAEMON_POLL_INTERVAL = float(os.environ.get('DAEMON_POLL_INTERVAL', 2))  # Daemon active id poll interval (s) without a websocket
+DAEMON_MAX_IDLE = float(os.environ.get('DAEMON_MAX_IDLE', 3600))        # Daemon runs a pair at least this often (s), moved or not
+DAEMON_RETRY_INTERVAL = float(os.environ.get('DAEMON_RETRY_INTERVAL', 60))  # Daemon retries a failed pair cycle after this many seconds
+
 def setup_logging():
     """
     Configure logging for the application
@@ -75,71 +140,289 @@ def setup_logging():
 app_logger, transaction_logger, gas_logger = setup_logging()
 
 class SonicConnection:
-    def __init__(self):
+    # Clients shared by every pair's connection: one provider, account, nonce sequence,
+    # contract pool and read layer per deployment
+    SHARED = (
+        "web3", "async_rpc", "account", "wallet_address", "nonces", "receipts", "gas_oracle", "executor",
+        "contracts", "reader", "quoter", "route_finder"
+    )
+
+    def __init__(self, metadata=None, pair=None):
+        self.chain_id = CHAIN_ID
+        self.metadata = metadata or MetadataRegistry()
+        self.pair = pair
+
+    def for_pair(self, pair):
+        """
+        Connection for another pair that shares this one's clients and metadata cache
+        Args:
+            pair (PairConfig): Pair to manage
+        Returns:
+            SonicConnection: Connection whose pair-specific contracts and constants are its own
+        """
+        connection = SonicConnection(self.metadata, pair)
+        for name in self.SHARED:
+            connection.__dict__[name] = getattr(self, name)
+        return connection
+
+    # Connection, contracts and on-chain constants are created on first use and
+    # cached on the instance, so warm invocations reuse them
+
+    @cached_property
+    def web3(self):
         # Connect to Sonic
-        self.web3 = Web3(Web3.HTTPProvider(RPC_URL))
-        self.lbp_contract = None
-        self.lbrouter_contract = None
-        self.rewarder_contract = None
+        from web3 import Web3
+        from web3.middleware import simple_cache_middleware
+        web3 = Web3(Web3.HTTPProvider(RPC_URL))
+        # Cache immutable responses such as eth_chainId, which web3 otherwise
+        # refetches to validate every eth_call and eth_estimateGas
+        web3.middleware_onion.add(simple_cache_middleware)
+        return web3
+
+    @cached_property
+    def async_rpc(self):
+        # Background event loop and pooled AsyncWeb3 client for concurrent reads, None keeps reads synchronous
+        if not ASYNC_RPC:
+            return None
+        return AsyncRPC(RPC_URL, max_connections=ASYNC_RPC_CONNECTIONS, timeout=TX_TIMEOUT)
 
+    @cached_property
+    def account(self):
         # Load Sonic account
-        self.account = self.web3.eth.account.from_key(PRIVATE_KEY)
-        self.wallet_address = self.account.address
-
-        # Load contract ABIs
-        with open('lbp_contract_abi.json', 'r') as f:
-            self.lbp_abi = json.load(f)
-        with open('lbrouter_contract_abi.json', 'r') as f:
-            self.lbrouter_abi = json.load(f)
-        with open('erc20_contract_abi.json', 'r') as f:
-            self.erc20_contract_abi = json.load(f)
-        with open('rewarder_contract_abi.json', 'r') as f:
-            self.rewarder_abi = json.load(f)
-        
-        # Initialize contracts
-        self.lbp_contract = self.web3.eth.contract(
-            address = LBP_CA,
-            abi = self.lbp_abi
-            )
-        self.lbrouter_contract = self.web3.eth.contract(
-            address = LBROUTER_CA,
-            abi = self.lbrouter_abi
+        return self.web3.eth.account.from_key(PRIVATE_KEY)
+
+    @cached_property
+    def wallet_address(self):
+        return self.account.address
+
+    @cached_property
+    def nonces(self):
+        # Local nonce assignment, reset at the start of each cycle
+        return NonceManager(self.web3, self.wallet_address)
+
+    @cached_property
+    def receipts(self):
+        # Receipt confirmation, by new-heads subscription if configured, adaptive polling otherwise
+        if CONFIRM_MODE == 'ws':
+            if WS_RPC_URL:
+                # Subscribe now so heads are already arriving when the first transaction is sent
+                subscription = HeadSubscription(WS_RPC_URL)
+                subscription.start()
+                return SubscriptionReceiptWaiter(
+                    self.web3,
+                    subscription,
+                    depth = CONFIRM_DEPTH,
+                    timeout = TX_TIMEOUT,
+                    fallback_interval = max(TX_POLL_INTERVAL * 5, 1.0)
+                )
+            app_logger.warning("CONFIRM_MODE is ws but WS_RPC_URL is not set, polling for receipts")
+
+        return PollingReceiptWaiter(
+            self.web3,
+            depth = CONFIRM_DEPTH,
+            timeout = TX_TIMEOUT,
+            poll_interval = TX_POLL_INTERVAL
+        )
+
+    @cached_property
+    def gas_oracle(self):
+        # EIP-1559 fees from the recent fee history, cached per block
+        return GasOracle(
+            self.web3,
+            percentiles = sorted({10, 50, 90, GAS_PRIORITY_PERCENTILE}),
+            priority_percentile = GAS_PRIORITY_PERCENTILE,
+            base_fee_multiple = GAS_BASE_FEE_MULTIPLE,
+            defer_above = int(float(GAS_DEFER_ABOVE_GWEI) * 10**9) if GAS_DEFER_ABOVE_GWEI else None
+        )
+
+    @cached_property
+    def executor(self):
+        # Shared build/estimate/sign/send/confirm path for every write
+        return TxExecutor(self.web3, self.account, self.nonces, self.receipts, self.gas_oracle)
+
+    @cached_property
+    def contracts(self):
+        # Load the compact ABI bundle into the contract pool, with the full ABI files as fallback
+        contracts = ContractPool(self.web3)
+        for abi_name, bundled in load_bundle().items():
+            contracts.register_abi(
+                abi_name,
+                bundled["abi"],
+                selectors = bundled["selectors"],
+                fallback = lambda abi_name=abi_name: load_full_abi(abi_name)
             )
-        self.rewarder_contract = self.web3.eth.contract(
-            address = REWARDER_CA,
-            abi = self.rewarder_abi
+        return contracts
+
+    # Contract properties go through the pool, which loads the full ABI the first time
+    # a function or event missing from the bundled one is looked up
+
+    @property
+    def lbp_contract(self):
+        return self.contracts.get(self.pair.pair, "lbp")
+
+    @property
+    def lbrouter_contract(self):
+        return self.contracts.get(LBROUTER_CA, "lbrouter")
+
+    @property
+    def rewarder_contract(self):
+        return self.contracts.get(self.pair.rewarder, "rewarder")
+
+    @cached_property
+    def shape(self):
+        # Deposit distribution across bins, computed once
+        return LiquidityShape(self.pair.liquidity_shape, self.pair.num_bins)
+
+    @cached_property
+    def trigger(self):
+        # Rebalance trigger policy of the pair
+        return RebalanceTrigger(
+            self.pair.trigger_distance_bins,
+            self.pair.trigger_hysteresis_bins,
+            self.pair.trigger_min_dwell
         )
-        
+
+    @cached_property
+    def rebalancer(self):
+        # Atomic rebalances through the executor contract, None keeps the sequential flow.
+        # The executor is only used once its code matches the committed compiler artifact
+        if not self.pair.executor:
+            return None
+        engine = RebalanceEngine(self, self.pair.executor)
+        return engine if engine.verified() else None
+
+    @cached_property
+    def reader(self):
+        # Batched read layer for view calls, sent through the event loop when async reads are enabled
+        if self.async_rpc:
+            return AsyncMulticallReader(self.web3, RPC_URL, self.async_rpc, contracts=self.contracts)
+        return MulticallReader(self.web3, RPC_URL, contracts=self.contracts)
+
+    @cached_property
+    def quoter(self):
+        # Local swap simulation for reward trades
+        return SwapQuoter(self, LBROUTER_CA)
+
+    @cached_property
+    def route_finder(self):
+        # Path discovery and split orders for reward trades, through S or USDC
+        return RouteFinder(self.quoter, intermediates=(NATIVE_TOKEN, USDC_TOKEN))
+
+    @cached_property
+    def claimer(self):
+        # Batched reward claims across every bin held, gated on gas cost
+        return RewardClaimer(self, NATIVE_TOKEN, CLAIM_GAS_MULTIPLE, CLAIM_EVALUATE_INTERVAL)
+
+    @cached_property
+    def active_bin(self):
+        # Active id and price of the pair followed from its Swap logs, in daemon mode
+        return ActiveBinTracker(self.pair.pair, self.bin_step)
+
+    @cached_property
+    def reserve_index(self):
+        # Reserves of every non-empty bin, loaded once and kept current from the pair's logs
+        return BinReserveIndex(self.web3, self.reader, self.lbp_contract, self.bin_step)
+
+    @cached_property
+    def metro_token_address(self):
         # Get current METRO token address
-        self.metro_token_address = self.web3.to_checksum_address(self.rewarder_contract.functions.getRewardToken().call())
+        return self.web3.to_checksum_address(self.rewarder_contract.functions.getRewardToken().call())
 
+    @cached_property
+    def bin_step(self):
         # Find bin steps
-        self.bin_step = self.lbp_contract.functions.getBinStep().call()
-    
+        return self.get_pair_metadata()["bin_step"]
+
+    def warm_up(self):
+        """Eagerly create every lazily initialised client, contract and constant"""
+        shared = (self.wallet_address, self.lbrouter_contract, self.reader, self.receipts)
+        if self.pair is None:
+            return shared
+        return shared + (self.metro_token_address, self.bin_step)
+
     # Check for successful connection
     def is_connected(self):
         return self.web3.is_connected()
     
+    def get_pair_metadata(self) -> dict:
+        """
+        Get the immutable LBP pair metadata, read on-chain only on a registry miss
+        Returns:
+            dict: {"token_x": str, "token_y": str, "bin_step": int}
+        """
+        cached = self.metadata.get(self.chain_id, self.pair.pair, "token_x", "token_y", "bin_step")
+        if cached:
+            return cached
+
+        result = self.reader.read({
+            "token_x": self.lbp_contract.functions.getTokenX(),
+            "token_y": self.lbp_contract.functions.getTokenY(),
+            "bin_step": self.lbp_contract.functions.getBinStep()
+        })
+        if None in result.values():
+            raise Exception(f"pair metadata read returned no data: {result}")
+
+        self.metadata.update(self.chain_id, self.pair.pair, result)
+        return result
+
+    def get_tokens_metadata(self, token_addresses) -> dict:
+        """
+        Get symbol and decimals for several tokens, batching the reads for registry misses
+        Args:
+            token_addresses (list): Token contract addresses
+        Returns:
+            dict: {token_address: {"symbol": str, "decimals": int}}
+        """
+        tokens = {}
+        calls = {}
+        for token_address in token_addresses:
+            token_address = self.contracts.checksum(token_address)
+            cached = self.metadata.get(self.chain_id, token_address, "symbol", "decimals")
+            if cached:
+                tokens[token_address] = cached
+                continue
+            token_contract = self._erc20(token_address)
+            calls[(token_address, "symbol")] = token_contract.functions.symbol()
+            calls[(token_address, "decimals")] = token_contract.functions.decimals()
+
+        if calls:
+            result = self.reader.read(calls)
+            if None in result.values():
+                raise Exception(f"token metadata read returned no data: {result}")
+
+            for (token_address, field), value in result.items():
+                tokens.setdefault(token_address, {})[field] = value
+            for token_address, values in tokens.items():
+                self.metadata.update(self.chain_id, token_address, values)
+
+        return tokens
+
+    def get_token_metadata(self, token_address) -> dict:
+        """
+        Get symbol and decimals for a token
+        Returns:
+            dict: {"symbol": str, "decimals": int}
+        """
+        return self.get_tokens_metadata([token_address])[self.contracts.checksum(token_address)]
+
     def get_token_addresses(self) -> tuple:
         """Get the token addresses from the LBP contract"""
         try:
-            token_x = self.lbp_contract.functions.getTokenX().call()
-            token_y = self.lbp_contract.functions.getTokenY().call()
-            return token_x, token_y
+            pair = self.get_pair_metadata()
+            return pair["token_x"], pair["token_y"]
 
         except Exception as e:
             app_logger.error(f"Failed to get token addresses: {e}")
             raise Exception(f"Failed to get token addresses: {e}")
 
+    def _erc20(self, token_address):
+        """Get a pooled ERC20 contract instance"""
+        return self.contracts.get(token_address, "erc20")
+
     def get_token_decimals(self, token_address):
         """Get the token decimals from the LBP contract"""
         try:
-            token_contract = self.web3.eth.contract(
-                address = self.web3.to_checksum_address(token_address),
-                abi = self.erc20_contract_abi
-            )
-            decimals = token_contract.functions.decimals().call()
-            return decimals
+            return self.get_token_metadata(token_address)["decimals"]
 
         except Exception as e:
             app_logger.error(f"Failed to get token decimals: {e}")
@@ -154,12 +437,7 @@ class SonicConnection:
             str: The symbol of the token
         """
         try:
-            token_contract = self.web3.eth.contract(
-                address = self.web3.to_checksum_address(token_address),
-                abi = self.erc20_contract_abi
-            )
-            symbol = token_contract.functions.symbol().call()
-            return symbol
+            return self.get_token_metadata(token_address)["symbol"]
 
         except Exception as e:
             app_logger.error(f"Failed to get token symbol: {e}")
@@ -173,9 +451,8 @@ class SonicConnection:
         """
         try:
             token_x, token_y = self.get_token_addresses()
-            symbol_x = self.get_token_symbol(token_x)
-            symbol_y = self.get_token_symbol(token_y)
-            return symbol_x, symbol_y
+            tokens = self.get_tokens_metadata([token_x, token_y])
+            return tokens[token_x]["symbol"], tokens[token_y]["symbol"]
         except Exception as e:
             app_logger.error(f"Failed to get pair symbols: {e}")
             return "UNKNOWN", "UNKNOWN"
@@ -198,15 +475,11 @@ class SonicConnection:
             tuple: (symbol, decimals, balance_wei, balance)
         """
         try:
-            # Create token contract instance
-            token_contract = self.web3.eth.contract(
-                address = self.web3.to_checksum_address(token_address),
-                abi = self.erc20_contract_abi
-            )
+            token = self.get_token_metadata(token_address)
+            symbol = token["symbol"]
+            decimals = token["decimals"]
 
-            symbol = token_contract.functions.symbol().call()
-            decimals = token_contract.functions.decimals().call()
-            balance_wei = token_contract.functions.balanceOf(self.wallet_address).call()
+            balance_wei = self._erc20(token_address).functions.balanceOf(self.wallet_address).call()
             balance = balance_wei / (10 ** decimals)
 
             return symbol, decimals, balance_wei, balance
@@ -243,41 +516,156 @@ class SonicConnection:
                 "token_x": str,
                 "token_y": str
         """
-        token_x, token_y = self.get_token_addresses()
-        decimals_x = self.get_token_decimals(token_x)
-        decimals_y = self.get_token_decimals(token_y)
-
-        active_id = self.lbp_contract.functions.getActiveId().call()
-        raw_price = self.lbp_contract.functions.getPriceFromId(active_id).call()
-        price = (raw_price / (2**128)) * (10**(decimals_x - decimals_y))
+        snapshot = self.get_cycle_snapshot()
         return{
-            "price": price,
-            "token_x": token_x,
-            "token_y": token_y
+            "price": snapshot["price"],
+            "token_x": snapshot["token_x"],
+            "token_y": snapshot["token_y"]
         }
-    
-    def gas_optimizer(self, transaction, gas_fallback, buffer_factor=1.1):
+
+    def get_bin_reserves(self, low_id, high_id) -> list:
+        """
+        Get the reserves of the pair's non-empty bins in an id range, from the reserve index
+        brought up to the latest block
+        Args:
+            low_id (int): Lowest bin id
+            high_id (int): Highest bin id
+        Returns:
+            list: (bin_id, reserve_x, reserve_y) tuples in id order
         """
-        Estimate and optimize gas for a transaction and add a safety buffer
+        self.reserve_index.refresh()
+        return self.reserve_index.bins(low_id, high_id)
 
+    def get_cycle_snapshot(self, bin_ids=None, holder=None, spender=LBROUTER_CA) -> dict:
+        """
+        Read the on-chain state used by a liquidity management cycle in one round trip
         Args:
-            transaction: The built transaction dictionary
-            buffer_factor: Safety factor to multiply the gas estimate by (default 1.1)
+            bin_ids (list): Position bins to include LB token balances and pending rewards for
+            holder (str): Address holding the position, defaults to the wallet
+            spender (str): Address whose token allowances are read, defaults to the router
+        Returns:
+            dict: {
+                "active_id": int,
+                "raw_price": int,
+                "price": float,
+                "token_x": str, "token_y": str,
+                "symbol_x": str, "decimals_x": int, "balance_x_wei": int, "balance_x": float, "allowance_x": int,
+                "symbol_y": str, "decimals_y": int, "balance_y_wei": int, "balance_y": float, "allowance_y": int,
+                "native_balance_wei": int,
+                "bin_balances": {bin_id: int},
+                "pending_rewards_wei": int
+            }
+        """
+        if self.async_rpc:
+            return self.async_rpc.run(self.get_cycle_snapshot_async(bin_ids, holder, spender))
+
+        bin_ids, token_x, token_y, tokens, calls = self._snapshot_calls(bin_ids, holder, spender)
+
+        state = self.reader.read(calls)
+        if None in state.values():
+            raise Exception(f"Failed to read pair state: {state}")
+
+        return self._snapshot(bin_ids, token_x, token_y, tokens, state)
+
+    async def get_cycle_snapshot_async(self, bin_ids=None, holder=None, spender=LBROUTER_CA) -> dict:
+        """
+        get_cycle_snapshot with the state batch, fee history and pending nonce read concurrently.
+        The fees and nonce seed the executor, so the cycle's first transaction needs no extra reads.
+        """
+        # Metadata misses are read through the sync wrapper, so build the calls off the loop
+        bin_ids, token_x, token_y, tokens, calls = await asyncio.to_thread(self._snapshot_calls, bin_ids, holder, spender)
+
+        state, fee_history, nonce = await asyncio.gather(
+            self.reader.read_async(calls),
+            self.async_rpc.fee_history(self.gas_oracle.request_blocks(), self.gas_oracle.percentiles),
+            self.async_rpc.nonce(self.wallet_address)
+        )
+        if None in state.values():
+            raise Exception(f"Failed to read pair state: {state}")
+        self.executor.prime(fee_history, nonce)
+
+        return self._snapshot(bin_ids, token_x, token_y, tokens, state)
+
+    def tracked_active_bin(self):
+        """
+        Active bin tracker holding a current active id, which only the daemon keeps in sync
+        Returns:
+            ActiveBinTracker: The pair's tracker, None outside daemon mode or while it needs a resync
+        """
+        # Read through __dict__ so a one-shot invocation never creates the tracker
+        tracker = self.__dict__.get("active_bin")
+        return tracker if tracker is not None and not tracker.stale else None
 
+    def _snapshot_calls(self, bin_ids, holder, spender) -> tuple:
+        """
+        Batched calls for a cycle snapshot
         Returns:
-            int: Estimated gas with buffer applied
+            tuple: (bin_ids, token_x, token_y, {token: metadata}, {key: call})
         """
-        try:
-            # Get base estimate from network
-            gas_estimated = self.web3.eth.estimate_gas(transaction)
-            # Apply buffer
-            gas_optimized = int(gas_estimated * buffer_factor)
-            return gas_optimized
+        bin_ids = [int(bin_id) for bin_id in (bin_ids or [])]
+        holder = holder or self.wallet_address
 
-        except Exception as e:
-            app_logger.error(f"Gas estimation failed: {e}")
-            return gas_fallback
+        # Immutable pair and token metadata comes from the registry
+        token_x, token_y = self.get_token_addresses()
+        tokens = self.get_tokens_metadata([token_x, token_y])
+
+        # Active bin, unless the daemon's Swap log tracker already holds it, plus wallet and position state
+        calls = {"native_balance_wei": NativeBalance(self.wallet_address)}
+        if self.tracked_active_bin() is None:
+            calls["active_id"] = self.lbp_contract.functions.getActiveId()
+        for suffix, token in (("x", token_x), ("y", token_y)):
+            token_contract = self._erc20(token)
+            calls[f"balance_{suffix}_wei"] = token_contract.functions.balanceOf(self.wallet_address)
+            calls[f"allowance_{suffix}"] = token_contract.functions.allowance(self.wallet_address, spender)
+        if bin_ids:
+            calls["bin_balances"] = self.lbp_contract.functions.balanceOfBatch(
+                [holder] * len(bin_ids),
+                bin_ids
+            )
+            calls["pending_rewards_wei"] = self.rewarder_contract.functions.getPendingRewards(
+                holder,
+                bin_ids
+            )
+
+        return bin_ids, token_x, token_y, tokens, calls
+
+    def _snapshot(self, bin_ids, token_x, token_y, tokens, state) -> dict:
+        """Assemble a cycle snapshot from its batched reads"""
+        tracker = self.tracked_active_bin()
+        if "active_id" in state or tracker is None:
+            active_id = state["active_id"]
+            # The active bin's price follows from its id and the bin step, no getPriceFromId call needed
+            raw_price = get_price_from_id(active_id, self.bin_step)
+        else:
+            active_id = tracker.active_id
+            raw_price = tracker.raw_price
 
+        decimals_x = tokens[token_x]["decimals"]
+        decimals_y = tokens[token_y]["decimals"]
+
+        snapshot = {
+            "active_id": active_id,
+            "raw_price": raw_price,
+            "price": price_to_float(raw_price, decimals_x, decimals_y),
+            "token_x": token_x,
+            "token_y": token_y,
+            "symbol_x": tokens[token_x]["symbol"],
+            "symbol_y": tokens[token_y]["symbol"],
+            "decimals_x": decimals_x,
+            "decimals_y": decimals_y,
+            "balance_x_wei": state["balance_x_wei"],
+            "balance_y_wei": state["balance_y_wei"],
+            "balance_x": state["balance_x_wei"] / (10 ** decimals_x),
+            "balance_y": state["balance_y_wei"] / (10 ** decimals_y),
+            "allowance_x": state["allowance_x"],
+            "allowance_y": state["allowance_y"],
+            "native_balance_wei": state["native_balance_wei"],
+            "bin_balances": dict(zip(bin_ids, state.get("bin_balances", []))),
+            "pending_rewards_wei": state.get("pending_rewards_wei", 0)
+        }
+
+        return snapshot
+    
     def check_token_approval(self, token_address: str, spender_address: str) -> bool:
         """
         Check token approval status
@@ -288,94 +676,81 @@ class SonicConnection:
             bool: True if the token is approved, False otherwise
         """
         try:
-            token_contract = self.web3.eth.contract(
-                    address = self.web3.to_checksum_address(token_address),
-                    abi = self.erc20_contract_abi
-                )
-            
-            symbol = token_contract.functions.symbol().call()
-            decimals = token_contract.functions.decimals().call()
-            allowance = token_contract.functions.allowance(self.wallet_address, spender_address).call()
-            allowance_readable = allowance / (10**decimals)
-
-            allowance_sufficient = allowance > (10**decimals * 1000000)
+            decimals = self.get_token_decimals(token_address)
+            allowance = self._erc20(token_address).functions.allowance(self.wallet_address, spender_address).call()
 
-            return allowance_sufficient
+            return self.allowance_sufficient(allowance, decimals)
         
         except Exception as e:
             app_logger.error(f"Failed to check token approval: {e}")
             return False
 
-    def approve_token(self, token_address: str, spender_address: str) -> bool:
+    def allowance_sufficient(self, allowance: int, decimals: int) -> bool:
+        """Check whether an allowance covers the bot's spending without re-approval"""
+        return allowance > (10**decimals * 1000000)
+
+    def approve_token(self, token_address: str, spender_address: str, wait: bool = True):
         """
         Approve token spending
         Args:
             token_address: Address of the token to approve
             spender_address: Address of the contract to approve spending for
+            wait: Wait for the receipt, otherwise return the PendingTransaction for confirm_all
         Returns:
             bool: True if approval successful, False otherwise
         """
         try:
-            token_contract = self.web3.eth.contract(
-                address = self.web3.to_checksum_address(token_address),
-                abi = self.erc20_contract_abi
-            )
+            token_contract = self._erc20(token_address)
 
-            symbol = token_contract.functions.symbol().call()
+            symbol = self.get_token_symbol(token_address)
 
             # Max uint256 value (2^256 -1)
             max_amount = (2**256) - 1
 
-            # Build approval transaction
-            approve_tx = token_contract.functions.approve(
-                spender_address, max_amount
-            ).build_transaction(
-                {
-                    'from': self.wallet_address,
-                    'gasPrice': self.web3.eth.gas_price,
-                    'nonce': self.web3.eth.get_transaction_count(self.wallet_address)
-                }
+            # Send approval transaction
+            pending = self.executor.send(
+                token_contract.functions.approve(spender_address, max_amount),
+                tx_type="TOKEN_APPROVAL",
+                details={
+                    "token": symbol,
+                    "spender": spender_address
+                },
+                failure_message=f"Failed to approve {symbol}"
             )
 
-            # Estimate and optimize gas
-            optimized_gas = self.gas_optimizer(approve_tx, 100000)
-
-            # Add gas to transaction
-            approve_tx['gas'] = optimized_gas
-
-            # Sign and send transaction
-            signed_tx = self.web3.eth.account.sign_transaction(
-                approve_tx, self.account._private_key
-            )
-            
-            # Transaction hash
-            tx_hash = self.web3.eth.send_raw_transaction(
-                signed_tx.rawTransaction
-            )
+            if not wait:
+                return pending
 
             # Wait for the transaction receipt
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
-
-            if receipt.status == 1:
-                self.log_transaction(
-                    tx_type="TOKEN_APPROVAL",
-                    receipt=receipt,
-                    gas_estimated=optimized_gas,
-                    details={
-                        "token": symbol,
-                        "spender": spender_address
-                    }
-                )
-                return True
-            
-            else:
-                app_logger.error(f"Failed to approve {symbol}")
-                return False
+            return self.confirm(pending)
             
         except Exception as e:
             app_logger.error(f"Failed to approve token: {e}")
             return False
 
+    def confirm(self, pending) -> bool:
+        """
+        Wait for a sent transaction's receipt and log it
+        Args:
+            pending (PendingTransaction): Transaction returned by a write method called with wait=False
+        Returns:
+            bool: True if the transaction succeeded, False otherwise
+        """
+        return self.executor.confirm(pending)
+
+    def confirm_all(self, pendings) -> list:
+        """
+        Wait for the receipts of transactions that were sent back-to-back
+        Args:
+            pendings (list): PendingTransactions, entries that are not pending are passed through
+        Returns:
+            list: bool result for each entry
+        """
+        return [
+            self.confirm(pending) if isinstance(pending, PendingTransaction) else bool(pending)
+            for pending in pendings
+        ]
+
     def add_liquidity(self):
         """
         Add liquidity to the contract
@@ -383,20 +758,22 @@ class SonicConnection:
             dict: Details of the new position if successful, False otherwise
         """
         try:
-            # Get active ID
-            active_id = self.lbp_contract.functions.getActiveId().call()
-
-            # Get token addresses
-            token_x, token_y = self.get_token_addresses()
-            symbol_x, decimals_x, balance_x_wei, balance_x = self.get_token_balance(token_x)
-            symbol_y, decimals_y, balance_y_wei, balance_y = self.get_token_balance(token_y)
-
-            # Approve token spending if required
-            if not self.check_token_approval(token_x, LBROUTER_CA):
-                token_x_approved = self.approve_token(token_x, LBROUTER_CA)
+            # Read active ID, token balances and allowances in one batch
+            snapshot = self.get_cycle_snapshot()
+            active_id = snapshot["active_id"]
+            token_x, token_y = snapshot["token_x"], snapshot["token_y"]
+            symbol_x, decimals_x, balance_x = snapshot["symbol_x"], snapshot["decimals_x"], snapshot["balance_x"]
+            symbol_y, decimals_y, balance_y = snapshot["symbol_y"], snapshot["decimals_y"], snapshot["balance_y"]
+
+            # Approve token spending if required, sending both approvals before waiting
+            approvals = []
+            if not self.allowance_sufficient(snapshot["allowance_x"], decimals_x):
+                approvals.append(self.approve_token(token_x, LBROUTER_CA, wait=False))
             
-            if not self.check_token_approval(token_y, LBROUTER_CA):
-                token_y_approved = self.approve_token(token_y, LBROUTER_CA)
+            if not self.allowance_sufficient(snapshot["allowance_y"], decimals_y):
+                approvals.append(self.approve_token(token_y, LBROUTER_CA, wait=False))
+
+            self.confirm_all(approvals)
 
             def position_amount(symbol, balance):
                 if balance == 0:
@@ -417,6 +794,9 @@ class SonicConnection:
             if amount_x == 0 or amount_y == 0:
                 return
 
+            delta_ids, distribution_x, distribution_y = self.shape.parameters()
+            bin_ids = self.shape.bin_ids(active_id)
+
             # Prepare liquidity parameters
             add_params = (
                 token_x,                # tokenX
@@ -428,66 +808,41 @@ class SonicConnection:
                 0,                      # amountYMin
                 active_id,              # activeIdDesired
                 10,                     # idSlippage
-                [0],                    # deltaIds
-                [1000000000000000000],  # distributionX
-                [1000000000000000000],  # distributionY
+                delta_ids,              # deltaIds
+                distribution_x,         # distributionX
+                distribution_y,         # distributionY
                 self.wallet_address,    # to
                 self.wallet_address,    # refundTo
                 int(datetime.now().timestamp()) + 3600  # deadline
             )
 
-            # Build transaction
-            add_tx = self.lbrouter_contract.functions.addLiquidity(
-                add_params
-            ).build_transaction(
-                {
-                    'from': self.wallet_address,
-                    'gasPrice': self.web3.eth.gas_price,
-                    'nonce': self.web3.eth.get_transaction_count(self.wallet_address),
-                }
-            )
-
-            # Estimate and optimize gas
-            optimized_gas = self.gas_optimizer(add_tx, 500000, buffer_factor=1.2)
-
-            # Add gas to transaction
-            add_tx['gas'] = optimized_gas
-
-            # Sign and send transaction
-            signed_tx = self.web3.eth.account.sign_transaction(
-                add_tx, self.account._private_key
-            )
-
-            tx_hash = self.web3.eth.send_raw_transaction(
-                signed_tx.rawTransaction
+            # Send transaction and wait for receipt
+            added = self.executor.execute(
+                self.lbrouter_contract.functions.addLiquidity(add_params),
+                tx_type="ADD_LIQUIDITY",
+                details={
+                    "bin_id": active_id,
+                    **self.shape.describe(),
+                    "amount_x": f"{amount_x:.4f} {symbol_x}",
+                    "amount_y": f"{amount_y:.4f} {symbol_y}"
+                },
+                failure_message="Add liquidity transaction failed"
             )
 
-            # Wait for transaction receipt
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
-
-            if receipt.status == 1:
+            if added:
                 new_position = {
                     "bin_id": active_id,
+                    "bin_ids": bin_ids,
+                    **self.shape.describe(),
                     "token_x": token_x,
                     "token_y": token_y,
                     "size_x": amount_x,
                     "size_y": amount_y,
                     "to_address": self.wallet_address
                 }
-                self.log_transaction(
-                    tx_type="ADD_LIQUIDITY",
-                    receipt=receipt,
-                    gas_estimated=optimized_gas,
-                    details={
-                        "bin_id": active_id,
-                        "amount_x": f"{amount_x:.4f} {symbol_x}",
-                        "amount_y": f"{amount_y:.4f} {symbol_y}"
-                    }
-                )
                 return new_position
             
             else:
-                transaction_logger.error("Add liquidity transaction failed")
                 return False
 
         except Exception as e:
@@ -502,17 +857,18 @@ class SonicConnection:
         Returns:
             bool: True if liquidity was successfully withdrawn, False otherwise
         """
-        try:
-            token_x, token_y = self.get_token_addresses()
-            bin_id = int(position["bin_id"])
+        # The wallet cannot burn a position the executor holds, it has to be withdrawn through the executor
+        if position.get("holder") and not (self.rebalancer and self.rebalancer.holds(position)):
+            raise Exception(f"Position is held by the rebalance executor at {position['holder']}, which is not in use")
 
-            # Get previous bin amount
-            amount = self.lbp_contract.functions.balanceOf(
-                self.wallet_address,
-                bin_id
-            ).call()
+        try:
+            # Get token addresses and the position's bin amounts, skipping emptied bins
+            snapshot = self.get_cycle_snapshot(bin_ids=position_bin_ids(position))
+            token_x, token_y = snapshot["token_x"], snapshot["token_y"]
+            bin_ids = [bin_id for bin_id, amount in snapshot["bin_balances"].items() if amount > 0]
+            amounts = [snapshot["bin_balances"][bin_id] for bin_id in bin_ids]
 
-            if amount == 0:
+            if not bin_ids:
                 return True
 
             # Prepare liquidity parameters
@@ -522,124 +878,69 @@ class SonicConnection:
                 self.bin_step,
                 0,  # amountXMin
                 0,  # amountYMin
-                [bin_id],  # ids array
-                [amount],  # amounts array
+                bin_ids,  # ids array
+                amounts,  # amounts array
                 self.wallet_address,
                 int(datetime.now().timestamp()) + 3600
             )
 
-            # Build transaction
-            remove_tx = self.lbrouter_contract.functions.removeLiquidity(
-                *remove_params
-            ).build_transaction(
-                {
-                    'from': self.wallet_address,
-                    'gasPrice': self.web3.eth.gas_price,
-                    'nonce': self.web3.eth.get_transaction_count(self.wallet_address),
-                }
+            # Send transaction and wait for receipt
+            return self.executor.execute(
+                self.lbrouter_contract.functions.removeLiquidity(*remove_params),
+                tx_type="REMOVE_LIQUIDITY",
+                details={
+                    "bin_ids": bin_ids,
+                    "amount": sum(amounts)
+                },
+                failure_message="Remove liquidity transaction failed"
             )
-
-            # Estimate and optimize gas
-            optimized_gas = self.gas_optimizer(remove_tx, 500000, buffer_factor=1.2)
-
-            # Add gas to transaction
-            remove_tx['gas'] = optimized_gas
-
-            # Sign and send transaction
-            signed_tx = self.web3.eth.account.sign_transaction(
-                remove_tx, self.account._private_key
-            )
-
-            tx_hash = self.web3.eth.send_raw_transaction(
-                signed_tx.rawTransaction
-            )
-
-            # Wait for transaction receipt
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
-
-            if receipt.status == 1:
-                self.log_transaction(
-                    tx_type="REMOVE_LIQUIDITY",
-                    receipt=receipt,
-                    gas_estimated=optimized_gas,
-                    details={
-                        "bin_id": bin_id,
-                        "amount": amount
-                    }
-                )
-                return True
-            
-            else:
-                transaction_logger.error("Remove liquidity transaction failed")
-                return False
         
         except Exception as e:
             transaction_logger.error(f"Failed to remove liquidity: {e}")
             return False
         
-    def claim_rewards(self, position):
+    def claim_rewards(self, position, wait: bool = True):
         """
-        Claim any pending rewards for the specified bin
+        Claim any pending rewards for the position's bins
         Args:
             position: Dictionary containing position details
+            wait: Wait for the receipt, otherwise return the PendingTransaction for confirm_all
         Returns:
             bool: True if rewards were successfully claimed, False otherwise
         """
+        # Positions held by the rebalance executor can only be claimed through it
+        if self.rebalancer and self.rebalancer.holds(position):
+            return self.rebalancer.claim(position, wait)
+
         try:
-            bin_id = int(position["bin_id"])
+            bin_ids = position_bin_ids(position)
 
             symbol = self.get_token_symbol(self.metro_token_address)
 
             pending_rewards_wei = self.rewarder_contract.functions.getPendingRewards(
                 self.wallet_address,
-                [bin_id]
+                bin_ids
             ).call()
 
             pending_rewards = pending_rewards_wei / (10 ** 18)
 
             if pending_rewards > 0:
-                claim_tx = self.rewarder_contract.functions.claim(
-                    self.wallet_address,
-                    [bin_id]
-                ).build_transaction({
-                    'from': self.wallet_address,
-                    'gasPrice': self.web3.eth.gas_price,
-                    'nonce': self.web3.eth.get_transaction_count(self.wallet_address),
-                })
-
-                # Estimate and optimize gas
-                optimized_gas = self.gas_optimizer(claim_tx, 250000, buffer_factor=1.5)
-
-                # Add gas to transaction
-                claim_tx['gas'] = optimized_gas
-
-                 # Sign and send transaction
-                signed_tx = self.web3.eth.account.sign_transaction(
-                    claim_tx, self.account._private_key
+                # Send claim transaction
+                pending = self.executor.send(
+                    self.rewarder_contract.functions.claim(self.wallet_address, bin_ids),
+                    tx_type="CLAIM_REWARDS",
+                    details={
+                        "bin_ids": bin_ids,
+                        "amount": f"{pending_rewards:.4f} {symbol}"
+                    },
+                    failure_message="Failed to claim rewards"
                 )
 
-                tx_hash = self.web3.eth.send_raw_transaction(
-                    signed_tx.rawTransaction
-                )
+                if not wait:
+                    return pending
 
                 # Wait for transaction receipt
-                receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
-
-                if receipt.status == 1:
-                    self.log_transaction(
-                        tx_type="CLAIM_REWARDS",
-                        receipt=receipt,
-                        gas_estimated=optimized_gas,
-                        details={
-                            "bin_id": bin_id,
-                            "amount": f"{pending_rewards:.4f} {symbol}"
-                        }
-                    )
-                    return True
-                
-                else:
-                    transaction_logger.error("Failed to claim rewards")
-                    return False
+                return self.confirm(pending)
             else:
                 transaction_logger.info("No rewards to claim")
                 return False
@@ -656,10 +957,7 @@ class SonicConnection:
         """
         try:
             # Instantiate metro contract
-            metro_contract = self.web3.eth.contract(
-                address = self.web3.to_checksum_address(self.metro_token_address),
-                abi = self.erc20_contract_abi
-            )
+            metro_contract = self._erc20(self.metro_token_address)
 
             # Check current metro balance
             symbol, decimals, balance_wei, balance = self.get_token_balance(self.metro_token_address)
@@ -668,50 +966,16 @@ class SonicConnection:
                 app_logger.info(f"No {symbol} tokens to send")
                 return False
             
-            transfer_tx = metro_contract.functions.transfer(
-                REWARD_WALLET,
-                balance_wei
-            ).build_transaction(
-                {
-                    'from': self.wallet_address,
-                    'gasPrice': self.web3.eth.gas_price,
-                    'nonce': self.web3.eth.get_transaction_count(self.wallet_address),
-                }
-            )
-
-            # Estimate and optimize gas
-            optimized_gas = self.gas_optimizer(transfer_tx, 500000)
-
-            # Add gas to transaction
-            transfer_tx['gas'] = optimized_gas
-
-            # Sign and send transaction
-            signed_tx = self.web3.eth.account.sign_transaction(
-                transfer_tx, self.account._private_key
-            )
-
-            tx_hash = self.web3.eth.send_raw_transaction(
-                signed_tx.rawTransaction
+            # Send transaction and wait for receipt
+            return self.executor.execute(
+                metro_contract.functions.transfer(REWARD_WALLET, balance_wei),
+                tx_type="TRANSFER_REWARDS",
+                details={
+                    "amount": f"{balance:.4f} {symbol}",
+                    "to_address": REWARD_WALLET
+                },
+                failure_message="Failed to transfer rewards"
             )
-
-            # Wait for transaction receipt
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
-
-            if receipt.status == 1:
-                self.log_transaction(
-                    tx_type="TRANSFER_REWARDS",
-                    receipt=receipt,
-                    gas_estimated=optimized_gas,
-                    details={
-                        "amount": f"{balance:.4f} {symbol}",
-                        "to_address": REWARD_WALLET
-                    }
-                )
-                return True
-            
-            else:
-                transaction_logger.error("Failed to transfer rewards")
-                return False
             
         except Exception as e:
             transaction_logger.error(f"Failed to transfer rewards: {e}")
@@ -728,10 +992,7 @@ class SonicConnection:
         """
         try:
             # Instantiate token contract
-            token_contract = self.web3.eth.contract(
-                address = self.web3.to_checksum_address(token_address),
-                abi = self.erc20_contract_abi
-            )
+            token_contract = self._erc20(token_address)
 
             # Check current token balance
             symbol, decimals, balance_wei, balance = self.get_token_balance(token_address)
@@ -742,50 +1003,16 @@ class SonicConnection:
 
             amount_wei = int(amount * (10 ** decimals))
             
-            transfer_tx = token_contract.functions.transfer(
-                REWARD_WALLET,
-                amount_wei
-            ).build_transaction(
-                {
-                    'from': self.wallet_address,
-                    'gasPrice': self.web3.eth.gas_price,
-                    'nonce': self.web3.eth.get_transaction_count(self.wallet_address),
-                }
-            )
-
-            # Estimate and optimize gas
-            optimized_gas = self.gas_optimizer(transfer_tx, 500000)
-
-            # Add gas to transaction
-            transfer_tx['gas'] = optimized_gas
-
-            # Sign and send transaction
-            signed_tx = self.web3.eth.account.sign_transaction(
-                transfer_tx, self.account._private_key
-            )
-
-            tx_hash = self.web3.eth.send_raw_transaction(
-                signed_tx.rawTransaction
+            # Send transaction and wait for receipt
+            return self.executor.execute(
+                token_contract.functions.transfer(REWARD_WALLET, amount_wei),
+                tx_type="TRANSFER_TOKENS",
+                details={
+                    "amount": f"{amount:.4f} {symbol}",
+                    "to_address": REWARD_WALLET
+                },
+                failure_message=f"Failed to transfer {symbol} tokens"
             )
-
-            # Wait for transaction receipt
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
-
-            if receipt.status == 1:
-                self.log_transaction(
-                    tx_type="TRANSFER_TOKENS",
-                    receipt=receipt,
-                    gas_estimated=optimized_gas,
-                    details={
-                        "amount": f"{amount:.4f} {symbol}",
-                        "to_address": REWARD_WALLET
-                    }
-                )
-                return True
-            
-            else:
-                transaction_logger.error(f"Failed to transfer {symbol} tokens")
-                return False
             
         except Exception as e:
             transaction_logger.error(f"Failed to transfer tokens: {e}")
@@ -799,12 +1026,14 @@ class SonicConnection:
             float: Amount of USDC received from trade (0 if trade failed or traded to S)
         """
 
+        symbol_x = symbol_y = "UNKNOWN"
+
         try:
             # Get input token details
             token_x = self.metro_token_address
             symbol_x, decimals_x, balance_x_wei, balance_x = self.get_token_balance(token_x)
             amount_in_x_wei = balance_x_wei   # Trade all available METRO
-            
+
             # Check that there is something to trade
             if amount_in_x_wei == 0:
                 app_logger.info("No METRO tokens to trade")
@@ -820,153 +1049,162 @@ class SonicConnection:
             # Set trade parameters based on gas balance, if balance is low then trade to S first
             if balance_s > 5:
                 token_y = USDC_TOKEN
-                symbol_y, decimals_y, balance_y_wei, balance_y = self.get_token_balance(token_y)
+                symbol_y, decimals_y = self.get_token_symbol(token_y), self.get_token_decimals(token_y)
 
                 amount_in_x_wei = balance_x_wei
-                trade_function = self.lbrouter_contract.functions.swapExactTokensForTokens    
-                path = (
-                    [0, 4],                             # Bin steps for each hop    [METRO->S, S->USDC]
-                    [0, 2],                             # Versions for each hop     [METRO->S, S->USDC]
-                    [token_x, NATIVE_TOKEN, token_y]    # Token path (2 hops)
-                )
-                
+                trade_function = self.lbrouter_contract.functions.swapExactTokensForTokens
+
             else:
                 token_y = NATIVE_TOKEN
-                symbol_y, decimals_y, balance_y_wei, balance_y = self.get_native_balance()
+                symbol_y, decimals_y = symbol_s, decimals_s
 
                 amount_in_x_wei = min(balance_x_wei, 50 * (10 ** decimals_x))  # Trade enough METRO to get 5 S
                 trade_function = self.lbrouter_contract.functions.swapExactTokensForNATIVE
-                path = (
-                    [0],                                # Bin steps for each hop    [METRO->USDC]
-                    [0],                                # Versions for each hop     [METRO->USDC]
-                    [token_x, token_y]                  # Token path (1 hop)
-                )
-            
-            # Set minimum output amount
-            amount_min_y_wei = 1  ### This can be optimised later with slippage control and output simulation using the lbp contract getLBPairInformation information
-
-            trade_params = (
-                    amount_in_x_wei,                        # Amount token x in
-                    amount_min_y_wei,                       # Amount token y out min
-                    path,                                   # Path
-                    self.wallet_address,                    # To address must be payable so requires checksum
-                    int(datetime.now().timestamp()) + 3600  # Deadline
-            )
-
-            trade_tx = trade_function(
-                *trade_params
-            ).build_transaction(
-                {
-                    'from': self.wallet_address,
-                    'gasPrice': self.web3.eth.gas_price,
-                    'nonce': self.web3.eth.get_transaction_count(self.wallet_address),
-                }
-            )
-
-            # Estimate and optimize gas
-            optimized_gas = self.gas_optimizer(trade_tx, 500000)
-
-            # Add gas to transaction
-            trade_tx['gas'] = optimized_gas
 
-            # Sign and send transaction
-            signed_tx = self.web3.eth.account.sign_transaction(
-                trade_tx, self.account._private_key
+            # Quote every path locally and split the amount across the routes that give the most output
+            plan = self.route_finder.best_split(
+                token_x, token_y, amount_in_x_wei,
+                slices=SWAP_SPLIT_SLICES, max_routes=SWAP_MAX_ROUTES, min_gain_bps=SWAP_SPLIT_MIN_GAIN_BPS
             )
+            if plan is None:
+                app_logger.error(f"No route could be quoted for {symbol_x} to {symbol_y}")
+                return False, 0
 
-            tx_hash = self.web3.eth.send_raw_transaction(
-                signed_tx.rawTransaction
-            )
-
-            # Wait for transaction receipt
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
-
-            # Logging details
-            amount_in_x = amount_in_x_wei / (10 ** decimals_x)
-
-            if receipt.status == 1:
-
-                # Get token y balance after trade
-                if token_y == USDC_TOKEN:
-                    _, _, _, balance_y_post = self.get_token_balance(token_y)
-                    amount_out_y = balance_y_post - balance_y
-                    amount_out_USDC = amount_out_y
-                else:
-                    _, _, _, balance_y_post = self.get_native_balance()
-                    amount_out_y = balance_y_post - balance_y
-
-                self.log_transaction(
+            symbols = {token_x: symbol_x, NATIVE_TOKEN: "S", USDC_TOKEN: "USDC", token_y: symbol_y}
+            app_logger.info(f"Reward trade plan: {plan.describe(symbols)}")
+
+            # Send one swap per route back to back, each bounded by its own quote
+            deadline = int(datetime.now().timestamp()) + 3600
+            sent = []
+            for quote in plan.quotes:
+                self.quoter.verify(quote)
+                amount_min_y_wei = quote.minimum_out(SWAP_SLIPPAGE_BPS)
+                trade_params = (
+                        quote.amount_in,                        # Amount token x in
+                        amount_min_y_wei,                       # Amount token y out min
+                        quote.route.path(),                     # Path
+                        self.wallet_address,                    # To address must be payable so requires checksum
+                        deadline                                # Deadline
+                )
+                pending = self.executor.send(
+                    trade_function(*trade_params),
                     tx_type="TRADE_REWARDS",
-                    receipt=receipt,
-                    gas_estimated=optimized_gas,
-                    details={
-                        "amount_in": f"{amount_in_x} {symbol_x}",
-                        "amount_out": f"{amount_out_y} {symbol_y}"
-                    }
+                    failure_message=f"{symbol_x} to {symbol_y} trade failed"
                 )
-                return True, amount_out_USDC
-            
-            else:
-                transaction_logger.error(f"{symbol_x} to {symbol_y} trade failed")
+                sent.append((pending, quote, amount_min_y_wei))
+
+            # Wait for every swap, logging each once its output amount is known
+            amount_out_y_wei_total = 0
+            succeeded = 0
+            for pending, quote, amount_min_y_wei in sent:
+                if not self.executor.wait(pending):
+                    continue
+
+                # Output amount from the last pair's transfer in the receipt
+                amount_out_y_wei = self.quoter.received_amount(pending.receipt, quote)
+                if amount_out_y_wei is None:
+                    app_logger.warning("Trade output not found in receipt, using the quoted minimum")
+                    amount_out_y_wei = amount_min_y_wei
+                amount_out_y_wei_total += amount_out_y_wei
+                succeeded += 1
+
+                pending.details = {
+                    "amount_in": f"{quote.amount_in / (10 ** decimals_x)} {symbol_x}",
+                    "amount_out": f"{amount_out_y_wei / (10 ** decimals_y)} {symbol_y}",
+                    "quoted_out": f"{quote.amount_out / (10 ** decimals_y)} {symbol_y}",
+                    "route": quote.route.describe(symbols),
+                    "split": f"{len(sent)} routes"
+                }
+                self.executor.log_transaction(pending)
+
+            if succeeded == 0:
                 return False, 0
 
+            amount_out_y = amount_out_y_wei_total / (10 ** decimals_y)
+            app_logger.info(f"Traded {plan.amount_in / (10 ** decimals_x)} {symbol_x} for {amount_out_y} {symbol_y} over {succeeded}/{len(sent)} swaps")
+            return True, amount_out_y if token_y == USDC_TOKEN else 0
+
         except Exception as e:
             transaction_logger.error(f"Failed to trade {symbol_x} to {symbol_y}: {e}")
             return False, 0
             
-    def log_transaction(self, tx_type, receipt, gas_estimated, details=None):
+class LocalStorageHandler:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def read_json_file(self, filename):
+        # Generic method to read any JSON file from the local directory
+        try:
+            path = os.path.join(self.directory, filename)
+            if not os.path.exists(path):
+                return None
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            app_logger.error(f"Error reading {filename}: {e}")
+            return None
+
+    def write_json_file(self, filename, data):
+        # Generic method to write any JSON file to the local directory
+        try:
+            path = os.path.join(self.directory, filename)
+            with open(path + '.tmp', 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(path + '.tmp', path)
+            return True
+        except Exception as e:
+            app_logger.error(f"Error writing {filename}: {e}")
+            return False
+
+class CloudStorageHandler:
+    def __init__(self, bucket_name, cache_enabled=True):
+        self.bucket_name = bucket_name
+
+        # In-process cache of {filename: {"data", "generation", "last_writer"}}, kept across warm invocations
+        self.cache_enabled = cache_enabled
+        self.cache = {}
+
+    @cached_property
+    def storage_client(self):
+        from google.cloud import storage
+        return storage.Client()
+
+    @cached_property
+    def bucket(self):
+        return self.storage_client.bucket(self.bucket_name)
+
+    def _cache_put(self, filename, data, generation, last_writer):
+        if self.cache_enabled:
+            self.cache[filename] = {
+                "data": copy.deepcopy(data),
+                "generation": generation,
+                "last_writer": last_writer
+            }
+
+    def _cache_get(self, filename):
         """
-        Logs structured data to transaction and gas loggers
-        Args:
-            tx_type: Type of transaction (e.g., 'TOKEN_APPROVAL', 'ADD_LIQUIDITY')
-            receipt: Transaction receipt from blockchain
-            estimated_gas: The gas limit that was set
-            details: Dictionary with additional transaction context
+        Return a cached (data, generation) if it is still current, None if the object must be downloaded
         """
-        
-        tx_hash = receipt.transactionHash.hex()
-        gas_used = receipt.gasUsed
-        efficiency = (gas_used / gas_estimated) * 100
-
-        # Log to trasaction logger with structured data
-        transaction_logger.info(
-            f"{tx_type} completed",
-            extra={
-                "tx_type": tx_type,
-                "tx_hash": tx_hash[:10] + "...",
-                "gas_estimated": gas_estimated,
-                "gas_used": gas_used,
-                "efficiency_pc": round(efficiency, 1),
-                "details": details or {}
-            }
-        )
-        
-        # Log to gas logger for gas usage tracking
-        gas_logger.debug(
-            f"{tx_type}: {gas_estimated:,} allocated → {gas_used:,} used ({efficiency:.1f}%)"
-        )
-        
-        if efficiency > 95:
-            gas_logger.warning(
-                f"{tx_type}: Gas buffer too low ({efficiency:.1f}% efficiency), transaction may be reverted"
-            )
-        elif efficiency < 70:
-            gas_logger.info(
-                f"{tx_type}: Gas buffer too high ({efficiency:.1f}% efficiency), consider reducing buffer"
-            )
-            
-class CloudStorageHandler:
-    def __init__(self, bucket_name):
-        self.storage_client = storage.Client()
-        self.bucket = self.storage_client.bucket(bucket_name)
+        cached = self.cache.get(filename)
+        if cached is None:
+            return None
+
+        # Trust the cached copy if this instance wrote it last, conditional writes catch any other writer
+        if not cached["last_writer"]:
+            # Cheap metadata request to compare generations without downloading
+            blob = self.bucket.get_blob(filename)
+            if blob is None or blob.generation != cached["generation"]:
+                del self.cache[filename]
+                return None
+
+        return copy.deepcopy(cached["data"]), cached["generation"]
 
     def read_json_file(self, filename):
         # Generic method to read any JSON file from bucket
         try:
-            blob = self.bucket.blob(filename)
-            if not blob.exists():
-                return None
-            return json.loads(blob.download_as_text())
+            data, _ = self.read_json_with_generation(filename)
+            return data
         except Exception as e:
             app_logger.error(f"Error reading {filename}: {e}")
             return None
@@ -976,14 +1214,101 @@ class CloudStorageHandler:
         try:
             blob = self.bucket.blob(filename)
             blob.upload_from_string(json.dumps(data, indent=2))
+            self._cache_put(filename, data, blob.generation, last_writer=True)
             return True
         except Exception as e:
+            self.cache.pop(filename, None)
             app_logger.error(f"Error writing {filename}: {e}")
             return False
 
-# Global Sonic connection instance
-sonic = SonicConnection()
-data = CloudStorageHandler(BUCKET_NAME)
+    def read_json_with_generation(self, filename):
+        """
+        Read a JSON file and its object generation, served from the in-process cache when it is current
+        Returns:
+            tuple: (data, generation), (None, 0) if the file does not exist
+        """
+        from google.api_core.exceptions import NotFound
+
+        cached = self._cache_get(filename)
+        if cached is not None:
+            return cached
+
+        blob = self.bucket.blob(filename)
+        try:
+            contents = blob.download_as_text()
+        except NotFound:
+            return None, 0
+
+        data = json.loads(contents)
+        self._cache_put(filename, data, blob.generation, last_writer=False)
+        return data, blob.generation
+
+    def write_json_if_generation(self, filename, data, generation):
+        """
+        Write a JSON file only if its generation still matches, 0 meaning it must not exist
+        Returns:
+            int: New object generation
+        Raises:
+            google.api_core.exceptions.PreconditionFailed: If the object changed
+        """
+        blob = self.bucket.blob(filename)
+        try:
+            blob.upload_from_string(
+                json.dumps(data, indent=2),
+                content_type='application/json',
+                if_generation_match=generation
+            )
+        except Exception:
+            # Another writer got in first, the cached copy is stale
+            self.cache.pop(filename, None)
+            raise
+
+        self._cache_put(filename, data, blob.generation, last_writer=True)
+        return blob.generation
+
+# Global storage, metadata registry and Sonic connection instances
+data = CloudStorageHandler(BUCKET_NAME, cache_enabled=STORAGE_CACHE)
+state_store = LocalStateStore(STATE_DIR) if STATE_DIR else GCSStateStore(data)
+metadata = MetadataRegistry(LocalStorageHandler(METADATA_CACHE_DIR) if METADATA_CACHE_DIR else data)
+
+# Pair policy defaults, from the single-pair environment variables
+PAIR_DEFAULTS = {
+    "executor": REBALANCE_EXECUTOR_CA,
+    "lower_lim": LOWER_LIM,
+    "upper_lim": UPPER_LIM,
+    "max_change": MAX_CHANGE,
+    "liquidity_shape": LIQUIDITY_SHAPE,
+    "num_bins": NUM_BINS,
+    "trigger_distance_bins": TRIGGER_DISTANCE_BINS,
+    "trigger_hysteresis_bins": TRIGGER_HYSTERESIS_BINS,
+    "trigger_min_dwell": TRIGGER_MIN_DWELL,
+    "trigger_dry_run": TRIGGER_DRY_RUN,
+    "reward_conf": REWARD_CONF
+}
+pair_configs = load_pair_configs(PAIRS_CONFIG, PAIR_DEFAULTS) if PAIRS_CONFIG else [PairConfig(LBP_CA, REWARDER_CA, **PAIR_DEFAULTS)]
+
+# Invoked by Cloud Scheduler over HTTP, False once run_daemon takes over
+scheduled = True
+
+# Pair address owning each state document prefix, kept for the life of the instance
+file_prefix_owners = {}
+
+# The first pair's connection owns the shared clients, the other pairs borrow them
+sonic = SonicConnection(metadata, pair_configs[0])
+connections = [sonic]
+
+def pair_connections():
+    """
+    Connection for every configured pair, created on first use so the shared clients stay lazy
+    """
+    if len(connections) < len(pair_configs):
+        connections.extend(sonic.for_pair(pair) for pair in pair_configs[len(connections):])
+    return connections
+
+if not LAZY_INIT:
+    metadata.load()
+    for connection in pair_connections():
+        connection.warm_up()
 
 @functions_framework.http
 def manage_liquidity(request):
@@ -1001,12 +1326,145 @@ def manage_liquidity(request):
                 "data": None
                 }
 
-        # Generate filenames
-        file_prefix = sonic.get_file_prefix()
-        op_file = f"{file_prefix}_time.json"
-        price_file = f"{file_prefix}_price.json"
-        position_file = f"{file_prefix}_position.json"
+        # Resynchronise the nonce and fees once per cycle, shared by every pair
+        sonic.executor.begin_cycle()
+
+        if len(pair_configs) == 1:
+            return run_pair_cycle(sonic, *read_pair_cycle(sonic))
+
+        # Read every pair's state concurrently, then run the cycles one after another
+        # so the shared wallet's transactions are sent in nonce order
+        managed = pair_connections()
+        reads = read_pair_cycles(managed)
+
+        results = {}
+        for connection, cycle in zip(managed, reads):
+            if isinstance(cycle, Exception):
+                app_logger.error(f"Failed to read state for pair {connection.pair.pair}: {cycle}")
+                results[connection.pair.pair] = {
+                    "status": "error",
+                    "message": f"Failed to read pair state: {cycle}",
+                    "data": None
+                }
+                continue
+
+            app_logger.info(f"Liquidity management cycle for {cycle[1]}")
+            results[cycle[1]] = run_pair_cycle(connection, *cycle)
+
+        failed = [name for name, result in results.items() if result["status"] == "error"]
+        return {
+            "status": "error" if failed else "success",
+            "message": f"{len(results) - len(failed)} of {len(results)} pairs completed" + (f", failed: {failed}" if failed else ""),
+            "data": results
+        }
+
+    except Exception as e:
+        app_logger.error(f"Function failed: {str(e)}", exc_info=True)
+        return {
+            "status": "error",
+            "message": f"Function failed: {str(e)}",
+            "data": None
+        }
+
+def read_pair_cycle(connection):
+    """
+    Read a pair's snapshot and state document, the reads a cycle starts with
+    Returns:
+        tuple: (snapshot, file_prefix, state, generation)
+    """
+    # Read pair, price and balance state in one batch
+    snapshot = connection.get_cycle_snapshot()
+
+    # Load the pair's state document, written back once when the cycle ends
+    file_prefix = connection.pair.name or f"{snapshot['symbol_x']}_{snapshot['symbol_y']}"
+    state, generation = state_store.load(file_prefix)
+    return snapshot, file_prefix, state, generation
+
+def read_pair_cycles(managed) -> list:
+    """
+    Read the given pairs' cycle state concurrently, a failed pair's exception is returned in its place
+    """
+    if sonic.async_rpc:
+        return claim_file_prefixes(managed, sonic.async_rpc.run(read_pair_cycles_async(managed)))
+
+    def read(connection):
+        try:
+            return read_pair_cycle(connection)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=min(PAIR_READ_WORKERS, len(managed))) as pool:
+        return claim_file_prefixes(managed, list(pool.map(read, managed)))
+
+def claim_file_prefixes(managed, reads) -> list:
+    """
+    Give each state document to the first pair that reads it. A later pair whose name or
+    token symbols resolve to a document another pair already uses gets an exception in
+    place of its read, so it never overwrites that pair's state or result
+    """
+    claimed = []
+    for connection, cycle in zip(managed, reads):
+        if not isinstance(cycle, Exception):
+            owner = file_prefix_owners.setdefault(cycle[1], connection.pair.pair)
+            if owner != connection.pair.pair:
+                cycle = Exception(
+                    f"State document {cycle[1]} is already used by pair {owner}, set a distinct name in PAIRS_CONFIG"
+                )
+        claimed.append(cycle)
+    return claimed
+
+async def read_pair_cycle_async(connection):
+    """
+    read_pair_cycle on the RPC event loop, with the state document loaded off the loop
+    """
+    snapshot = await connection.get_cycle_snapshot_async()
 
+    file_prefix = connection.pair.name or f"{snapshot['symbol_x']}_{snapshot['symbol_y']}"
+    state, generation = await asyncio.to_thread(state_store.load, file_prefix)
+    return snapshot, file_prefix, state, generation
+
+async def read_pair_cycles_async(managed):
+    """
+    Read every pair's cycle state concurrently, a failed pair's exception is returned in its place
+    """
+    return await asyncio.gather(*[read_pair_cycle_async(connection) for connection in managed], return_exceptions=True)
+
+def run_pair_cycle(connection, snapshot, file_prefix, state, generation):
+    """
+    Run the liquidity management cycle of one pair from its snapshot and state, then save its state
+    """
+    # A pair halted by the emergency stop stays untouched until its halt is cleared
+    halted = state.get("failures", {}).get("halted")
+    if halted:
+        app_logger.warning(f"{file_prefix} is halted since {halted}, skipping it")
+        return {
+            "status": "halted",
+            "message": f"Halted by the emergency stop since {halted}, remove failures.halted from its state document to resume",
+            "data": None
+        }
+
+    loaded = copy.deepcopy(state)
+    result = pair_cycle(connection, snapshot, file_prefix, state)
+
+    try:
+        save_state(file_prefix, state, generation, loaded)
+    except Exception as e:
+        app_logger.error(f"Failed to save state for {file_prefix}: {e}")
+        return {
+            "status": "error",
+            "message": f"{result['message']}, but its state was not saved: {e}",
+            "data": result["data"]
+        }
+
+    return result
+
+def pair_cycle(connection, snapshot, file_prefix, state):
+    """
+    Liquidity management cycle of one pair, updating its state document in place
+    """
+    policy = connection.pair
+
+    try:
         # Initialize variables
         first_run = False
         current_position = None
@@ -1015,13 +1473,13 @@ def manage_liquidity(request):
         change_acceptable = False        
 
         # Read and initialize operational data
-        last_op_data = data.read_json_file(op_file)
+        last_op_data = state.get("time")
 
         current_op_data = {
             "timestamp": datetime.now().isoformat()
         }
 
-        data.write_json_file(op_file, current_op_data)
+        state["time"] = current_op_data
 
         if last_op_data is None:
             last_op_data = current_op_data
@@ -1030,31 +1488,40 @@ def manage_liquidity(request):
         current_date = datetime.fromisoformat(current_op_data["timestamp"]).date()
 
         # Read and initialise price data
-        last_price_data = data.read_json_file(price_file)
+        last_price_data = state.get("price")
 
-        current_price_data = sonic.get_current_price()
-        current_price_data["timestamp"] = datetime.now().isoformat()
+        current_price_data = {
+            "price": snapshot["price"],
+            "token_x": snapshot["token_x"],
+            "token_y": snapshot["token_y"],
+            "timestamp": datetime.now().isoformat()
+        }
 
         if last_price_data is None:
-            data.write_json_file(price_file, current_price_data)
-            last_price_data = data.read_json_file(price_file)
+            state["price"] = current_price_data
+            last_price_data = current_price_data
             first_run = True
-        
-        last_price = last_price_data["price"]
+
+        # The jump guard compares with the price seen last cycle. "price" is only written on a
+        # rebalance, and a position can stay in range while the price drifts past MAX_CHANGE
+        observed_price_data = state.get("observed_price") or last_price_data
+        state["observed_price"] = current_price_data
+
+        last_price = observed_price_data["price"]
         current_price = current_price_data["price"]
 
-        in_limits = current_price > LOWER_LIM and current_price < UPPER_LIM
+        in_limits = current_price > policy.lower_lim and current_price < policy.upper_lim
 
         if last_price > 0:
             price_diff = current_price - last_price
             price_diff_pc = (price_diff / last_price) * 100
-            change_acceptable = abs(price_diff_pc) < MAX_CHANGE
+            change_acceptable = abs(price_diff_pc) < policy.max_change
         else:
             price_diff_pc = 0
             change_acceptable = True
 
         # Read previous position
-        last_position = data.read_json_file(position_file)
+        last_position = state.get("position")
 
         if last_position:
             valid_position = (
@@ -1080,31 +1547,67 @@ def manage_liquidity(request):
                         }
                 }
 
-        price_changed = abs(current_price - last_price) > 0
+        # Rebalance once the active bin has been far enough outside the position's bins for long enough
+        price_changed = False
+        if valid_position:
+            trigger_state = state.get("trigger") or {}
+            decision = connection.trigger.evaluate(
+                snapshot["active_id"],
+                position_bin_ids(last_position),
+                armed_since=trigger_state.get("armed_since"),
+                now=datetime.now().timestamp()
+            )
+            state["trigger"] = {"armed_since": decision.armed_since}
+            price_changed = decision.rebalance
+
+            app_logger.debug(f"Rebalance trigger: {decision.as_dict()}")
+
+            if decision.rebalance and policy.trigger_dry_run:
+                app_logger.info(f"Dry run, would rebalance: {decision.reason}")
+                price_changed = False
 
         if valid_position and not first_run:
 
-            # Claim and transfer rewards daily
-            if current_date != last_date:
-                if sonic.claim_rewards(last_position):
+            # Claim and transfer rewards daily, once they are worth more than the claim's gas
+            claim_decision = None
+            gas_spike = None
+            if current_date != last_date and connection.gas_oracle.defer_above is not None:
+                gas_spike = connection.gas_oracle.defer_reason(connection.executor.fees())
+            if gas_spike:
+                # Keep the claim due so it goes out on the first cycle after the spike
+                app_logger.info(f"Deferring reward claim and transfers: {gas_spike}")
+                state["time"] = last_op_data
+            elif current_date != last_date and not connection.claimer.due(state):
+                # Declined recently, keep the claim due without reading rewards and quotes every cycle
+                state["time"] = last_op_data
+            elif current_date != last_date:
+                claim_decision = connection.claimer.evaluate(state, last_position)
+                app_logger.debug(f"Reward claim: {claim_decision.as_dict()}")
+                if not claim_decision.claim:
+                    # Keep the claim due so it is evaluated again after CLAIM_EVALUATE_INTERVAL, not next day
+                    app_logger.info(f"Deferring reward claim: {claim_decision.reason}")
+                    state["time"] = last_op_data
+
+            if claim_decision and claim_decision.claim:
+                if connection.claimer.claim(state, claim_decision):
                     app_logger.info("Daily reward claim successful")
 
                     # Reward handling based on configuration
-                    if REWARD_CONF == 0:    # Trade rewards to USDC and transfer USDC to rewards wallet
+                    if policy.reward_conf == 0:    # Trade rewards to USDC and transfer USDC to rewards wallet
 
-                        trade_success, usdc_out = sonic.trade_rewards()
+                        trade_success, usdc_out = connection.trade_rewards()
                         if trade_success and usdc_out > 0:
                             app_logger.info("Daily reward trade successful")
-                            if sonic.transfer_tokens(USDC_TOKEN, usdc_out):
+                            if connection.transfer_tokens(USDC_TOKEN, usdc_out):
                                 app_logger.info("USDC reward transfer successful")
                             else:
                                 app_logger.error("USDC reward transfer failed")
                         else:
                             app_logger.error("Daily reward trade failed")
 
-                    elif REWARD_CONF == 1:  # Trade rewards to USDC
+                    elif policy.reward_conf == 1:  # Trade rewards to USDC
 
-                        trade_success, _, = sonic.trade_rewards()
+                        trade_success, _, = connection.trade_rewards()
                         if trade_success:
                             app_logger.info("Daily reward trade successful")                           
                         else:
@@ -1114,24 +1617,38 @@ def manage_liquidity(request):
                     app_logger.error("Daily reward claim failed")
 
             # Liquidity management
-            if price_changed:
+            if price_changed and connection.rebalancer:
+                app_logger.info("Price changed, rebalancing position in one transaction")
+
+                current_position = connection.rebalancer.rebalance(last_position)
+
+                if current_position:
+                    app_logger.info("Position rebalanced successfully")
+                else:
+                    failure_count(state, file_prefix)
+                    app_logger.error("Failed to rebalance position")
+                    return {
+                        "status": "error",
+                        "message": "Failed to rebalance position",
+                        "data": None
+                        }
+
+            elif price_changed:
                 app_logger.info("Price changed, rebalancing position")
 
                 try:
-                    if sonic.remove_liquidity(last_position):
+                    if connection.remove_liquidity(last_position):
                         app_logger.info("Liquidity removed successfully")
 
-                        if sonic.claim_rewards(last_position):
-                            app_logger.info("Rewards claimed successfully")
-                        else:
-                            app_logger.error("Rewards claim failed")
+                        # The old bins' rewards are claimed with the next batched claim
+                        connection.claimer.track(state, connection.wallet_address, position_bin_ids(last_position))
 
-                        current_position = sonic.add_liquidity()
+                        current_position = connection.add_liquidity()
 
                         if current_position:
                             app_logger.info("Liquidity added successfully")
                         else:
-                            failure_count(file_prefix)
+                            failure_count(state, file_prefix)
                             app_logger.error("Failed to add liquidity")
 
                             return {
@@ -1141,7 +1658,7 @@ def manage_liquidity(request):
                                 }
                         
                     else:
-                        failure_count(file_prefix)
+                        failure_count(state, file_prefix)
                         app_logger.error("Failed to remove liquidity")
                         return {
                                 "status": "error",
@@ -1160,7 +1677,7 @@ def manage_liquidity(request):
             else:
                 return {
                     "status": "info",
-                    "message": "No action required, price unchanged",
+                    "message": "No action required, position in range",
                     "data": None
                 }
 
@@ -1168,10 +1685,13 @@ def manage_liquidity(request):
             app_logger.info("First run, adding initial liquidity")
 
             try:
-                current_position = sonic.add_liquidity()
+                if connection.rebalancer:
+                    current_position = connection.rebalancer.rebalance()
+                else:
+                    current_position = connection.add_liquidity()
 
                 if not current_position:
-                    failure_count(file_prefix)
+                    failure_count(state, file_prefix)
                     app_logger.error("Failed to add initial liquidity")
                     return {
                         "status": "error",
@@ -1188,8 +1708,9 @@ def manage_liquidity(request):
                 }
 
         if current_position:
-            data.write_json_file(position_file, current_position)
-            data.write_json_file(price_file, current_price_data)
+            state["position"] = current_position
+            state["price"] = current_price_data
+            state["trigger"] = {"armed_since": None}
 
         app_logger.info("Liquidity management cycle completed successfully")
         app_logger.debug(f"Current position: {current_position}")
@@ -1209,26 +1730,132 @@ def manage_liquidity(request):
             "data": None
         }
 
-def failure_count(file_prefix):
+def daemon_cycle(managed):
+    """
+    Run the cycles of the pairs the daemon woke up for
+    Args:
+        managed (list): SonicConnection of each pair to run
+    Returns:
+        tuple: ({pair: unix time its armed trigger fires, None if not armed}, set of pairs that hit the emergency stop),
+               pairs that could not be read or whose cycle failed are left out of the first, to be retried
+    """
+    # Resynchronise the nonce and fees once per wake-up, shared by every pair
+    sonic.executor.begin_cycle()
+
+    recheck = {}
+    halted = set()
+    for connection, cycle in zip(managed, read_pair_cycles(managed)):
+        pair = connection.pair.pair
+        if isinstance(cycle, Exception):
+            app_logger.error(f"Failed to read state for pair {pair}: {cycle}")
+            continue
+
+        snapshot, file_prefix, state, _ = cycle
+        connection.active_bin.sync(snapshot["active_id"])
+        last_estop = state.get("failures", {}).get("last_estop")
+
+        result = run_pair_cycle(connection, *cycle)
+        app_logger.info(f"{file_prefix}: {result['message']}")
+
+        if result["status"] == "halted" or state.get("failures", {}).get("last_estop") != last_estop:
+            halted.add(pair)
+        if result["status"] == "error":
+            continue
+
+        # An armed trigger must be looked at again once its dwell time is up, even if the bin stays put
+        armed_since = (state.get("trigger") or {}).get("armed_since")
+        recheck[pair] = armed_since + connection.pair.trigger_min_dwell if armed_since is not None else None
+
+        # Later moves within the position's bins can then be skipped without a cycle
+        position = state.get("position")
+        connection.active_bin.watch(
+            position_bin_ids(position) if position else [],
+            armed = armed_since is not None,
+            distance_bins = connection.pair.trigger_distance_bins
+        )
+
+    return recheck, halted
+
+def run_daemon():
+    """
+    Long-running entry point: keep the connections alive and run a pair's cycle when its active id moves
+    """
+    global scheduled
+    scheduled = False
+
+    if not sonic.is_connected():
+        app_logger.critical("Failed to connect to Sonic network")
+        sys.exit(1)
+
+    managed = pair_connections()
+    subscription = SwapSubscription(WS_RPC_URL, [connection.pair.pair for connection in managed]) if WS_RPC_URL else None
+    daemon = LiquidityDaemon(
+        managed,
+        daemon_cycle,
+        subscription = subscription,
+        poll_interval = DAEMON_POLL_INTERVAL,
+        max_idle = DAEMON_MAX_IDLE,
+        retry_interval = DAEMON_RETRY_INTERVAL
+    )
+
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        daemon.stop()
+
+def save_state(file_prefix, state, generation, loaded):
+    """
+    Write the cycle's state document in a single conditional write. If the document was modified
+    since it was loaded, the sections this cycle changed are merged onto the current document and
+    the write is retried
+    Args:
+        file_prefix (str): Pair's state document
+        state (dict): State document as left by the cycle, updated in place with the merged document
+        generation: Generation the document was loaded at
+        loaded (dict): State document as loaded, before the cycle
+    Returns:
+        New generation of the document
+    """
+    for attempt in range(STATE_SAVE_ATTEMPTS):
+        try:
+            return state_store.save(file_prefix, state, generation)
+
+        except StateConflict as e:
+            app_logger.warning(f"State for {file_prefix} was modified concurrently, merging this cycle's changes: {e}")
+
+        # The on-chain position, prices, trigger and claims the cycle acted on win, the rest is kept as written
+        changed = {section: value for section, value in state.items() if loaded.get(section) != value}
+        removed = [section for section in loaded if section not in state]
+        current, generation = state_store.load(file_prefix)
+        for section in removed:
+            current.pop(section, None)
+        current.update(changed)
+        state.clear()
+        state.update(current)
+        loaded = copy.deepcopy(current)
+
+    raise Exception(f"State for {file_prefix} kept being modified concurrently, gave up after {STATE_SAVE_ATTEMPTS} attempts")
+
+def failure_count(state, file_prefix):
     """
-    Simple failure counter with emergency stop at 3
+    Simple failure counter with emergency stop at 3, recorded in the cycle's state document
     """
-    failure_file = f"{file_prefix}_failures.json"
-    failure_data = data.read_json_file(failure_file) or {"count": 0}
+    failure_data = state.setdefault("failures", {"count": 0})
     
     failure_data["count"] += 1
     failure_data["last_failure"] = datetime.now().isoformat()
-    
-    data.write_json_file(failure_file, failure_data)
 
     failure_count = failure_data["count"]
     failure_limit = 3
 
     if failure_count >= failure_limit:
 
-        app_logger.critical(f"{failure_count} consecutive failures detected for {file_prefix}, halting scheduler...")
+        app_logger.critical(f"{failure_count} consecutive failures detected for {file_prefix}, halting...")
 
-        emergency_stop(file_prefix)
+        # Without a scheduler pause to stop it, the pair is halted in its own state document
+        if not emergency_stop(file_prefix):
+            failure_data["halted"] = datetime.now().isoformat()
 
         failure_data["last_estop"] = datetime.now().isoformat()
         failure_data["count"] = 0
@@ -1244,30 +1871,49 @@ def failure_count(file_prefix):
 
 def emergency_stop(file_prefix):
     """
-    Pause the scheduler to prevent further executions and send emergency notification
+    Pause the scheduler to prevent further executions, when it only runs this pair, and always send the emergency notification
+    Returns:
+        bool: True if the scheduler was paused, False if the pair has to be halted on its own
     """
-    client = scheduler_v1.CloudSchedulerClient()
-    job_path = client.job_path(PROJECT_ID, SCHEDULER_LOCATION, SCHEDULER_JOB_NAME)
-    try:
-        client.pause_job(request={"name": job_path})
+    # The daemon has no scheduler job, and with several pairs the job runs the others too
+    paused = scheduled and len(pair_configs) == 1 and pause_scheduler()
+
+    message = f"CRITICAL: {file_prefix} liquidity manager suspended after 3 consecutive failures. "
+    if paused:
+        message += "Scheduler paused."
+    else:
+        message += "Pair halted, remove failures.halted from its state document to resume."
+
+    push_notification(
+        message,
+        f"{file_prefix} Metro Auto DLMM",
+        1
+    )
+    return paused
 
-        message = f"CRITICAL: {file_prefix} liquidity manager suspended after 3 consecutive failures. Scheduler paused."
-        title = f"{file_prefix} Metro Auto DLMM"
+def pause_scheduler():
+    """
+    Pause the Cloud Scheduler job that invokes the function
+    Returns:
+        bool: True if the job was paused, False otherwise
+    """
+    try:
+        from google.cloud import scheduler_v1
 
-        push_notification(
-            message,
-            title,
-            1
-        )
+        client = scheduler_v1.CloudSchedulerClient()
+        job_path = client.job_path(PROJECT_ID, SCHEDULER_LOCATION, SCHEDULER_JOB_NAME)
+        client.pause_job(request={"name": job_path})
 
         app_logger.info("Scheduler halted")
         return True
-    
+
     except Exception as e:
         app_logger.error(f"Failed to pause scheduler: {e}")
         return False
 
 def push_notification(message, title, priority):
+    import requests
+
     pushover_data = {
         'token': PUSHOVER_TOKEN,
         'user': PUSHOVER_USER,
@@ -1282,4 +1928,7 @@ def push_notification(message, title, priority):
         return True
     except Exception as e:
         app_logger.error(f"Failed to send pushover notification: {e}")
-        return False
\ No newline at end of file
+        return False
+
+if __name__ == "__main__":
+    run_daemon()
@@ -0,0 +1,85 @@
+from eth_utils import to_checksum_address
+import logging
+import threading
+
+app_logger = logging.getLogger('app_logger')
+
+
+class MetadataRegistry:
+    """
+    Cache of immutable token and pair metadata (symbols, decimals, pair tokens, bin step)
+    keyed by (chain id, contract address).
+
+    Entries are persisted through any handler exposing `read_json_file`/`write_json_file`
+    (CloudStorageHandler or LocalStorageHandler) so cold starts can warm-start from the
+    last known metadata instead of rediscovering it on-chain. Persisted entries are
+    loaded on first lookup unless `load` is called explicitly. Lookups and updates may
+    come from concurrent pair reads, so loading and persisting happen under a lock.
+    """
+
+    def __init__(self, store=None, filename='metadata_cache.json'):
+        self.store = store
+        self.filename = filename
+        self.entries = {}
+        self.loaded = False
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def _key(chain_id, address) -> str:
+        return f"{int(chain_id)}:{to_checksum_address(address)}"
+
+    def load(self) -> int:
+        """
+        Load persisted metadata into memory
+        Returns:
+            int: Number of entries loaded
+        """
+        with self.lock:
+            self.loaded = True
+            if self.store is None:
+                return 0
+
+            persisted = self.store.read_json_file(self.filename) or {}
+            for key, values in persisted.items():
+                self.entries.setdefault(key, {}).update(values)
+
+        app_logger.debug(f"Loaded {len(persisted)} metadata entries from {self.filename}")
+        return len(persisted)
+
+    def save(self) -> bool:
+        """Persist the registry, returns True if written"""
+        if self.store is None:
+            return False
+        with self.lock:
+            return self.store.write_json_file(self.filename, self.entries)
+
+    def get(self, chain_id, address, *fields):
+        """
+        Look up cached metadata for a contract
+        Args:
+            chain_id (int): Chain the contract lives on
+            address (str): Contract address
+            fields (str): Fields that must all be present for a cache hit
+        Returns:
+            dict: Cached metadata, or None if missing or incomplete
+        """
+        if not self.loaded:
+            self.load()
+
+        entry = self.entries.get(self._key(chain_id, address))
+        if entry is None or any(field not in entry for field in fields):
+            return None
+        return entry
+
+    def update(self, chain_id, address, values: dict) -> None:
+        """Record metadata for a contract and persist it if anything new was learnt"""
+        if not self.loaded:
+            self.load()
+
+        with self.lock:
+            entry = self.entries.setdefault(self._key(chain_id, address), {})
+            changed = any(entry.get(field) != value for field, value in values.items())
+            entry.update(values)
+
+            if changed:
+                self.save()
@@ -0,0 +1,244 @@
+from eth_utils import to_checksum_address
+import logging
+import time
+
+from contract_pool import ContractPool
+
+app_logger = logging.getLogger('app_logger')
+
+# Multicall3 is deployed at the same address on every EVM chain, including Sonic
+MULTICALL3_ADDRESS = to_checksum_address('0xcA11bde05977b3631167028862bE2a173976CA11')
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "address", "name": "addr", "type": "address"}],
+        "name": "getEthBalance",
+        "outputs": [{"internalType": "uint256", "name": "balance", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+
+class NativeBalance:
+    """Marker for a native (S) balance read, batched alongside contract calls"""
+
+    def __init__(self, address):
+        self.address = to_checksum_address(address)
+
+
+class MulticallReader:
+    """
+    Batches contract view calls into as few RPC round trips as possible.
+
+    Calls are aggregated through Multicall3 `aggregate3`. If the Multicall3
+    contract is unavailable the same calls are sent as a single JSON-RPC
+    batch of `eth_call` requests instead. Multicall3 is only given up for good
+    when there is no code at its address; after any other failure, such as a
+    timeout or a rate limit, it is tried again once `multicall_cooldown` seconds
+    have passed.
+    """
+
+    def __init__(self, web3, rpc_url, max_batch_size=200, contracts=None, multicall_cooldown=60):
+        self.web3 = web3
+        self.rpc_url = rpc_url
+        self.max_batch_size = max_batch_size
+        self.contracts = contracts or ContractPool(web3)
+        self.contracts.register_abi("multicall3", MULTICALL3_ABI)
+        self.multicall_contract = self.contracts.get(MULTICALL3_ADDRESS, "multicall3")
+        self.multicall_available = True
+        self.multicall_cooldown = float(multicall_cooldown)
+        self.multicall_retry_at = 0.0
+        self.round_trips = 0
+
+    def read(self, calls: dict, block_identifier='latest') -> dict:
+        """
+        Execute a set of view calls in one batch
+        Args:
+            calls (dict): {key: bound contract function or NativeBalance}
+            block_identifier: Block number or tag to read at
+        Returns:
+            dict: {key: decoded result}, results are None for failed calls
+        """
+        if not calls:
+            return {}
+
+        keys, encoded = self._encode_all(calls)
+
+        results = []
+        for chunk in self._chunks(encoded):
+            results.extend(self._execute(chunk, block_identifier))
+
+        return self._decode_all(keys, encoded, results)
+
+    def _encode_all(self, calls: dict) -> tuple:
+        keys = list(calls.keys())
+        return keys, [self._encode(calls[key]) for key in keys]
+
+    def _chunks(self, encoded) -> list:
+        return [encoded[start:start + self.max_batch_size] for start in range(0, len(encoded), self.max_batch_size)]
+
+    def _decode_all(self, keys, encoded, results) -> dict:
+        decoded = {}
+        for key, (call, _, _), (success, return_data) in zip(keys, encoded, results):
+            if not success:
+                app_logger.debug(f"Batched call {key} failed")
+                decoded[key] = None
+                continue
+            try:
+                decoded[key] = self._decode(call, return_data)
+            except Exception as e:
+                app_logger.debug(f"Failed to decode batched call {key}: {e}")
+                decoded[key] = None
+
+        return decoded
+
+    def _encode(self, call) -> tuple:
+        """Return (call, target, calldata) for a bound contract function or native balance read"""
+        if isinstance(call, NativeBalance):
+            native_call = self.multicall_contract.functions.getEthBalance(call.address)
+            return call, MULTICALL3_ADDRESS, self._encode_calldata(native_call)
+        return call, call.address, self._encode_calldata(call)
+
+    def _encode_calldata(self, fn) -> bytes:
+        spec = self.contracts.spec(fn)
+        return bytes.fromhex(spec.selector[2:]) + self.web3.codec.encode(spec.input_types, fn.arguments)
+
+    def _decode(self, call, return_data):
+        if isinstance(call, NativeBalance):
+            return self.web3.codec.decode(['uint256'], return_data)[0]
+
+        output_types = self.contracts.spec(call).output_types
+        values = [
+            self._normalize(output_type, value)
+            for output_type, value in zip(output_types, self.web3.codec.decode(output_types, return_data))
+        ]
+
+        # Match web3 `.call()` semantics: single outputs are unwrapped
+        if len(values) == 1:
+            return values[0]
+        return values
+
+    def _normalize(self, output_type, value):
+        if output_type == 'address':
+            return to_checksum_address(value)
+        if output_type == 'address[]':
+            return [to_checksum_address(item) for item in value]
+        return value
+
+    def _use_multicall(self) -> bool:
+        return self.multicall_available and time.monotonic() >= self.multicall_retry_at
+
+    def _multicall_failed(self, error, has_code) -> None:
+        """Give Multicall3 up for good if it is not deployed, otherwise pause it for the cooldown"""
+        if not has_code:
+            app_logger.warning(f"No Multicall3 contract at {MULTICALL3_ADDRESS}, using JSON-RPC batches: {error}")
+            self.multicall_available = False
+        else:
+            app_logger.warning(
+                f"Multicall3 aggregation failed, using JSON-RPC batches for {self.multicall_cooldown:g}s: {error}"
+            )
+            self.multicall_retry_at = time.monotonic() + self.multicall_cooldown
+
+    def _multicall_deployed(self) -> bool:
+        """Whether Multicall3 has code, assumed so if the check itself fails"""
+        try:
+            return len(self.web3.eth.get_code(MULTICALL3_ADDRESS)) > 0
+        except Exception:
+            return True
+
+    def _execute(self, chunk, block_identifier='latest') -> list:
+        """Execute one chunk of encoded calls, returning [(success, return_data)]"""
+        if self._use_multicall():
+            try:
+                aggregated = self.multicall_contract.functions.aggregate3(
+                    [(target, True, calldata) for _, target, calldata in chunk]
+                ).call(block_identifier=block_identifier)
+                self.round_trips += 1
+                return [(success, return_data) for success, return_data in aggregated]
+
+            except Exception as e:
+                self._multicall_failed(e, self._multicall_deployed())
+
+        return self._execute_rpc_batch(chunk, block_identifier)
+
+    def _execute_rpc_batch(self, chunk, block_identifier='latest') -> list:
+        """Send the calls as a single JSON-RPC batch request"""
+        import requests
+
+        response = requests.post(self.rpc_url, json=self._rpc_batch_payload(chunk, block_identifier), timeout=30)
+        response.raise_for_status()
+        self.round_trips += 1
+
+        return self._rpc_batch_results(chunk, response.json())
+
+    def _rpc_batch_payload(self, chunk, block_identifier='latest') -> list:
+        block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+
+        payload = []
+        for request_id, (call, target, calldata) in enumerate(chunk):
+            if isinstance(call, NativeBalance):
+                payload.append({
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": "eth_getBalance",
+                    "params": [call.address, block]
+                })
+            else:
+                payload.append({
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": "eth_call",
+                    "params": [{"to": target, "data": "0x" + calldata.hex()}, block]
+                })
+
+        return payload
+
+    def _rpc_batch_results(self, chunk, response) -> list:
+        # A rejected batch comes back as a single JSON-RPC error object instead of a list
+        if not isinstance(response, list):
+            error = response.get("error", response) if isinstance(response, dict) else response
+            raise Exception(f"JSON-RPC batch of {len(chunk)} calls rejected: {error}")
+
+        responses = {item["id"]: item for item in response}
+        results = []
+        for request_id, (call, _, _) in enumerate(chunk):
+            item = responses.get(request_id, {})
+            if "result" not in item:
+                results.append((False, b""))
+                continue
+            if isinstance(call, NativeBalance):
+                # eth_getBalance returns a quantity, re-encode so decoding is uniform
+                results.append((True, int(item["result"], 16).to_bytes(32, 'big')))
+            else:
+                results.append((True, bytes.fromhex(item["result"][2:])))
+
+        return results
@@ -0,0 +1,100 @@
+from eth_utils import to_checksum_address
+import json
+import logging
+import os
+
+app_logger = logging.getLogger('app_logger')
+
+
+class PairConfig:
+    """
+    Addresses and policy for one managed pair.
+
+    Single-pair deployments build one from the environment variables. Multi-pair
+    deployments list pairs in PAIRS_CONFIG; each entry needs `pair` and `rewarder`
+    and may override any other field, falling back to the environment values.
+    `name` prefixes the pair's state document and defaults to its token symbols, so
+    it must be set when two pairs share the same tokens. Otherwise only the first of
+    them is managed and the others fail their cycles until they are named.
+    """
+
+    __slots__ = (
+        "pair", "rewarder", "name", "executor", "lower_lim", "upper_lim", "max_change",
+        "liquidity_shape", "num_bins", "trigger_distance_bins", "trigger_hysteresis_bins",
+        "trigger_min_dwell", "trigger_dry_run", "reward_conf"
+    )
+
+    def __init__(
+        self,
+        pair,
+        rewarder,
+        name=None,
+        executor=None,
+        lower_lim=None,
+        upper_lim=None,
+        max_change=None,
+        liquidity_shape='spot',
+        num_bins=1,
+        trigger_distance_bins=1,
+        trigger_hysteresis_bins=0,
+        trigger_min_dwell=0,
+        trigger_dry_run=False,
+        reward_conf=None
+    ):
+        if not pair or not rewarder:
+            raise Exception(f"Pair config needs a pair and a rewarder address, got {pair}, {rewarder}")
+
+        self.pair = to_checksum_address(pair)
+        self.rewarder = to_checksum_address(rewarder)
+        self.name = name
+        self.executor = to_checksum_address(executor) if executor else None
+        self.lower_lim = float(lower_lim)
+        self.upper_lim = float(upper_lim)
+        self.max_change = float(max_change)
+        self.liquidity_shape = liquidity_shape
+        self.num_bins = int(num_bins)
+        self.trigger_distance_bins = int(trigger_distance_bins)
+        self.trigger_hysteresis_bins = int(trigger_hysteresis_bins)
+        self.trigger_min_dwell = float(trigger_min_dwell)
+        self.trigger_dry_run = bool(trigger_dry_run)
+        self.reward_conf = float(reward_conf)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def load_pair_configs(source, defaults) -> list:
+    """
+    Read pair configs from a JSON list, given inline or as a path to a JSON file
+    Args:
+        source (str): JSON text or file path
+        defaults (dict): Values for fields a pair does not set
+    Returns:
+        list: PairConfig for each entry
+    """
+    if os.path.exists(source):
+        with open(source, 'r') as f:
+            entries = json.load(f)
+    else:
+        entries = json.loads(source)
+
+    if not isinstance(entries, list) or not entries:
+        raise Exception("PAIRS_CONFIG must be a non-empty JSON list of pair configs")
+
+    configs = []
+    for entry in entries:
+        unknown = set(entry) - set(PairConfig.__slots__)
+        if unknown:
+            raise Exception(f"Unknown pair config fields {sorted(unknown)} in {entry}")
+        configs.append(PairConfig(**{**defaults, **entry}))
+
+    pairs = [config.pair for config in configs]
+    if len(set(pairs)) != len(pairs):
+        raise Exception(f"Pairs are listed more than once in PAIRS_CONFIG: {pairs}")
+
+    names = [config.name for config in configs if config.name]
+    if len(set(names)) != len(names):
+        raise Exception(f"Pair names are used more than once in PAIRS_CONFIG: {names}")
+
+    app_logger.debug(f"Loaded {len(configs)} pair configs")
+    return configs
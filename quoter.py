@@ -0,0 +1,547 @@
+"""
+Off-chain swap quoting for router paths.
+
+Pool state for every candidate route is read in a few batched round trips, then each
+route is simulated locally: Liquidity Book hops bin by bin with the pair's fee
+parameters (see lb_math), constant product hops from their reserves. The best quote
+gives the exact expected output and a slippage-bounded minimum for the router call,
+and can be cross-checked against the pairs' own `getSwapOut` in one more batch.
+"""
+from eth_utils import to_checksum_address
+import logging
+import time
+
+from lb_math import FeeParameters, simulate_swap_out
+
+app_logger = logging.getLogger('app_logger')
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+# LBRouter path versions
+VERSION_V1 = 0      # Constant product pairs from the V1 factory
+VERSION_V2 = 1      # Liquidity Book pairs from the legacy factory
+VERSION_V2_1 = 2    # Liquidity Book pairs from the current factory
+
+# Swap fee of constant product (V1) pairs, in basis points
+V1_FEE_BPS = 30
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+
+# getNextNonEmptyBin returns one of these when there is no liquidity left in a direction
+NO_BIN = (0, (1 << 24) - 1)
+
+V1_FACTORY_ABI = [
+    {
+        "inputs": [{"name": "tokenA", "type": "address"}, {"name": "tokenB", "type": "address"}],
+        "name": "getPair",
+        "outputs": [{"name": "pair", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+V1_PAIR_ABI = [
+    {
+        "inputs": [],
+        "name": "getReserves",
+        "outputs": [
+            {"name": "reserve0", "type": "uint112"},
+            {"name": "reserve1", "type": "uint112"},
+            {"name": "blockTimestampLast", "type": "uint32"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "token0",
+        "outputs": [{"name": "", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+LB_FACTORY_ABI = [
+    {
+        "inputs": [
+            {"name": "tokenA", "type": "address"},
+            {"name": "tokenB", "type": "address"},
+            {"name": "binStep", "type": "uint256"}
+        ],
+        "name": "getLBPairInformation",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "binStep", "type": "uint16"},
+                    {"name": "LBPair", "type": "address"},
+                    {"name": "createdByOwner", "type": "bool"},
+                    {"name": "ignoredForRouting", "type": "bool"}
+                ],
+                "name": "lbPairInformation",
+                "type": "tuple"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"name": "tokenX", "type": "address"}, {"name": "tokenY", "type": "address"}],
+        "name": "getAllLBPairs",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "binStep", "type": "uint16"},
+                    {"name": "LBPair", "type": "address"},
+                    {"name": "createdByOwner", "type": "bool"},
+                    {"name": "ignoredForRouting", "type": "bool"}
+                ],
+                "name": "lbPairsAvailable",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+
+class Route:
+    """A router path: tokens in swap order with the bin step and version of each hop"""
+
+    def __init__(self, tokens, bin_steps, versions):
+        if len(tokens) != len(bin_steps) + 1 or len(bin_steps) != len(versions):
+            raise Exception(f"Route needs one more token than hops: {tokens}, {bin_steps}, {versions}")
+
+        self.tokens = [to_checksum_address(token) for token in tokens]
+        self.bin_steps = [int(bin_step) for bin_step in bin_steps]
+        self.versions = [int(version) for version in versions]
+
+    @property
+    def hops(self) -> list:
+        """(token_in, token_out, bin_step, version) of each hop"""
+        return list(zip(self.tokens[:-1], self.tokens[1:], self.bin_steps, self.versions))
+
+    def path(self) -> tuple:
+        """LBRouter Path struct: (pairBinSteps, versions, tokenPath)"""
+        return self.bin_steps, self.versions, self.tokens
+
+    def describe(self, symbols=None) -> str:
+        symbols = symbols or {}
+        labels = [symbols.get(token, token[:8]) for token in self.tokens]
+        hops = [f"-[v{version}/{bin_step}]-> {label}" for label, bin_step, version in zip(labels[1:], self.bin_steps, self.versions)]
+        return " ".join([labels[0], *hops])
+
+
+class Quote:
+    """Simulated outcome of swapping an exact input along a route"""
+
+    def __init__(self, route, pairs, amount_in, hop_amounts, fees):
+        self.route = route
+        self.pairs = pairs
+        self.amount_in = amount_in
+        self.hop_amounts = hop_amounts
+        self.fees = fees
+        self.amount_out = hop_amounts[-1]
+        self.verified = None
+
+    def minimum_out(self, slippage_bps) -> int:
+        """Output the swap must at least return, the expected output less the slippage allowance"""
+        return self.amount_out * (10000 - int(slippage_bps)) // 10000
+
+    def describe(self, symbols=None) -> dict:
+        return {
+            "route": self.route.describe(symbols),
+            "amount_in": self.amount_in,
+            "amount_out": self.amount_out,
+            "verified": self.verified
+        }
+
+
+class LBPool:
+    """Liquidity Book pair state loaded for quoting: active id, fee parameters and the bins read so far"""
+
+    def __init__(self, address, bin_step, token_x, active_id, fee_parameters):
+        self.address = address
+        self.bin_step = bin_step
+        self.token_x = token_x
+        self.active_id = active_id
+        self.fee_parameters = fee_parameters
+        # Bins in swap order per direction (swap_for_y), and where to continue reading from
+        self.bins = {True: [], False: []}
+        self.next_id = {True: active_id, False: active_id}
+
+    def exhausted(self, swap_for_y) -> bool:
+        return self.next_id[swap_for_y] is None
+
+
+class V1Pool:
+    """Constant product pair reserves loaded for quoting"""
+
+    def __init__(self, address, token0, reserve0, reserve1):
+        self.address = address
+        self.token0 = token0
+        self.reserve0 = reserve0
+        self.reserve1 = reserve1
+
+    def amount_out(self, token_in, amount_in) -> int:
+        reserve_in, reserve_out = (self.reserve0, self.reserve1) if token_in == self.token0 else (self.reserve1, self.reserve0)
+        amount_in_with_fee = amount_in * (10000 - V1_FEE_BPS)
+        return amount_in_with_fee * reserve_out // (reserve_in * 10000 + amount_in_with_fee)
+
+
+class SwapQuoter:
+    """
+    Quotes router paths locally from batched pool reads.
+
+    Factory and pair addresses are immutable, so they are resolved once and kept in the
+    connection's metadata registry. Each `best_quote` then reads the state of every pair
+    the candidate routes use together, at most one round trip for LB active ids, fee
+    parameters and V1 reserves and one for bin reserves, whatever the number of routes.
+    Bins are read in windows of `window_bins` from the active id in the swap direction.
+    A swap that crosses more bins than were read loads the next window. The connection's
+    own pair is served from its reserve index instead, all bins of a direction at once.
+    """
+
+    def __init__(self, connection, router_address, window_bins=25):
+        self.sonic = connection
+        self.router_address = connection.contracts.checksum(router_address)
+        self.window_bins = window_bins
+
+        contracts = connection.contracts
+        for abi_name, abi in (("v1_factory", V1_FACTORY_ABI), ("v1_pair", V1_PAIR_ABI), ("lb_factory", LB_FACTORY_ABI)):
+            if abi_name not in contracts.abis:
+                contracts.register_abi(abi_name, abi)
+
+    @property
+    def reader(self):
+        return self.sonic.reader
+
+    def _cached(self, address, *fields):
+        return self.sonic.metadata.get(self.sonic.chain_id, address, *fields)
+
+    def _remember(self, address, values) -> None:
+        self.sonic.metadata.update(self.sonic.chain_id, address, values)
+
+    def factories(self) -> dict:
+        """
+        V1 and Liquidity Book factory addresses behind the router
+        Returns:
+            dict: {"v1_factory": str, "lb_factory": str}
+        """
+        cached = self._cached(self.router_address, "v1_factory", "lb_factory")
+        if cached:
+            return cached
+
+        router = self.sonic.contracts.get(self.router_address, "lbrouter", requires=("getFactory", "getV1Factory"))
+        result = self.reader.read({
+            "v1_factory": router.functions.getV1Factory(),
+            "lb_factory": router.functions.getFactory()
+        })
+        if None in result.values():
+            raise Exception(f"Failed to read router factories: {result}")
+
+        self._remember(self.router_address, result)
+        return result
+
+    @staticmethod
+    def _pair_key(token_a, token_b, bin_step, version) -> str:
+        token_a, token_b = sorted((token_a, token_b), key=str.lower)
+        return f"pair_v{version}_{bin_step}_{token_a}_{token_b}"
+
+    def resolve_pairs(self, routes) -> dict:
+        """
+        Pair address of every hop, looked up in one batch for hops not seen before
+        Returns:
+            dict: {(token_in, token_out, bin_step, version): pair address, or None if there is no such pair}
+        """
+        factories = self.factories()
+        pairs = {}
+        calls = {}
+        for hop in {hop for route in routes for hop in route.hops}:
+            token_in, token_out, bin_step, version = hop
+            key = self._pair_key(token_in, token_out, bin_step, version)
+
+            if version == VERSION_V1:
+                factory = factories["v1_factory"]
+                cached = self._cached(factory, key)
+                if cached:
+                    pairs[hop] = cached[key]
+                else:
+                    calls[hop] = self.sonic.contracts.get(factory, "v1_factory").functions.getPair(token_in, token_out)
+            elif version == VERSION_V2_1:
+                factory = factories["lb_factory"]
+                cached = self._cached(factory, key)
+                if cached:
+                    pairs[hop] = cached[key]
+                else:
+                    calls[hop] = self.sonic.contracts.get(factory, "lb_factory").functions.getLBPairInformation(
+                        token_in, token_out, bin_step
+                    )
+            else:
+                app_logger.debug(f"Quoting version {version} pairs is not supported, skipping {hop}")
+                pairs[hop] = None
+
+        found = {}
+        for hop, result in self.reader.read(calls).items():
+            version = hop[3]
+            address = result if version == VERSION_V1 else (result[1] if result else None)
+            # Missing pairs are not cached, they may be created later
+            if address and address != ZERO_ADDRESS:
+                found[hop] = to_checksum_address(address)
+            pairs[hop] = found.get(hop)
+
+        self.remember_pairs(found)
+        return pairs
+
+    def remember_pairs(self, pairs: dict) -> None:
+        """Cache pair addresses by hop, with one registry write per factory"""
+        factories = self.factories()
+        updates = {}
+        for (token_in, token_out, bin_step, version), address in pairs.items():
+            factory = factories["v1_factory" if version == VERSION_V1 else "lb_factory"]
+            updates.setdefault(factory, {})[self._pair_key(token_in, token_out, bin_step, version)] = address
+
+        for factory, values in updates.items():
+            self._remember(factory, values)
+
+    def load_pools(self, pairs: dict) -> dict:
+        """
+        Read the state of every pair in one batch, plus the first bin window of each LB pair
+        Args:
+            pairs (dict): {hop: pair address} from resolve_pairs
+        Returns:
+            dict: {pair address: LBPool or V1Pool}
+        """
+        calls = {}
+        directions = {}
+        for (token_in, _, bin_step, version), address in pairs.items():
+            if address is None:
+                continue
+
+            if version == VERSION_V1:
+                pair = self.sonic.contracts.get(address, "v1_pair")
+                calls[(address, "reserves")] = pair.functions.getReserves()
+                if not self._cached(address, "token0"):
+                    calls[(address, "token0")] = pair.functions.token0()
+            else:
+                pair = self.sonic.contracts.get(
+                    address, "lbp", requires=("getStaticFeeParameters", "getVariableFeeParameters", "getNextNonEmptyBin")
+                )
+                calls[(address, "active_id")] = pair.functions.getActiveId()
+                calls[(address, "static_fees")] = pair.functions.getStaticFeeParameters()
+                calls[(address, "variable_fees")] = pair.functions.getVariableFeeParameters()
+                if not self._cached(address, "token_x"):
+                    calls[(address, "token_x")] = pair.functions.getTokenX()
+                directions.setdefault(address, (bin_step, set()))[1].add(token_in)
+
+        state = self.reader.read(calls)
+        if None in state.values():
+            raise Exception(f"Failed to read pool state: {[key for key, value in state.items() if value is None]}")
+
+        for (address, field), value in state.items():
+            if field in ("token0", "token_x"):
+                self._remember(address, {field: value})
+
+        pools = {}
+        for (token_in, _, bin_step, version), address in pairs.items():
+            if address is None or address in pools:
+                continue
+            if version == VERSION_V1:
+                reserve0, reserve1, _ = state[(address, "reserves")]
+                pools[address] = V1Pool(address, self._cached(address, "token0")["token0"], reserve0, reserve1)
+            else:
+                pools[address] = LBPool(
+                    address,
+                    bin_step,
+                    self._cached(address, "token_x")["token_x"],
+                    state[(address, "active_id")],
+                    FeeParameters(state[(address, "static_fees")], state[(address, "variable_fees")])
+                )
+
+        # First bin window of every LB pair in each direction a route swaps it
+        self.load_bins([
+            (pools[address], token_in == pools[address].token_x)
+            for address, (_, tokens_in) in directions.items()
+            for token_in in tokens_in
+        ])
+        return pools
+
+    def load_bins(self, requests) -> None:
+        """
+        Read the next window of bins for several (LBPool, swap_for_y) in one batch
+        """
+        calls = {}
+        for pool, swap_for_y in requests:
+            start = pool.next_id[swap_for_y]
+            if start is None or self._load_indexed_bins(pool, swap_for_y):
+                continue
+
+            pair = self.sonic.contracts.get(pool.address, "lbp")
+            step = -1 if swap_for_y else 1
+            ids = [start + step * offset for offset in range(self.window_bins)]
+            for bin_id in ids:
+                calls[(pool.address, swap_for_y, bin_id)] = pair.functions.getBin(bin_id)
+            calls[(pool.address, swap_for_y, "next")] = pair.functions.getNextNonEmptyBin(swap_for_y, ids[-1])
+
+        if not calls:
+            return
+
+        result = self.reader.read(calls)
+        for pool, swap_for_y in requests:
+            if pool.next_id[swap_for_y] is None:
+                continue
+
+            start = pool.next_id[swap_for_y]
+            step = -1 if swap_for_y else 1
+            for offset in range(self.window_bins):
+                bin_id = start + step * offset
+                reserves = result.get((pool.address, swap_for_y, bin_id))
+                if reserves is None:
+                    raise Exception(f"Failed to read bin {bin_id} of {pool.address}")
+                if reserves[0] or reserves[1]:
+                    pool.bins[swap_for_y].append((bin_id, reserves[0], reserves[1]))
+
+            next_id = result.get((pool.address, swap_for_y, "next"))
+            pool.next_id[swap_for_y] = None if next_id is None or next_id in NO_BIN else next_id
+
+    def _load_indexed_bins(self, pool, swap_for_y) -> bool:
+        """Take every bin of the connection's pair in the swap direction from its reserve index"""
+        if self.sonic.pair is None or pool.address != self.sonic.pair.pair:
+            return False
+
+        start = pool.next_id[swap_for_y]
+        try:
+            if swap_for_y:
+                bins = self.sonic.get_bin_reserves(NO_BIN[0], start)[::-1]
+            else:
+                bins = self.sonic.get_bin_reserves(start, NO_BIN[1])
+        except Exception as e:
+            app_logger.warning(f"Reserve index unavailable, reading the bins of {pool.address} instead: {e}")
+            return False
+
+        pool.bins[swap_for_y].extend(bins)
+        pool.next_id[swap_for_y] = None
+        return True
+
+    def quote(self, route, pairs, pools, amount_in, timestamp=None):
+        """
+        Simulate a route from loaded pools, reading further bin windows if a hop runs past them
+        Returns:
+            Quote: Simulated amounts, None if a pair is missing or cannot fill the amount
+        """
+        timestamp = int(timestamp or time.time())
+        hop_amounts = []
+        fees = []
+        route_pairs = []
+        amount = int(amount_in)
+
+        for hop in route.hops:
+            token_in = hop[0]
+            address = pairs.get(hop)
+            if address is None:
+                return None
+            pool = pools[address]
+            route_pairs.append(address)
+
+            if isinstance(pool, V1Pool):
+                fees.append(amount * V1_FEE_BPS // 10000)
+                amount = pool.amount_out(token_in, amount)
+            else:
+                swap_for_y = token_in == pool.token_x
+                while True:
+                    amount_left, amount_out, fee = simulate_swap_out(
+                        pool.bins[swap_for_y], pool.active_id, pool.bin_step, pool.fee_parameters,
+                        amount, swap_for_y, timestamp
+                    )
+                    if amount_left == 0 or pool.exhausted(swap_for_y):
+                        break
+                    self.load_bins([(pool, swap_for_y)])
+
+                if amount_left > 0:
+                    app_logger.debug(f"{address} cannot fill {amount} in, {amount_left} left over")
+                    return None
+                amount = amount_out
+                fees.append(fee)
+
+            hop_amounts.append(amount)
+
+        return Quote(route, route_pairs, int(amount_in), hop_amounts, fees)
+
+    def best_quote(self, routes, amount_in, timestamp=None):
+        """
+        Quote every candidate route from one set of batched reads and pick the largest output
+        Returns:
+            Quote: Best quote, None if no route can be quoted
+        """
+        pairs = self.resolve_pairs(routes)
+        pools = self.load_pools(pairs)
+
+        best = None
+        for route in routes:
+            quote = self.quote(route, pairs, pools, amount_in, timestamp)
+            app_logger.debug(f"Quoted {route.describe()}: {quote.amount_out if quote else 'unavailable'}")
+            if quote is not None and (best is None or quote.amount_out > best.amount_out):
+                best = quote
+        return best
+
+    def verify(self, quote, tolerance_bps=1) -> bool:
+        """
+        Cross-check the LB hops of a quote against the pairs' getSwapOut in one batch.
+
+        If a pair disagrees by more than the tolerance, the expected output is scaled
+        down by the shortfall so the minimum output stays on the safe side.
+        Returns:
+            bool: True if every LB hop matched
+        """
+        calls = {}
+        amount = quote.amount_in
+        for index, (hop, address) in enumerate(zip(quote.route.hops, quote.pairs)):
+            if hop[3] != VERSION_V1:
+                pair = self.sonic.contracts.get(address, "lbp", requires=("getSwapOut",))
+                token_x = self._cached(address, "token_x")["token_x"]
+                calls[index] = pair.functions.getSwapOut(amount, hop[0] == token_x)
+            amount = quote.hop_amounts[index]
+
+        matched = True
+        for index, result in self.reader.read(calls).items():
+            if result is None:
+                app_logger.warning(f"getSwapOut failed for {quote.pairs[index]}, quote unverified")
+                matched = False
+                continue
+
+            amount_in_left, onchain_out, _ = result
+            local_out = quote.hop_amounts[index]
+            if amount_in_left > 0 or abs(onchain_out - local_out) * 10000 > local_out * tolerance_bps:
+                app_logger.warning(
+                    f"Local quote for {quote.pairs[index]} differs from getSwapOut: "
+                    f"local {local_out}, on-chain {onchain_out}, {amount_in_left} in left"
+                )
+                matched = False
+                if onchain_out < local_out:
+                    quote.amount_out = quote.amount_out * onchain_out // local_out
+
+        quote.verified = matched
+        return matched
+
+    def received_amount(self, receipt, quote):
+        """
+        Output token amount the last pair of a quoted route transferred out in a receipt
+        Returns:
+            int: Amount in wei, None if the receipt has no such transfer
+        """
+        token_out = quote.route.tokens[-1].lower()
+        last_pair = quote.pairs[-1].lower()
+
+        received = None
+        for log in receipt.logs:
+            topics = [topic.hex() if not isinstance(topic, str) else topic for topic in log["topics"]]
+            topics = [topic if topic.startswith('0x') else '0x' + topic for topic in topics]
+            if len(topics) < 3 or topics[0] != TRANSFER_TOPIC or log["address"].lower() != token_out:
+                continue
+            if '0x' + topics[1][-40:] != last_pair:
+                continue
+            data = log["data"]
+            data = data.hex() if not isinstance(data, str) else data
+            received = (received or 0) + int(data[-64:], 16)
+        return received
@@ -0,0 +1,278 @@
+from datetime import datetime
+import json
+import logging
+import os
+
+from liquidity_shapes import position_bin_ids
+
+app_logger = logging.getLogger('app_logger')
+transaction_logger = logging.getLogger('transaction_logger')
+
+# Compiler artifact written by contracts/build.py, the executor is only used once its code matches it
+EXECUTOR_ARTIFACT = 'contracts/LBRebalanceExecutor.json'
+EXECUTOR_ABI = 'rebalance_executor_abi.json'
+
+
+def code_matches(artifact: dict, code: bytes) -> bool:
+    """
+    Check deployed runtime code against a compiler artifact, ignoring the bytes the constructor
+    fills with immutables
+    Args:
+        artifact (dict): Artifact from contracts/build.py
+        code (bytes): Runtime code read with eth_getCode
+    Returns:
+        bool: True if the code is what the artifact deploys
+    """
+    expected = bytes.fromhex(artifact["deployed_bytecode"].removeprefix("0x"))
+    deployed = bytearray(code)
+    if len(deployed) != len(expected):
+        return False
+
+    for start, length in artifact.get("immutable_references", []):
+        deployed[start:start + length] = bytes(length)
+    return bytes(deployed) == expected
+
+
+def load_verified_artifact(path=EXECUTOR_ARTIFACT, abi_path=EXECUTOR_ABI):
+    """
+    Load the executor's compiler artifact if it is committed and the bot's ABI was generated from it
+    Returns:
+        dict: The artifact, None if it is missing or does not match the ABI file
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r') as f:
+        artifact = json.load(f)
+    with open(abi_path, 'r') as f:
+        if json.load(f) != artifact["abi"]:
+            app_logger.error(f"{abi_path} was not generated from {path}, run python contracts/build.py")
+            return None
+    return artifact
+
+
+class RebalanceEngine:
+    """
+    Atomic remove → claim → add through a deployed LBRebalanceExecutor contract
+    (see contracts/LBRebalanceExecutor.sol).
+
+    The executor holds the position, so a rebalance is one transaction that claims the
+    old bins' rewards to the wallet, burns them and mints the new bins around the active
+    id using the connection's liquidity shape. There is one gas estimate and one confirmation per rebalance, and a revert leaves
+    the old position untouched instead of half-moved.
+
+    Positions opened by the wallet itself (before the executor was configured) are
+    removed and claimed the sequential way once, then re-deposited through the executor.
+    """
+
+    def __init__(self, connection, executor_address, id_slippage=10):
+        self.sonic = connection
+        self.address = connection.contracts.checksum(executor_address)
+        self.id_slippage = id_slippage
+
+    @property
+    def contract(self):
+        return self.sonic.contracts.get(self.address, "rebalance_executor")
+
+    def verified(self) -> bool:
+        """Check that the executor's on-chain code is the committed compiler artifact"""
+        artifact = load_verified_artifact()
+        if artifact is None:
+            app_logger.warning(f"No verified {EXECUTOR_ARTIFACT}, not using the executor at {self.address}")
+            return False
+
+        if not code_matches(artifact, self.sonic.web3.eth.get_code(self.address)):
+            app_logger.error(f"Code at {self.address} does not match {EXECUTOR_ARTIFACT}, not using the executor")
+            return False
+        return True
+
+    def holds(self, position) -> bool:
+        """Check whether a position is held by the executor rather than the wallet"""
+        return bool(position) and position.get("holder") == self.address
+
+    def top_up_amount(self, balance_wei: int, decimals: int) -> int:
+        """Wallet balance to add to the position, keeping one whole token in the wallet"""
+        return max(balance_wei - 10**decimals, 0)
+
+    def rebalance(self, position=None):
+        """
+        Move a position into the active bin in a single transaction
+        Args:
+            position: Current position, None to open the first one
+        Returns:
+            dict: Details of the new position if successful, False otherwise
+        """
+        try:
+            remove_ids = []
+            if position and not self.holds(position):
+                app_logger.info("Position is held by the wallet, migrating it to the rebalance executor")
+                if not self.sonic.remove_liquidity(position):
+                    return False
+                self.sonic.claim_rewards(position)
+
+            elif position:
+                remove_ids = position_bin_ids(position)
+
+            snapshot = self.sonic.get_cycle_snapshot(remove_ids, holder=self.address, spender=self.address)
+            token_x, token_y = snapshot["token_x"], snapshot["token_y"]
+            decimals_x, decimals_y = snapshot["decimals_x"], snapshot["decimals_y"]
+
+            # The executor pulls top-ups from the wallet, approve it once per token
+            approvals = []
+            if not self.sonic.allowance_sufficient(snapshot["allowance_x"], decimals_x):
+                approvals.append(self.sonic.approve_token(token_x, self.address, wait=False))
+            if not self.sonic.allowance_sufficient(snapshot["allowance_y"], decimals_y):
+                approvals.append(self.sonic.approve_token(token_y, self.address, wait=False))
+            if not all(self.sonic.confirm_all(approvals)):
+                return False
+
+            # Bins already emptied are left out of the burn
+            removals = [(bin_id, amount) for bin_id, amount in snapshot["bin_balances"].items() if amount > 0]
+            remove_ids = [bin_id for bin_id, _ in removals]
+            remove_amounts = [amount for _, amount in removals]
+
+            amount_x_wei = self.top_up_amount(snapshot["balance_x_wei"], decimals_x)
+            amount_y_wei = self.top_up_amount(snapshot["balance_y_wei"], decimals_y)
+
+            if not remove_ids and amount_x_wei == 0 and amount_y_wei == 0:
+                app_logger.error("No liquidity held or available to deposit")
+                return False
+
+            active_id = snapshot["active_id"]
+            delta_ids, distribution_x, distribution_y = self.sonic.shape.parameters()
+            rebalance_params = (
+                remove_ids,                 # removeIds
+                remove_amounts,             # removeAmounts
+                amount_x_wei,               # amountXIn
+                amount_y_wei,               # amountYIn
+                active_id,                  # activeIdDesired
+                self.id_slippage,           # idSlippage
+                delta_ids,                  # deltaIds
+                distribution_x,             # distributionX
+                distribution_y,             # distributionY
+                int(datetime.now().timestamp()) + 3600  # deadline
+            )
+
+            pending = self.sonic.executor.send(
+                self.contract.functions.rebalance(rebalance_params),
+                tx_type="REBALANCE",
+                details={
+                    "from_bins": remove_ids,
+                    "to_bin": active_id,
+                    **self.sonic.shape.describe()
+                },
+                failure_message="Rebalance transaction failed"
+            )
+
+            if not self.sonic.executor.wait(pending):
+                return False
+
+            # Amounts actually moved come from the executor's event, deposits net of the mint's refund
+            from web3.logs import DISCARD
+            events = self.contract.events.Rebalanced().process_receipt(pending.receipt, errors=DISCARD)
+            if not events:
+                raise Exception("Rebalance receipt has no Rebalanced event")
+            result = events[0]["args"]
+
+            size_x = result["depositedX"] / (10 ** decimals_x)
+            size_y = result["depositedY"] / (10 ** decimals_y)
+            pending.details.update({
+                "to_bin": result["activeId"],
+                "removed_x": f"{result['removedX'] / (10 ** decimals_x):.4f} {snapshot['symbol_x']}",
+                "removed_y": f"{result['removedY'] / (10 ** decimals_y):.4f} {snapshot['symbol_y']}",
+                "deposited_x": f"{size_x:.4f} {snapshot['symbol_x']}",
+                "deposited_y": f"{size_y:.4f} {snapshot['symbol_y']}",
+                "rewards_wei": result["rewards"]
+            })
+            self.sonic.executor.log_transaction(pending)
+
+            return {
+                "bin_id": result["activeId"],
+                "bin_ids": list(result["depositIds"]),
+                **self.sonic.shape.describe(),
+                "token_x": token_x,
+                "token_y": token_y,
+                "size_x": size_x,
+                "size_y": size_y,
+                "to_address": self.sonic.wallet_address,
+                "holder": self.address
+            }
+
+        except Exception as e:
+            transaction_logger.error(f"Failed to rebalance: {e}")
+            return False
+
+    def claim(self, position, wait: bool = True):
+        """
+        Claim the rewards of an executor-held position to the wallet
+        Args:
+            position: Dictionary containing position details
+            wait: Wait for the receipt, otherwise return the PendingTransaction for confirm_all
+        Returns:
+            bool: True if rewards were successfully claimed, False otherwise
+        """
+        try:
+            bin_ids = position_bin_ids(position)
+
+            snapshot = self.sonic.get_cycle_snapshot(bin_ids, holder=self.address, spender=self.address)
+            pending_rewards = snapshot["pending_rewards_wei"] / (10 ** 18)
+
+            if pending_rewards > 0:
+                symbol = self.sonic.get_token_symbol(self.sonic.metro_token_address)
+                pending = self.sonic.executor.send(
+                    self.contract.functions.claim(bin_ids),
+                    tx_type="CLAIM_REWARDS",
+                    details={
+                        "bin_ids": bin_ids,
+                        "amount": f"{pending_rewards:.4f} {symbol}",
+                        "holder": self.address
+                    },
+                    failure_message="Failed to claim rewards"
+                )
+
+                if not wait:
+                    return pending
+
+                return self.sonic.confirm(pending)
+            else:
+                transaction_logger.info("No rewards to claim")
+                return False
+
+        except Exception as e:
+            transaction_logger.error(f"Failed to claim rewards: {e}")
+            return False
+
+    def withdraw(self, position) -> bool:
+        """
+        Claim and burn an executor-held position back to the wallet
+        Args:
+            position: Dictionary containing position details
+        Returns:
+            bool: True if the position was withdrawn, False otherwise
+        """
+        try:
+            snapshot = self.sonic.get_cycle_snapshot(
+                position_bin_ids(position),
+                holder=self.address,
+                spender=self.address
+            )
+            bin_ids = [bin_id for bin_id, amount in snapshot["bin_balances"].items() if amount > 0]
+            amounts = [snapshot["bin_balances"][bin_id] for bin_id in bin_ids]
+
+            if not bin_ids:
+                return True
+
+            return self.sonic.executor.execute(
+                self.contract.functions.withdraw(bin_ids, amounts),
+                tx_type="REMOVE_LIQUIDITY",
+                details={
+                    "bin_ids": bin_ids,
+                    "amount": sum(amounts),
+                    "holder": self.address
+                },
+                failure_message="Withdraw transaction failed"
+            )
+
+        except Exception as e:
+            transaction_logger.error(f"Failed to withdraw liquidity: {e}")
+            return False
@@ -0,0 +1,306 @@
+"""
+Reserve index of every non-empty bin of a pair.
+
+`load` walks the pair outwards from the active bin in both directions, reading a
+window of `getBin` and `totalSupply` per direction and jumping over empty stretches
+with `getNextNonEmptyBin`, all in one batch per round. After that, `refresh` applies
+the pair's `Swap`, `DepositedToBins`, `WithdrawnFromBins` and `TransferBatch` logs
+since the indexed block instead of rescanning, in getLogs requests of at most
+`max_log_blocks` blocks, halved when the RPC still rejects them as too large. A gap
+of more than `reload_blocks`, a reorg of the indexed block or a removed log makes
+the next refresh reload from scratch.
+
+Bin ids are kept in one sorted int64 array with the reserves and supplies in aligned
+lists of exact ints. Fenwick trees over X, Y and liquidity answer range sums, so
+lookups and range sums are O(log n). A bin that empties keeps its slot, and a new
+bin costs an O(n) rebuild, which only deposits outside the existing range cause.
+
+Swap logs report the amount in net of the protocol fee, which leaves the pair, so a
+swap moves a bin's reserves by amountsIn - amountsOut.
+"""
+import logging
+
+from event_store import EventDecoder
+from log_ingestion import is_range_error
+from lb_math import SCALE_OFFSET, get_prices_from_ids
+
+app_logger = logging.getLogger('app_logger')
+
+# getNextNonEmptyBin returns one of these when there is no liquidity left in a direction
+NO_BIN = (0, (1 << 24) - 1)
+
+ZERO_ADDRESS = bytes(20)
+
+
+class FenwickTree:
+    """Prefix sums of exact ints with O(log n) point updates and range queries"""
+
+    def __init__(self, values):
+        self.tree = [0] + list(values)
+        for index in range(1, len(self.tree)):
+            parent = index + (index & -index)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[index]
+
+    def add(self, position, delta) -> None:
+        index = position + 1
+        while index < len(self.tree):
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, position) -> int:
+        """Sum of the first `position` values"""
+        total = 0
+        while position > 0:
+            total += self.tree[position]
+            position -= position & -position
+        return total
+
+    def range(self, start, end) -> int:
+        """Sum of the values at positions start to end - 1"""
+        return self.prefix(end) - self.prefix(start)
+
+
+class BinReserveIndex:
+    """
+    Reserves and LB token supply per bin of one pair
+    - contract: pair contract from the pool
+    - bin_step: the pair's bin step, for bin prices
+    - window_bins: bins read per direction and round while loading
+    - max_log_blocks: blocks per getLogs request while refreshing
+    - reload_blocks: gaps longer than this are reloaded rather than replayed from logs
+    """
+
+    def __init__(self, web3, reader, contract, bin_step, window_bins=50, max_log_blocks=2000, reload_blocks=10000):
+        import numpy as np
+
+        self.web3 = web3
+        self.reader = reader
+        self.contract = contract
+        self.bin_step = int(bin_step)
+        self.window_bins = window_bins
+        self.max_log_blocks = int(max_log_blocks)
+        self.reload_blocks = int(reload_blocks)
+        self.decoder = EventDecoder(web3.codec, contract.abi)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.reserve_x = []
+        self.reserve_y = []
+        self.supply = []
+        self.prices = []
+        self.tree_x = self.tree_y = self.tree_liquidity = None
+        self.block = None
+        self.block_hash = None
+        self.stale = True
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def load(self, block=None) -> int:
+        """
+        Index every non-empty bin at a block
+        Args:
+            block (int): Block to index at, latest if not set
+        Returns:
+            int: Number of bins indexed
+        """
+        block = block if block is not None else self.web3.eth.block_number
+        lbp = self.contract.functions
+
+        active_id = self.reader.read({"active_id": lbp.getActiveId()}, block_identifier=block)["active_id"]
+        if active_id is None:
+            raise Exception(f"Failed to read the active id of {self.contract.address} at block {block}")
+
+        # Bins below the active one are walked downwards, the active bin and above upwards
+        cursors = {True: active_id - 1, False: active_id}
+        found = {}
+        while cursors:
+            calls = {}
+            for swap_for_y, start in cursors.items():
+                step = -1 if swap_for_y else 1
+                ids = [start + step * offset for offset in range(self.window_bins)]
+                for bin_id in ids:
+                    calls[("bin", bin_id)] = lbp.getBin(bin_id)
+                    calls[("supply", bin_id)] = lbp.totalSupply(bin_id)
+                calls[("next", swap_for_y)] = lbp.getNextNonEmptyBin(swap_for_y, ids[-1])
+
+            result = self.reader.read(calls, block_identifier=block)
+            for key, value in result.items():
+                if value is None:
+                    raise Exception(f"Failed to read {key} of {self.contract.address} at block {block}")
+                if key[0] == "bin" and (value[0] or value[1]):
+                    found[key[1]] = (value[0], value[1], result[("supply", key[1])])
+
+            cursors = {
+                swap_for_y: result[("next", swap_for_y)] for swap_for_y in cursors
+                if result[("next", swap_for_y)] not in NO_BIN
+            }
+
+        self._build(sorted(found), found)
+        self.block = block
+        self.block_hash = self.web3.eth.get_block(block)["hash"]
+        self.stale = False
+        app_logger.debug(f"Indexed {len(self.ids)} bins of {self.contract.address} at block {block}")
+        return len(self.ids)
+
+    def _build(self, bin_ids, values) -> None:
+        import numpy as np
+
+        self.ids = np.array(bin_ids, dtype=np.int64)
+        self.reserve_x = [values[bin_id][0] for bin_id in bin_ids]
+        self.reserve_y = [values[bin_id][1] for bin_id in bin_ids]
+        self.supply = [values[bin_id][2] for bin_id in bin_ids]
+        self.prices = list(get_prices_from_ids(self.ids, self.bin_step))
+        self.tree_x = FenwickTree(self.reserve_x)
+        self.tree_y = FenwickTree(self.reserve_y)
+        self.tree_liquidity = FenwickTree(
+            price * x + (y << SCALE_OFFSET) for price, x, y in zip(self.prices, self.reserve_x, self.reserve_y)
+        )
+
+    def _position(self, bin_id) -> int:
+        """Slot of a bin, inserting an empty one if it is not indexed yet"""
+        import numpy as np
+
+        position = int(np.searchsorted(self.ids, bin_id))
+        if position < len(self.ids) and self.ids[position] == bin_id:
+            return position
+
+        values = {
+            int(indexed): (x, y, supply)
+            for indexed, x, y, supply in zip(self.ids, self.reserve_x, self.reserve_y, self.supply)
+        }
+        values[int(bin_id)] = (0, 0, 0)
+        self._build(sorted(values), values)
+        return position
+
+    def _update(self, bin_id, delta_x=0, delta_y=0, delta_supply=0) -> None:
+        position = self._position(bin_id)
+        self.reserve_x[position] += delta_x
+        self.reserve_y[position] += delta_y
+        self.supply[position] += delta_supply
+        self.tree_x.add(position, delta_x)
+        self.tree_y.add(position, delta_y)
+        self.tree_liquidity.add(position, self.prices[position] * delta_x + (delta_y << SCALE_OFFSET))
+
+    def apply(self, logs) -> None:
+        """
+        Apply the pair's raw logs after the indexed block, marking the index stale on a removed log
+        Args:
+            logs (list): Raw logs of the pair, in chain order
+        """
+        if any(log.get("removed") for log in logs):
+            self.stale = True
+            return
+
+        rows = self.decoder.decode(logs)
+        for _, _, bin_id, in_x, in_y, out_x, out_y, *_ in rows["swaps"]:
+            self._update(bin_id, in_x - out_x, in_y - out_y)
+        for _, _, bin_id, amount_x, amount_y in rows["deposits"]:
+            self._update(bin_id, amount_x, amount_y)
+        for _, _, bin_id, amount_x, amount_y in rows["withdrawals"]:
+            self._update(bin_id, -amount_x, -amount_y)
+
+        # Supply only changes on mints from and burns to the zero address
+        for _, _, bin_id, sender, receiver, amount in rows["transfers"]:
+            if sender == ZERO_ADDRESS:
+                self._update(bin_id, delta_supply=amount)
+            elif receiver == ZERO_ADDRESS:
+                self._update(bin_id, delta_supply=-amount)
+
+    def refresh(self, to_block=None) -> int:
+        """
+        Bring the index up to a block from the pair's logs, reloading it if it is stale or was reorged
+        Args:
+            to_block (int): Block to index up to, latest if not set
+        Returns:
+            int: Block the index is at
+        """
+        to_block = to_block if to_block is not None else self.web3.eth.block_number
+        if not self.stale and self.web3.eth.get_block(self.block)["hash"] != self.block_hash:
+            app_logger.info(f"Block {self.block} of the reserve index was reorged, reloading")
+            self.stale = True
+
+        if not self.stale and to_block - self.block > self.reload_blocks:
+            app_logger.info(f"Reserve index is {to_block - self.block} blocks behind, reloading")
+            self.stale = True
+
+        if self.stale:
+            self.load(to_block)
+            return self.block
+
+        if to_block > self.block:
+            self.apply(self._get_logs(self.block + 1, to_block))
+            if self.stale:
+                self.load(to_block)
+                return self.block
+
+            self.block = to_block
+            self.block_hash = self.web3.eth.get_block(to_block)["hash"]
+
+        return self.block
+
+    def _get_logs(self, start, end) -> list:
+        """The pair's logs from start to end inclusive, in requests the RPC accepts"""
+        logs = []
+        chunk_blocks = self.max_log_blocks
+        while start <= end:
+            chunk_end = min(start + chunk_blocks - 1, end)
+            try:
+                logs.extend(self.web3.eth.get_logs({
+                    "address": self.contract.address,
+                    "fromBlock": start,
+                    "toBlock": chunk_end,
+                    "topics": [self.decoder.topics]
+                }))
+            except Exception as e:
+                if not is_range_error(e) or chunk_blocks == 1:
+                    raise
+                chunk_blocks = max(chunk_blocks // 2, 1)
+                continue
+            start = chunk_end + 1
+
+        return logs
+
+    def get(self, bin_id) -> tuple:
+        """
+        Reserves and supply of one bin
+        Returns:
+            tuple: (reserve_x, reserve_y, total_supply), zeros for a bin that is not indexed
+        """
+        import numpy as np
+
+        position = int(np.searchsorted(self.ids, bin_id))
+        if position < len(self.ids) and self.ids[position] == bin_id:
+            return self.reserve_x[position], self.reserve_y[position], self.supply[position]
+        return 0, 0, 0
+
+    def _slots(self, low_id, high_id) -> tuple:
+        import numpy as np
+
+        return int(np.searchsorted(self.ids, low_id, side="left")), int(np.searchsorted(self.ids, high_id, side="right"))
+
+    def range_reserves(self, low_id, high_id) -> tuple:
+        """
+        Total reserves of the bins from low_id to high_id inclusive
+        Returns:
+            tuple: (reserve_x, reserve_y)
+        """
+        start, end = self._slots(low_id, high_id)
+        return self.tree_x.range(start, end), self.tree_y.range(start, end)
+
+    def range_liquidity(self, low_id, high_id) -> int:
+        """Liquidity of the bins from low_id to high_id inclusive, sum of price * x + y in 128.128"""
+        start, end = self._slots(low_id, high_id)
+        return self.tree_liquidity.range(start, end)
+
+    def bins(self, low_id, high_id) -> list:
+        """
+        Non-empty bins from low_id to high_id inclusive, in id order
+        Returns:
+            list: (bin_id, reserve_x, reserve_y) tuples
+        """
+        start, end = self._slots(low_id, high_id)
+        return [
+            (int(self.ids[position]), self.reserve_x[position], self.reserve_y[position])
+            for position in range(start, end)
+            if self.reserve_x[position] or self.reserve_y[position]
+        ]
@@ -0,0 +1,205 @@
+"""
+Route discovery and split orders for reward liquidation.
+
+RouteFinder builds the pair graph between the input, output and a few intermediate
+tokens from the V1 factory (`getPair`) and the Liquidity Book factory
+(`getAllLBPairs`, every bin step at once). It then enumerates every router path up
+to `max_hops` with each available pair per hop. The graph is cached in the metadata
+registry and rediscovered after `graph_ttl` seconds, so new pairs are picked up.
+
+`best_split` quotes all paths from one set of pool reads (see quoter.SwapQuoter) and
+hands the amount out in slices, each to the path with the best marginal output. A
+path that is not used yet only gets a slice if it beats the paths in use by
+`min_gain_bps`, since every extra path costs another swap transaction. Paths that
+share a pair with a path already in use are skipped: their quotes assume the pair
+is untouched.
+"""
+import itertools
+import logging
+import time
+
+from quoter import VERSION_V1, VERSION_V2_1, ZERO_ADDRESS, Route
+
+app_logger = logging.getLogger('app_logger')
+
+
+class SplitPlan:
+    """Amount per route for one trade, each allocation quoted on its own"""
+
+    def __init__(self, quotes):
+        self.quotes = quotes
+
+    @property
+    def amount_in(self) -> int:
+        return sum(quote.amount_in for quote in self.quotes)
+
+    @property
+    def amount_out(self) -> int:
+        return sum(quote.amount_out for quote in self.quotes)
+
+    def describe(self, symbols=None) -> dict:
+        return {
+            "amount_in": self.amount_in,
+            "amount_out": self.amount_out,
+            "routes": [quote.describe(symbols) for quote in self.quotes]
+        }
+
+
+class RouteFinder:
+    """Enumerates router paths between two tokens and splits trades across them"""
+
+    def __init__(self, quoter, intermediates=(), max_hops=2, graph_ttl=86400):
+        self.quoter = quoter
+        self.intermediates = [quoter.sonic.contracts.checksum(token) for token in intermediates]
+        self.max_hops = max_hops
+        self.graph_ttl = graph_ttl
+
+    @staticmethod
+    def _graph_key(token_a, token_b) -> str:
+        token_a, token_b = sorted((token_a, token_b), key=str.lower)
+        return f"graph_{token_a}_{token_b}"
+
+    def pair_options(self, token_pairs) -> dict:
+        """
+        Pairs available between each pair of tokens, discovered in one batch for stale entries
+        Args:
+            token_pairs (iterable): (token_a, token_b) tuples
+        Returns:
+            dict: {(token_a, token_b): [(version, bin_step, pair address)]}
+        """
+        factories = self.quoter.factories()
+        lb_factory = factories["lb_factory"]
+        contracts = self.quoter.sonic.contracts
+        now = time.time()
+
+        options = {}
+        calls = {}
+        for token_a, token_b in token_pairs:
+            key = self._graph_key(token_a, token_b)
+            cached = self.quoter._cached(lb_factory, key)
+            if cached and now - cached[key]["checked_at"] < self.graph_ttl:
+                options[(token_a, token_b)] = [tuple(option) for option in cached[key]["pairs"]]
+                continue
+
+            calls[(token_a, token_b, VERSION_V1)] = contracts.get(
+                factories["v1_factory"], "v1_factory"
+            ).functions.getPair(token_a, token_b)
+            calls[(token_a, token_b, VERSION_V2_1)] = contracts.get(
+                lb_factory, "lb_factory"
+            ).functions.getAllLBPairs(token_a, token_b)
+
+        discovered = {}
+        for (token_a, token_b, version), value in (self.quoter.reader.read(calls) if calls else {}).items():
+            if value is None:
+                # A failed lookup is retried next time rather than cached as no pairs
+                continue
+            found = discovered.setdefault((token_a, token_b), [])
+            if version == VERSION_V1:
+                if value != ZERO_ADDRESS:
+                    found.append((VERSION_V1, 0, contracts.checksum(value)))
+            else:
+                for bin_step, pair, _, ignored in value:
+                    if not ignored:
+                        found.append((VERSION_V2_1, int(bin_step), contracts.checksum(pair)))
+
+        if discovered:
+            self.quoter._remember(lb_factory, {
+                self._graph_key(token_a, token_b): {"pairs": [list(option) for option in found], "checked_at": now}
+                for (token_a, token_b), found in discovered.items()
+            })
+            self.quoter.remember_pairs({
+                (token_a, token_b, bin_step, version): pair
+                for (token_a, token_b), found in discovered.items()
+                for version, bin_step, pair in found
+            })
+        options.update(discovered)
+        return options
+
+    def routes(self, token_in, token_out) -> list:
+        """
+        Every path from token_in to token_out through the intermediates, one route per pair combination
+        Returns:
+            list: Route objects
+        """
+        contracts = self.quoter.sonic.contracts
+        token_in, token_out = contracts.checksum(token_in), contracts.checksum(token_out)
+        intermediates = [token for token in self.intermediates if token not in (token_in, token_out)]
+
+        token_paths = [[token_in, token_out]]
+        for hops in range(2, self.max_hops + 1):
+            for middle in itertools.permutations(intermediates, hops - 1):
+                token_paths.append([token_in, *middle, token_out])
+
+        hops = {(a, b) for path in token_paths for a, b in zip(path[:-1], path[1:])}
+        options = self.pair_options(sorted(hops))
+
+        routes = []
+        for path in token_paths:
+            hop_options = [options.get((a, b), []) for a, b in zip(path[:-1], path[1:])]
+            for combination in itertools.product(*hop_options):
+                routes.append(Route(
+                    path,
+                    [bin_step for _, bin_step, _ in combination],
+                    [version for version, _, _ in combination]
+                ))
+        return routes
+
+    def best_split(self, token_in, token_out, amount_in, slices=10, max_routes=3, min_gain_bps=10, timestamp=None):
+        """
+        Split an amount across the paths between two tokens to maximise the total output
+        Args:
+            token_in (str): Token sold
+            token_out (str): Token bought
+            amount_in (int): Amount sold in wei
+            slices (int): Pieces the amount is allocated in
+            max_routes (int): Most paths, and so swap transactions, to split across
+            min_gain_bps (int): Extra output a new path's slice must give over the paths in use
+        Returns:
+            SplitPlan: Quoted allocation per path, None if no path can be quoted
+        """
+        routes = self.routes(token_in, token_out)
+        if not routes:
+            return None
+
+        pairs = self.quoter.resolve_pairs(routes)
+        pools = self.quoter.load_pools(pairs)
+        timestamp = int(timestamp or time.time())
+
+        amount_in = int(amount_in)
+        slice_amount = amount_in // slices
+        allocated = {}
+        quotes = {}
+
+        for index in range(slices):
+            amount = slice_amount if index < slices - 1 else amount_in - slice_amount * (slices - 1)
+            if amount == 0:
+                continue
+
+            used_pairs = {pair for used in allocated for pair in quotes[used].pairs}
+            best = None
+            for route_index, route in enumerate(routes):
+                in_use = route_index in allocated
+                if not in_use and len(allocated) >= max_routes:
+                    continue
+
+                quote = self.quoter.quote(route, pairs, pools, allocated.get(route_index, 0) + amount, timestamp)
+                if quote is None or (not in_use and used_pairs.intersection(quote.pairs)):
+                    continue
+
+                gain = quote.amount_out - (quotes[route_index].amount_out if in_use else 0)
+                # Opening another path costs a transaction, so it has to win clearly
+                threshold = gain * 10000 if in_use else gain * (10000 - min_gain_bps)
+                if best is None or threshold > best[0]:
+                    best = (threshold, route_index, quote)
+
+            if best is None:
+                app_logger.debug(f"No path can take another {amount} of {token_in}")
+                return None
+
+            _, route_index, quote = best
+            allocated[route_index] = quote.amount_in
+            quotes[route_index] = quote
+
+        plan = SplitPlan(list(quotes.values()))
+        app_logger.debug(f"Split over {len(routes)} paths: {plan.describe()}")
+        return plan
@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+
+app_logger = logging.getLogger('app_logger')
+
+# Sections of the consolidated state document and the per-cycle files they replace
+LEGACY_FILES = {
+    "time": "{prefix}_time.json",
+    "price": "{prefix}_price.json",
+    "position": "{prefix}_position.json",
+    "failures": "{prefix}_failures.json"
+}
+
+
+class StateConflict(Exception):
+    """Raised when the stored state changed since it was loaded"""
+
+
+class StateStore:
+    """
+    Consolidated per-pair state document, read once and written once per cycle.
+
+    The document holds the `time`, `price`, `position` and `failures` sections that
+    used to live in four separate files. Writes are conditional on the generation
+    returned by `load`, so a concurrent writer raises StateConflict instead of
+    silently interleaving with this cycle's state. The caller then merges the sections
+    it changed onto the reloaded document and writes again.
+
+    Backends implement `_read(filename) -> (data, generation)` and
+    `_write(filename, data, generation) -> generation`, with generation 0 meaning
+    the document does not exist yet.
+    """
+
+    def state_file(self, prefix) -> str:
+        return f"{prefix}_state.json"
+
+    def load(self, prefix) -> tuple:
+        """
+        Load the state document for a pair, migrating the legacy per-section files on first use
+        Args:
+            prefix (str): Pair file prefix, e.g. "WS_USDC"
+        Returns:
+            tuple: (state dict, generation)
+        """
+        state, generation = self._read(self.state_file(prefix))
+        if state is not None:
+            return state, generation
+
+        state = {}
+        for section, filename in LEGACY_FILES.items():
+            legacy, _ = self._read(filename.format(prefix=prefix))
+            if legacy is not None:
+                state[section] = legacy
+
+        if state:
+            app_logger.info(f"Migrated legacy state files for {prefix}: {sorted(state)}")
+
+        return state, 0
+
+    def save(self, prefix, state, generation) -> int:
+        """
+        Write the state document if it is unchanged since it was loaded
+        Args:
+            prefix (str): Pair file prefix
+            state (dict): State document
+            generation (int): Generation returned by load, or by the previous save
+        Returns:
+            int: New generation
+        """
+        return self._write(self.state_file(prefix), state, generation)
+
+    def _read(self, filename) -> tuple:
+        raise NotImplementedError
+
+    def _write(self, filename, data, generation) -> int:
+        raise NotImplementedError
+
+
+class GCSStateStore(StateStore):
+    """State store backed by a CloudStorageHandler bucket using generation-match writes"""
+
+    def __init__(self, storage_handler):
+        self.storage = storage_handler
+
+    def _read(self, filename) -> tuple:
+        return self.storage.read_json_with_generation(filename)
+
+    def _write(self, filename, data, generation) -> int:
+        from google.api_core.exceptions import PreconditionFailed
+
+        try:
+            return self.storage.write_json_if_generation(filename, data, generation)
+        except PreconditionFailed as e:
+            raise StateConflict(f"{filename} changed since generation {generation}: {e}")
+
+
+class LocalStateStore(StateStore):
+    """State store backed by a local directory, using file modification times as generations"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _generation(self, path) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _read(self, filename) -> tuple:
+        path = os.path.join(self.directory, filename)
+        try:
+            generation = self._generation(path)
+            with open(path, 'r') as f:
+                return json.load(f), generation
+        except FileNotFoundError:
+            return None, 0
+
+    def _write(self, filename, data, generation) -> int:
+        path = os.path.join(self.directory, filename)
+        if self._generation(path) != generation:
+            raise StateConflict(f"{filename} changed since generation {generation}")
+
+        with open(path + '.tmp', 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+        return self._generation(path)
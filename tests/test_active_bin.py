@@ -0,0 +1,89 @@
+"""
+Following a pair's active id through its Swap logs, including logs a reorg removed.
+"""
+from active_bin import ActiveBinTracker
+from lb_math import REAL_ID_SHIFT, get_price_from_id
+
+PAIR = "0x" + "22" * 20
+BIN_STEP = 25
+
+
+def swap_log(block, index, active_id, block_hash=None, removed=False) -> dict:
+    """Raw Swap log as sent by eth_subscribe, with the active id as the first data word"""
+    return {
+        "blockNumber": hex(block),
+        "logIndex": hex(index),
+        "blockHash": block_hash or "0x" + f"{block:064x}",
+        "data": "0x" + f"{active_id:064x}" + "00" * 32,
+        "removed": removed
+    }
+
+
+def synced_tracker(active_id=REAL_ID_SHIFT) -> ActiveBinTracker:
+    tracker = ActiveBinTracker(PAIR, BIN_STEP)
+    tracker.sync(active_id)
+    return tracker
+
+
+def test_logs_move_the_active_id():
+    tracker = synced_tracker()
+    assert tracker.apply([swap_log(10, 0, REAL_ID_SHIFT + 1), swap_log(10, 1, REAL_ID_SHIFT + 3)])
+    assert tracker.active_id == REAL_ID_SHIFT + 3
+    assert tracker.raw_price == get_price_from_id(REAL_ID_SHIFT + 3, BIN_STEP)
+
+    # The same log delivered twice is not a move
+    assert not tracker.apply([swap_log(10, 1, REAL_ID_SHIFT + 3)])
+    assert not tracker.stale
+
+
+def test_removed_log_marks_the_tracker_stale():
+    tracker = synced_tracker()
+    tracker.apply([swap_log(10, 0, REAL_ID_SHIFT + 1)])
+
+    assert not tracker.apply([swap_log(10, 0, REAL_ID_SHIFT + 1, removed=True)])
+    assert tracker.stale
+    assert tracker.needs_cycle()
+
+
+def test_stale_tracker_ignores_logs_until_synced():
+    tracker = synced_tracker()
+    tracker.apply([swap_log(10, 0, REAL_ID_SHIFT + 1, removed=True), swap_log(11, 0, REAL_ID_SHIFT + 5)])
+    assert tracker.stale
+    assert tracker.active_id == REAL_ID_SHIFT
+
+    # The replacement chain's logs keep being ignored until the id is read from chain again
+    assert not tracker.apply([swap_log(12, 0, REAL_ID_SHIFT + 6)])
+    assert tracker.active_id == REAL_ID_SHIFT
+
+    assert tracker.sync(REAL_ID_SHIFT + 6)
+    assert tracker.apply([swap_log(13, 0, REAL_ID_SHIFT + 7)])
+    assert tracker.active_id == REAL_ID_SHIFT + 7
+
+
+def test_removed_log_alone_in_a_batch_stays_stale():
+    tracker = synced_tracker()
+    assert not tracker.apply([swap_log(10, 0, REAL_ID_SHIFT + 1, removed=True)])
+    assert tracker.stale
+    assert tracker.active_id == REAL_ID_SHIFT
+
+
+def test_older_log_or_new_block_hash_is_a_reorg():
+    tracker = synced_tracker()
+    tracker.apply([swap_log(10, 2, REAL_ID_SHIFT + 1)])
+    tracker.apply([swap_log(10, 1, REAL_ID_SHIFT + 2)])
+    assert tracker.stale
+
+    tracker = synced_tracker()
+    tracker.apply([swap_log(10, 0, REAL_ID_SHIFT + 1)])
+    tracker.apply([swap_log(10, 1, REAL_ID_SHIFT + 2, block_hash="0x" + "ab" * 32)])
+    assert tracker.stale
+
+
+def test_watched_range_decides_whether_a_move_needs_a_cycle():
+    tracker = synced_tracker()
+    tracker.watch([REAL_ID_SHIFT - 2, REAL_ID_SHIFT + 2], distance_bins=1)
+    tracker.apply([swap_log(10, 0, REAL_ID_SHIFT + 2)])
+    assert not tracker.needs_cycle()
+
+    tracker.apply([swap_log(10, 1, REAL_ID_SHIFT + 3)])
+    assert tracker.needs_cycle()
@@ -0,0 +1,174 @@
+"""
+Property tests of the Liquidity Book integer math, over seeded random pairs and bins.
+
+The swap comparison against the pair's own `getSwapOut` needs a fixture file recorded
+from a live pair with `python lb_math.py record`, and is skipped until one is committed.
+"""
+import json
+import os
+import random
+
+import pytest
+
+from lb_math import (
+    LB_FIXTURES, REAL_ID_SHIFT, FeeParameters, check_fixtures, get_amounts_out_of_bin, get_id_from_price,
+    get_liquidity, get_price_from_id, mint_bin, simulate_swap_out
+)
+
+BIN_STEPS = (1, 2, 5, 10, 15, 20, 25, 50, 100)
+CASES = 500
+
+# Fee parameters of a typical volatile pair, no swap yet
+STATIC_FEES = (5000, 30, 600, 5000, 30000, 1000, 350000)
+VARIABLE_FEES = (0, 0, REAL_ID_SHIFT, 0)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), LB_FIXTURES)
+
+
+def random_bin_id(rng, bin_step, spread=5000) -> int:
+    # Stay within the ids whose prices fit 128.128 for the largest bin steps
+    return REAL_ID_SHIFT + rng.randint(-spread, spread) * min(10, 100 // bin_step)
+
+
+def test_id_from_price_round_trip():
+    rng = random.Random(1)
+    for _ in range(CASES):
+        bin_step = rng.choice(BIN_STEPS)
+        bin_id = random_bin_id(rng, bin_step)
+        price = get_price_from_id(bin_id, bin_step)
+        assert get_id_from_price(price, bin_step) == bin_id
+
+        # Between two bins the log ratio is truncated towards id 2^23
+        between = (price + get_price_from_id(bin_id + 1, bin_step)) // 2
+        assert get_id_from_price(between, bin_step) == (bin_id if bin_id >= REAL_ID_SHIFT else bin_id + 1)
+
+
+def test_prices_increase_with_id():
+    rng = random.Random(2)
+    for _ in range(CASES):
+        bin_step = rng.choice(BIN_STEPS)
+        bin_id = random_bin_id(rng, bin_step)
+        assert get_price_from_id(bin_id, bin_step) < get_price_from_id(bin_id + 1, bin_step)
+
+
+def test_mint_then_burn_conserves_amounts():
+    rng = random.Random(3)
+    for _ in range(CASES):
+        bin_step = rng.choice(BIN_STEPS)
+        # Prices where 1e24 token amounts still fit a bin's 256 bit liquidity
+        active_id = random_bin_id(rng, bin_step, spread=200)
+        bin_id = active_id + rng.randint(-20, 20)
+        price = get_price_from_id(bin_id, bin_step)
+
+        empty = rng.random() < 0.2
+        reserve_x = 0 if empty or bin_id < active_id else rng.randint(1, 10**24)
+        reserve_y = 0 if empty or bin_id > active_id else rng.randint(1, 10**24)
+        total_supply = 0 if empty else max(get_liquidity(reserve_x, reserve_y, price) >> rng.randint(0, 80), 1)
+        amount_x = rng.randint(1, 10**22) if bin_id >= active_id else 0
+        amount_y = rng.randint(1, 10**22) if bin_id <= active_id else 0
+
+        deposit = mint_bin(
+            reserve_x, reserve_y, total_supply, amount_x, amount_y, bin_id, active_id, bin_step,
+            FeeParameters(STATIC_FEES, VARIABLE_FEES)
+        )
+        assert deposit.amount_x <= amount_x and deposit.amount_y <= amount_y
+
+        burnt_x, burnt_y = get_amounts_out_of_bin(
+            reserve_x + deposit.amount_x - deposit.protocol_fee_x,
+            reserve_y + deposit.amount_y - deposit.protocol_fee_y,
+            deposit.shares,
+            total_supply + deposit.shares
+        )
+        # Burning the shares straight back never gains value, and outside the active bin loses at most rounding
+        assert get_liquidity(burnt_x, burnt_y, price) <= get_liquidity(deposit.amount_x, deposit.amount_y, price)
+        if bin_id != active_id:
+            assert deposit.amount_x - 1 <= burnt_x <= deposit.amount_x
+            assert deposit.amount_y - 1 <= burnt_y <= deposit.amount_y
+        if empty:
+            assert (burnt_x, burnt_y) == (deposit.amount_x, deposit.amount_y)
+
+
+def test_simulate_swap_out_accounts_for_every_token():
+    rng = random.Random(4)
+    for _ in range(CASES):
+        bin_step = rng.choice(BIN_STEPS)
+        active_id = random_bin_id(rng, bin_step, spread=200)
+        swap_for_y = rng.random() < 0.5
+        step = -1 if swap_for_y else 1
+        bins = [
+            (active_id + step * offset, rng.randint(0, 10**21), rng.randint(0, 10**21))
+            for offset in range(rng.randint(1, 10))
+        ]
+        reserves_out = sum(y if swap_for_y else x for _, x, y in bins)
+        fee_parameters = FeeParameters(STATIC_FEES, VARIABLE_FEES)
+
+        amount_in = rng.randint(1, 10**22)
+        amount_in_left, amount_out, fee = simulate_swap_out(bins, active_id, bin_step, fee_parameters, amount_in, swap_for_y, 0)
+        assert 0 <= amount_in_left <= amount_in
+        assert 0 <= fee <= amount_in - amount_in_left
+        assert amount_out <= reserves_out
+        if amount_in_left:
+            assert amount_out == reserves_out
+
+        # More in never gives less out
+        _, more_out, _ = simulate_swap_out(bins, active_id, bin_step, fee_parameters, amount_in * 2, swap_for_y, 0)
+        assert more_out >= amount_out
+
+
+@pytest.mark.skipif(not os.path.exists(FIXTURES), reason=f"no {LB_FIXTURES} recorded from a live pair")
+def test_recorded_fixtures_match():
+    with open(FIXTURES, 'r') as f:
+        fixtures = json.load(f)
+    assert fixtures["swaps"], "the fixture file has no getSwapOut quotes"
+    assert check_fixtures(fixtures) == []
+
+
+def synthetic_fixtures(bin_step=25, radius=5) -> dict:
+    """Fixtures in the record format, with every on-chain value taken from the local math"""
+    rng = random.Random(5)
+    active_id = REAL_ID_SHIFT + 100
+    fee_parameters = FeeParameters(STATIC_FEES, VARIABLE_FEES)
+    bins = []
+    for bin_id in range(active_id - radius, active_id + radius + 1):
+        x = rng.randint(1, 10**21) if bin_id >= active_id else 0
+        y = rng.randint(1, 10**21) if bin_id <= active_id else 0
+        price = get_price_from_id(bin_id, bin_step)
+        bins.append([bin_id, str(price), str(x), str(y), str(get_liquidity(x, y, price))])
+
+    swaps = []
+    for swap_for_y in (True, False):
+        ordered = bins[::-1] if swap_for_y else bins
+        swap_bins = [
+            (bin_id, int(x), int(y)) for bin_id, _, x, y, _ in ordered
+            if (bin_id <= active_id if swap_for_y else bin_id >= active_id)
+        ]
+        amount_in = 10**20
+        result = simulate_swap_out(swap_bins, active_id, bin_step, fee_parameters, amount_in, swap_for_y, 0)
+        swaps.append([swap_for_y, str(amount_in), *(str(value) for value in result)])
+
+    return {
+        "pair": "0x" + "11" * 20,
+        "block": 1,
+        "timestamp": 0,
+        "active_id": active_id,
+        "bin_step": bin_step,
+        "static_fee_parameters": [str(value) for value in STATIC_FEES],
+        "variable_fee_parameters": [str(value) for value in VARIABLE_FEES],
+        "bins": bins,
+        "ids_from_prices": [[price, bin_id] for bin_id, price, *_ in bins],
+        "swaps": swaps
+    }
+
+
+def test_check_fixtures_accepts_matching_results():
+    assert check_fixtures(synthetic_fixtures()) == []
+
+
+def test_check_fixtures_reports_mismatches():
+    fixtures = synthetic_fixtures()
+    fixtures["bins"][0][1] = str(int(fixtures["bins"][0][1]) + 1)
+    fixtures["swaps"][0][3] = str(int(fixtures["swaps"][0][3]) + 1)
+
+    failures = check_fixtures(fixtures)
+    assert any(failure.startswith("price of bin") for failure in failures)
+    assert any(failure.startswith("swap of") for failure in failures)
@@ -0,0 +1,93 @@
+"""
+Deposit distributions of every liquidity shape, as sent to the router as deltaIds, distributionX and distributionY.
+"""
+import pytest
+
+from liquidity_shapes import DISTRIBUTION_PRECISION, SHAPES, LiquidityShape, shape_weights
+
+BIN_COUNTS = (1, 2, 3, 4, 5, 8, 15, 51)
+
+# Float rounding of the shares, far below a wei of any real deposit
+TOLERANCE = 1000
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("num_bins", BIN_COUNTS)
+def test_distributions_sum_to_precision(shape, num_bins):
+    delta_ids, distribution_x, distribution_y = LiquidityShape(shape, num_bins).parameters()
+    assert len(delta_ids) == len(distribution_x) == len(distribution_y) == num_bins
+    assert sum(distribution_x) == DISTRIBUTION_PRECISION
+    assert sum(distribution_y) == DISTRIBUTION_PRECISION
+    assert all(share >= 0 for share in distribution_x + distribution_y)
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("num_bins", BIN_COUNTS)
+def test_tokens_sit_on_their_side_of_the_active_bin(shape, num_bins):
+    delta_ids, distribution_x, distribution_y = LiquidityShape(shape, num_bins).parameters()
+    for delta, share_x, share_y in zip(delta_ids, distribution_x, distribution_y):
+        if delta < 0:
+            assert share_x == 0
+        if delta > 0:
+            assert share_y == 0
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("num_bins", BIN_COUNTS)
+def test_active_bin_takes_half_its_weight_on_each_side(shape, num_bins):
+    liquidity_shape = LiquidityShape(shape, num_bins)
+    delta_ids, distribution_x, distribution_y = liquidity_shape.parameters()
+    weights = shape_weights(shape, liquidity_shape.deltas).tolist()
+
+    active = delta_ids.index(0)
+    half = weights[active] / 2
+    above = sum(weight for delta, weight in zip(delta_ids, weights) if delta > 0)
+    below = sum(weight for delta, weight in zip(delta_ids, weights) if delta < 0)
+
+    assert abs(distribution_x[active] - DISTRIBUTION_PRECISION * half / (half + above)) <= TOLERANCE
+    assert abs(distribution_y[active] - DISTRIBUTION_PRECISION * half / (half + below)) <= TOLERANCE
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_single_bin_is_the_active_bin_deposit(shape):
+    assert LiquidityShape(shape, 1).parameters() == ([0], [DISTRIBUTION_PRECISION], [DISTRIBUTION_PRECISION])
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_two_bins_put_all_of_x_in_the_active_bin(shape):
+    delta_ids, distribution_x, distribution_y = LiquidityShape(shape, 2).parameters()
+    assert delta_ids == [-1, 0]
+    assert distribution_x == [0, DISTRIBUTION_PRECISION]
+    assert 0 < distribution_y[1] < distribution_y[0]
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("num_bins", [n for n in BIN_COUNTS if n % 2])
+def test_odd_bin_counts_are_symmetric(shape, num_bins):
+    delta_ids, distribution_x, distribution_y = LiquidityShape(shape, num_bins).parameters()
+    assert delta_ids == [-delta for delta in reversed(delta_ids)]
+    assert delta_ids[len(delta_ids) // 2] == 0
+
+    # Token X above the active bin mirrors token Y below it
+    for share_x, share_y in zip(reversed(distribution_x), distribution_y):
+        assert abs(share_x - share_y) <= TOLERANCE
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("num_bins", [n for n in BIN_COUNTS if n % 2 == 0])
+def test_even_bin_counts_take_the_extra_bin_below(shape, num_bins):
+    delta_ids, _, _ = LiquidityShape(shape, num_bins).parameters()
+    assert delta_ids == list(range(-(num_bins // 2), num_bins // 2))
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_bin_ids_follow_the_active_id(shape):
+    liquidity_shape = LiquidityShape(shape, 5)
+    assert liquidity_shape.bin_ids(8388608) == [8388606, 8388607, 8388608, 8388609, 8388610]
+
+
+def test_unknown_shape_and_bin_count_are_rejected():
+    with pytest.raises(Exception, match="Unknown liquidity shape"):
+        LiquidityShape("flat", 3)
+    with pytest.raises(Exception, match="at least 1"):
+        LiquidityShape("spot", 0)
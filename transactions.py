@@ -0,0 +1,279 @@
+import logging
+import threading
+import time
+
+from gas_oracle import GasOracle
+
+app_logger = logging.getLogger('app_logger')
+transaction_logger = logging.getLogger('transaction_logger')
+gas_logger = logging.getLogger('gas_logger')
+
+
+class NonceManager:
+    """
+    Assigns transaction nonces locally.
+
+    The pending nonce is fetched once, on the first transaction after a reset, and
+    incremented locally for every transaction after that. Call `reset` at the start
+    of each cycle and whenever a transaction fails to send, so a gap left by an
+    unsent nonce is resynchronised from the chain.
+    """
+
+    def __init__(self, web3, address):
+        self.web3 = web3
+        self.address = address
+        self.nonce = None
+        self.lock = threading.Lock()
+
+    def next(self) -> int:
+        """Get the next nonce to use"""
+        with self.lock:
+            if self.nonce is None:
+                self.nonce = self.web3.eth.get_transaction_count(self.address, 'pending')
+            nonce = self.nonce
+            self.nonce += 1
+            return nonce
+
+    def reset(self) -> None:
+        """Forget the local nonce so the next transaction refetches it"""
+        with self.lock:
+            self.nonce = None
+
+    def prime(self, nonce) -> None:
+        """Use a pending nonce read alongside other state, unless one is already assigned"""
+        with self.lock:
+            if self.nonce is None:
+                self.nonce = nonce
+
+
+class PendingTransaction:
+    """A sent transaction awaiting its receipt, with the context needed to log it"""
+
+    def __init__(self, tx_hash, tx_type, gas_estimated, details=None, failure_message=None):
+        self.tx_hash = tx_hash
+        self.tx_type = tx_type
+        self.gas_estimated = gas_estimated
+        self.details = details or {}
+        self.failure_message = failure_message or f"{tx_type} transaction failed"
+        self.receipt = None
+        self.timings = {}
+        self.sent_at = None
+
+
+class TxExecutor:
+    """
+    Single build → estimate → sign → send → confirm → log path for every write.
+
+    EIP-1559 fees (from a GasOracle) and the nonce are looked up once per cycle (see
+    `begin_cycle`) and the chain id once per instance. Receipts are awaited by a ReceiptWaiter (see confirmations),
+    which decides how to poll or subscribe and how many blocks to wait. Gas limits come from a fresh estimate with a per-type buffer;
+    if estimation fails the last gas used by the same transaction type is reused
+    before falling back to the per-type default. Every transaction logs the same
+    gas and timing metrics.
+    """
+
+    # Default gas limit and estimate buffer per transaction type
+    GAS_PROFILES = {
+        "TOKEN_APPROVAL": (100000, 1.1),
+        "ADD_LIQUIDITY": (500000, 1.2),
+        "REMOVE_LIQUIDITY": (500000, 1.2),
+        "REBALANCE": (1000000, 1.2),
+        "CLAIM_REWARDS": (250000, 1.5),
+        "TRANSFER_REWARDS": (500000, 1.1),
+        "TRANSFER_TOKENS": (500000, 1.1),
+        "TRADE_REWARDS": (500000, 1.1)
+    }
+    DEFAULT_GAS_PROFILE = (500000, 1.2)
+
+    def __init__(self, web3, account, nonces, receipts, oracle=None):
+        self.web3 = web3
+        self.account = account
+        self.nonces = nonces
+        self.receipts = receipts
+        self.oracle = oracle or GasOracle(web3)
+        self.chain_id = None
+        self.cycle_fees = None
+        self.gas_used = {}
+
+    def begin_cycle(self) -> None:
+        """Forget per-cycle values so the next transaction refetches the nonce and fees"""
+        self.nonces.reset()
+        self.cycle_fees = None
+
+    def prime(self, fee_history=None, nonce=None) -> None:
+        """Seed the cycle's fees and nonce from an eth_feeHistory response and nonce read concurrently with the cycle state"""
+        if fee_history is not None and self.cycle_fees is None:
+            self.cycle_fees = self.oracle.update(fee_history)
+        if nonce is not None:
+            self.nonces.prime(nonce)
+
+    def fees(self):
+        """GasFees the cycle's transactions are sent with"""
+        if self.cycle_fees is None:
+            self.cycle_fees = self.oracle.fees()
+        return self.cycle_fees
+
+    def gas_price(self) -> int:
+        """Expected price per gas of the cycle's transactions, for cost estimates"""
+        return self.fees().price
+
+    def tx_params(self, gas_limit) -> dict:
+        """Transaction fields shared by every write"""
+        if self.chain_id is None:
+            self.chain_id = self.web3.eth.chain_id
+
+        return {
+            'from': self.account.address,
+            'chainId': self.chain_id,
+            'gas': gas_limit,
+            **self.fees().tx_fields()
+        }
+
+    def estimate_gas(self, tx_type, transaction) -> int:
+        """Estimate gas with the type's safety buffer, falling back to learnt or default limits"""
+        gas_fallback, buffer_factor = self.GAS_PROFILES.get(tx_type, self.DEFAULT_GAS_PROFILE)
+        try:
+            estimate = self.web3.eth.estimate_gas({
+                key: transaction[key] for key in ('from', 'to', 'data', 'value') if key in transaction
+            })
+            return int(estimate * buffer_factor)
+
+        except Exception as e:
+            learnt = self.gas_used.get(tx_type)
+            fallback = int(learnt * buffer_factor) if learnt else gas_fallback
+            app_logger.error(f"Gas estimation failed for {tx_type}, using {fallback:,}: {e}")
+            return fallback
+
+    def send(self, contract_function, tx_type, details=None, failure_message=None, value=0):
+        """
+        Build, estimate, sign and send a contract call without waiting for its receipt
+        Args:
+            contract_function: Bound contract function to call
+            tx_type (str): Transaction type, selects the gas profile and labels logs
+            details (dict): Context to include in the transaction log
+            failure_message (str): Message logged if the transaction reverts
+            value (int): Native value to send in wei
+        Returns:
+            PendingTransaction: The sent transaction
+        """
+        timings = {}
+        started = time.perf_counter()
+        try:
+            # Placeholder gas limit stops web3 estimating gas again while building
+            gas_fallback, _ = self.GAS_PROFILES.get(tx_type, self.DEFAULT_GAS_PROFILE)
+            params = self.tx_params(gas_fallback)
+            if value:
+                params['value'] = value
+            transaction = contract_function.build_transaction(params)
+            timings["build_ms"] = _elapsed_ms(started)
+
+            stage = time.perf_counter()
+            transaction['gas'] = self.estimate_gas(tx_type, transaction)
+            timings["estimate_ms"] = _elapsed_ms(stage)
+
+            stage = time.perf_counter()
+            transaction['nonce'] = self.nonces.next()
+            signed_tx = self.web3.eth.account.sign_transaction(transaction, self.account._private_key)
+            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            timings["send_ms"] = _elapsed_ms(stage)
+
+        except Exception:
+            # A nonce may have been taken without a transaction using it
+            self.nonces.reset()
+            raise
+
+        pending = PendingTransaction(
+            tx_hash,
+            tx_type=tx_type,
+            gas_estimated=transaction['gas'],
+            details=details,
+            failure_message=failure_message
+        )
+        pending.timings.update(timings)
+        pending.sent_at = time.perf_counter()
+        return pending
+
+    def wait(self, pending) -> bool:
+        """
+        Wait for a sent transaction's receipt without logging a success
+        Returns:
+            bool: True if the transaction succeeded, False otherwise
+        """
+        try:
+            pending.receipt, confirm_timings = self.receipts.wait(pending.tx_hash)
+            pending.timings.update(confirm_timings)
+            pending.timings["confirm_ms"] = _elapsed_ms(pending.sent_at)
+
+            if pending.receipt.status == 1:
+                self.gas_used[pending.tx_type] = pending.receipt.gasUsed
+                return True
+
+            else:
+                transaction_logger.error(pending.failure_message)
+                return False
+
+        except Exception as e:
+            transaction_logger.error(f"Failed to confirm {pending.tx_type}: {e}")
+            return False
+
+    def confirm(self, pending) -> bool:
+        """
+        Wait for a sent transaction's receipt and log it
+        Returns:
+            bool: True if the transaction succeeded, False otherwise
+        """
+        confirmed = self.wait(pending)
+        if confirmed:
+            self.log_transaction(pending)
+        return confirmed
+
+    def execute(self, contract_function, tx_type, details=None, failure_message=None, value=0) -> bool:
+        """Send a contract call and wait for its receipt"""
+        return self.confirm(self.send(contract_function, tx_type, details, failure_message, value))
+
+    def log_transaction(self, pending):
+        """
+        Logs structured data to transaction and gas loggers
+        Args:
+            pending (PendingTransaction): Confirmed transaction with its receipt and timings
+        """
+        receipt = pending.receipt
+        tx_type = pending.tx_type
+        gas_estimated = pending.gas_estimated
+
+        tx_hash = receipt.transactionHash.hex()
+        gas_used = receipt.gasUsed
+        efficiency = (gas_used / gas_estimated) * 100
+
+        # Log to trasaction logger with structured data
+        transaction_logger.info(
+            f"{tx_type} completed",
+            extra={
+                "tx_type": tx_type,
+                "tx_hash": tx_hash[:10] + "...",
+                "gas_estimated": gas_estimated,
+                "gas_used": gas_used,
+                "efficiency_pc": round(efficiency, 1),
+                "timings_ms": pending.timings,
+                "details": pending.details
+            }
+        )
+        
+        # Log to gas logger for gas usage tracking
+        gas_logger.debug(
+            f"{tx_type}: {gas_estimated:,} allocated → {gas_used:,} used ({efficiency:.1f}%), "
+            f"timings {pending.timings}"
+        )
+        
+        if efficiency > 95:
+            gas_logger.warning(
+                f"{tx_type}: Gas buffer too low ({efficiency:.1f}% efficiency), transaction may be reverted"
+            )
+        elif efficiency < 70:
+            gas_logger.info(
+                f"{tx_type}: Gas buffer too high ({efficiency:.1f}% efficiency), consider reducing buffer"
+            )
+
+
+def _elapsed_ms(started) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
@@ -0,0 +1,189 @@
+"""
+Rebalance trigger policy and offline replay.
+
+Replay a policy over recorded active ids to see how often it would have rebalanced
+and what that would have cost in gas. The history is a CSV with `timestamp` (unix
+seconds) and `active_id` columns:
+
+    python triggers.py history.csv --distance 2 --hysteresis 1 --dwell 300 --bins 5
+"""
+import argparse
+import csv
+import logging
+
+from liquidity_shapes import LiquidityShape
+
+app_logger = logging.getLogger('app_logger')
+
+# Rough gas for a remove → claim → add rebalance, used when replaying without a measured value
+DEFAULT_REBALANCE_GAS = 1000000
+
+
+class TriggerDecision:
+    """Outcome of evaluating the trigger for one cycle"""
+
+    __slots__ = ("rebalance", "distance", "armed_since", "reason")
+
+    def __init__(self, rebalance, distance, armed_since, reason):
+        self.rebalance = rebalance
+        self.distance = distance
+        self.armed_since = armed_since
+        self.reason = reason
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RebalanceTrigger:
+    """
+    Decides when a position should be rebalanced from the active id and the position's bins.
+
+    - distance_bins: the trigger arms once the active id is at least this many bins
+      outside the position. 1 means as soon as it leaves the position's range.
+    - hysteresis_bins: once armed, the trigger only disarms when the active id comes
+      back more than this many bins below the arming distance. Small oscillations
+      around the threshold then do not restart the dwell timer.
+    - min_dwell_seconds: how long the trigger must stay armed before it fires, so a
+      brief excursion out of range does not cost a full rebalance.
+
+    The defaults (1, 0, 0) rebalance as soon as the active id leaves the position.
+    """
+
+    def __init__(self, distance_bins=1, hysteresis_bins=0, min_dwell_seconds=0):
+        if distance_bins < 1:
+            raise Exception(f"Trigger distance must be at least 1 bin, got {distance_bins}")
+
+        self.distance_bins = int(distance_bins)
+        self.hysteresis_bins = int(hysteresis_bins)
+        self.min_dwell_seconds = float(min_dwell_seconds)
+
+    @staticmethod
+    def distance(active_id, bin_ids) -> int:
+        """Bins between the active id and the nearest edge of the position, 0 when inside it"""
+        lowest, highest = min(bin_ids), max(bin_ids)
+        if active_id < lowest:
+            return lowest - active_id
+        if active_id > highest:
+            return active_id - highest
+        return 0
+
+    def evaluate(self, active_id, bin_ids, armed_since=None, now=0.0) -> TriggerDecision:
+        """
+        Evaluate the trigger for one observation
+        Args:
+            active_id (int): Current active id
+            bin_ids (list): Bins the position covers
+            armed_since (float): Unix time the trigger armed, None if it is not armed
+            now (float): Unix time of the observation
+        Returns:
+            TriggerDecision: Whether to rebalance and the armed time to carry forward
+        """
+        distance = self.distance(active_id, bin_ids)
+
+        if armed_since is None:
+            if distance < self.distance_bins:
+                return TriggerDecision(False, distance, None, "in range")
+            armed_since = now
+
+        elif distance == 0 or distance < self.distance_bins - self.hysteresis_bins:
+            return TriggerDecision(False, distance, None, "returned to range")
+
+        dwell = now - armed_since
+        if dwell < self.min_dwell_seconds:
+            return TriggerDecision(False, distance, armed_since, f"armed for {dwell:.0f}s")
+
+        return TriggerDecision(True, distance, armed_since, f"{distance} bins out for {dwell:.0f}s")
+
+    def describe(self) -> dict:
+        return {
+            "distance_bins": self.distance_bins,
+            "hysteresis_bins": self.hysteresis_bins,
+            "min_dwell_seconds": self.min_dwell_seconds
+        }
+
+
+def replay(trigger, timestamps, active_ids, shape, gas_per_rebalance=DEFAULT_REBALANCE_GAS, gas_price_wei=None) -> dict:
+    """
+    Dry-run a trigger over recorded active ids
+    Args:
+        trigger (RebalanceTrigger): Policy to replay
+        timestamps (list): Unix time of each observation, ascending
+        active_ids (list): Active id at each observation
+        shape (LiquidityShape): Shape new positions are opened with
+        gas_per_rebalance (int): Gas one rebalance costs
+        gas_price_wei (int): Gas price to cost the rebalances at, optional
+    Returns:
+        dict: Rebalance count, gas and time in range over the history
+    """
+    if len(timestamps) == 0:
+        return {"observations": 0, "rebalances": 0, "gas": 0}
+
+    bin_ids = shape.bin_ids(active_ids[0])
+    armed_since = None
+    rebalances = 0
+    in_range_seconds = 0.0
+
+    for index, (timestamp, active_id) in enumerate(zip(timestamps, active_ids)):
+        if index > 0 and trigger.distance(active_ids[index - 1], bin_ids) == 0:
+            in_range_seconds += timestamp - timestamps[index - 1]
+
+        decision = trigger.evaluate(active_id, bin_ids, armed_since, timestamp)
+        armed_since = decision.armed_since
+
+        if decision.rebalance:
+            rebalances += 1
+            bin_ids = shape.bin_ids(active_id)
+            armed_since = None
+
+    duration = timestamps[-1] - timestamps[0]
+    report = {
+        "observations": len(timestamps),
+        "duration_hours": round(duration / 3600, 2),
+        "rebalances": rebalances,
+        "gas": rebalances * gas_per_rebalance,
+        "in_range_pc": round(in_range_seconds / duration * 100, 2) if duration > 0 else 100.0,
+        **trigger.describe(),
+        **shape.describe()
+    }
+    if gas_price_wei is not None:
+        report["gas_cost_native"] = report["gas"] * gas_price_wei / 10**18
+
+    return report
+
+
+def load_history(path) -> tuple:
+    """
+    Load recorded active ids from a CSV with timestamp and active_id columns
+    Returns:
+        tuple: (timestamps, active_ids) sorted by timestamp
+    """
+    with open(path, 'r', newline='') as f:
+        rows = sorted((float(row["timestamp"]), int(row["active_id"])) for row in csv.DictReader(f))
+
+    return [row[0] for row in rows], [row[1] for row in rows]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a rebalance trigger over recorded active ids")
+    parser.add_argument("history", help="CSV with timestamp and active_id columns")
+    parser.add_argument("--distance", type=int, default=1, help="Bins outside the position to arm")
+    parser.add_argument("--hysteresis", type=int, default=0, help="Bins back towards the position to disarm")
+    parser.add_argument("--dwell", type=float, default=0, help="Seconds armed before firing")
+    parser.add_argument("--shape", default="spot", help="Liquidity shape of new positions")
+    parser.add_argument("--bins", type=int, default=1, help="Bins per position")
+    parser.add_argument("--gas", type=int, default=DEFAULT_REBALANCE_GAS, help="Gas per rebalance")
+    parser.add_argument("--gas-price-gwei", type=float, default=None, help="Gas price to cost rebalances at")
+    args = parser.parse_args()
+
+    timestamps, active_ids = load_history(args.history)
+    report = replay(
+        RebalanceTrigger(args.distance, args.hysteresis, args.dwell),
+        timestamps,
+        active_ids,
+        LiquidityShape(args.shape, args.bins),
+        gas_per_rebalance=args.gas,
+        gas_price_wei=int(args.gas_price_gwei * 10**9) if args.gas_price_gwei is not None else None
+    )
+
+    for key, value in report.items():
+        print(f"{key}: {value}")